@@ -0,0 +1,71 @@
+"""Compara el escritor DOCX nativo con pandoc sobre la propuesta comercial.
+
+Uso:
+    python benchmarks/native_writer.py              # PROPUESTA_COMERCIAL_PLEXO.md
+    python benchmarks/native_writer.py -n 50 otros.md
+
+Para cada documento mide la mediana y el mínimo de ``repeat`` conversiones
+en memoria con cada escritor, sin caché, e indica si el escritor nativo tuvo
+que recurrir a pandoc.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docconv.engine import convert_markdown  # noqa: E402
+from docconv.native import UnsupportedMarkdown, markdown_to_docx_native  # noqa: E402
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, len(result)
+
+
+def bench(path, repeat):
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    try:
+        markdown_to_docx_native(text)
+        fallback = None
+    except UnsupportedMarkdown as e:
+        fallback = str(e)
+    rows = {}
+    for writer in ("pandoc", "native"):
+        timings, size = measure(lambda: convert_markdown(text, "docx", writer=writer), repeat)
+        rows[writer] = (statistics.median(timings), min(timings), size)
+    return rows, fallback
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "sources", nargs="*",
+        default=[os.path.join(ROOT, "PROPUESTA_COMERCIAL_PLEXO.md")],
+        help="Archivos Markdown a medir (default: la propuesta comercial)",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="Repeticiones (default: 20)")
+    args = parser.parse_args(argv)
+
+    for path in args.sources:
+        rows, fallback = bench(path, args.repeat)
+        print(os.path.basename(path))
+        for writer, (median, best, size) in rows.items():
+            print(f"  {writer:<7} mediana {median * 1000:8.1f} ms  mín {best * 1000:8.1f} ms  {size / 1024:7.1f} KiB")
+        speedup = rows["pandoc"][0] / rows["native"][0]
+        note = f" (recurre a pandoc: {fallback})" if fallback else ""
+        print(f"  nativo {speedup:.1f}x más rápido{note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
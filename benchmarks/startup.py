@@ -0,0 +1,84 @@
+"""Presupuesto de arranque de la CLI medido con ``python -X importtime``.
+
+Uso:
+    python benchmarks/startup.py                 # --help y cache
+    python benchmarks/startup.py --scale 2 -n 9  # máquina de CI lenta
+
+Lanza cada orden en un proceso nuevo, suma el tiempo propio de todos los
+imports que informa ``-X importtime`` y se queda con la mediana de ``repeat``
+ejecuciones. Falla (código 1) si alguna supera su presupuesto en ms o si
+importa un módulo que esas órdenes no necesitan (asyncio, pypandoc, el
+servidor HTTP...), así que sirve como paso de CI; ``docconv/tests/test_startup.py``
+comprueba lo mismo dentro de pytest.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orden -> (argumentos, presupuesto en ms). ``cache`` necesita sqlite3 y
+# dataclasses para abrir el índice; ``--help`` solo argparse.
+COMMANDS = {
+    "help": (["--help"], 45.0),
+    "cache": (["cache"], 90.0),
+}
+# Ninguna de las órdenes medidas convierte, así que no deberían cargarlos
+FORBIDDEN = (
+    "asyncio",
+    "pypandoc",
+    "http.client",
+    "http.server",
+    "docconv.aio",
+    "docconv.engine",
+    "docconv.pool",
+    "docconv.remote",
+    "docconv.service",
+)
+
+
+def import_times(args):
+    """``{módulo: µs propios}`` de un proceso ``python -X importtime -m docconv``."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "docconv", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"python -m docconv {' '.join(args)} falló:\n{proc.stderr}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplica los presupuestos, para máquinas lentas (default: 1)")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Repeticiones (default: 5)")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for label, (command, budget) in COMMANDS.items():
+        budget *= args.scale
+        runs = [import_times(command) for _ in range(args.repeat)]
+        total = statistics.median(sum(times.values()) for times in runs) / 1000
+        loaded = sorted(name for name in FORBIDDEN if name in runs[0])
+        status = "ok" if total <= budget and not loaded else "FALLA"
+        print(f"{label:<8} {total:7.1f} ms  (presupuesto {budget:.0f} ms)  {status}")
+        if loaded:
+            print(f"         importa: {', '.join(loaded)}")
+        if status != "ok":
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
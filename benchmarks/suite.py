@@ -0,0 +1,299 @@
+"""Suite de rendimiento de la conversión: latencia, rendimiento y memoria.
+
+Uso:
+    python benchmarks/suite.py                          # perfil rápido + corpus
+    python benchmarks/suite.py --profile full -n 3
+    python benchmarks/suite.py --engines native,server --cache off,warm
+    python benchmarks/suite.py --compare build/bench/antes.json build/bench/despues.json
+
+Cada caso (dataset x motor x modo de caché) se ejecuta en un proceso nuevo
+para que el pico de RSS no arrastre memoria de casos anteriores; el pico
+incluye los procesos de pandoc hijos. Los datasets son documentos sintéticos
+de tamaño creciente (:mod:`synthetic`) y el corpus Markdown del repositorio.
+
+Motores: ``subprocess`` (un pandoc por documento), ``server`` (``pandoc
+server`` persistente) y ``native`` (escritor DOCX en Python). Modos de caché:
+``off``, ``cold`` (caché vacía en cada ronda) y ``warm`` (caché ya poblada).
+
+Los resultados se guardan como JSON en ``build/bench/`` junto con el commit,
+la versión de pandoc y la máquina, para compararlos con ``--compare``.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic  # noqa: E402
+
+ENGINES = ("subprocess", "server", "native")
+CACHE_MODES = ("off", "cold", "warm")
+
+
+def percentile(values, q):
+    """Percentil ``q`` por rango más cercano."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _open_pool(engine):
+    if engine != "server":
+        return None
+    from docconv.engine import pandoc_path
+    from docconv.pool import PandocServerPool, PandocServerUnavailable
+
+    pool = PandocServerPool(1, pandoc_path())
+    try:
+        pool.start()
+    except PandocServerUnavailable:
+        return None
+    return pool
+
+
+def _native_fallbacks(documents):
+    from docconv.native import UnsupportedMarkdown, parse_markdown
+
+    fallbacks = 0
+    for text in documents:
+        try:
+            parse_markdown(text)
+        except UnsupportedMarkdown:
+            fallbacks += 1
+    return fallbacks
+
+
+def run_case(dataset, documents, engine, cache_mode, repeat, budget):
+    """Mide un caso en el proceso actual; pensado para ejecutarse aislado."""
+    from docconv.cache import ConversionCache
+    from docconv.engine import convert_markdown
+
+    writer = "native" if engine == "native" else "pandoc"
+    pool = _open_pool(engine)
+    cache_dir = tempfile.mkdtemp(prefix="docconv-bench-") if cache_mode != "off" else None
+    cache = ConversionCache(cache_dir) if cache_dir else None
+
+    def convert(text):
+        return convert_markdown(text, "docx", cache=cache, pool=pool, writer=writer)
+
+    try:
+        if cache_mode == "warm":
+            for text in documents:
+                convert(text)
+        latencies = []
+        output_bytes = 0
+        rounds = 0
+        start = time.perf_counter()
+        while rounds < repeat:
+            if cache_mode == "cold":
+                cache.clear()
+            output_bytes = 0
+            for text in documents:
+                t0 = time.perf_counter()
+                output_bytes += len(convert(text))
+                latencies.append(time.perf_counter() - t0)
+            rounds += 1
+            # Los casos muy lentos se cortan tras al menos una ronda
+            if time.perf_counter() - start > budget:
+                break
+        elapsed = sum(latencies)
+    finally:
+        if pool is not None:
+            pool.close()
+        if cache is not None:
+            cache.close()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "dataset": dataset,
+        "engine": engine,
+        "cache": cache_mode,
+        "server_fallback": engine == "server" and pool is None,
+        "native_fallbacks": _native_fallbacks(documents) if engine == "native" else 0,
+        "documents": len(documents),
+        "rounds": rounds,
+        "input_bytes": sum(len(text.encode("utf-8")) for text in documents),
+        "output_bytes": output_bytes,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "mean_ms": elapsed / len(latencies) * 1000,
+        "docs_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        # ru_maxrss está en KiB en Linux; pandoc y Python no comparten memoria
+        "peak_rss_kb": own,
+        "peak_rss_children_kb": children,
+    }
+
+
+def corpus_documents():
+    from docconv.batch import collect_sources
+
+    documents = []
+    for path in collect_sources(["."], ROOT):
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            documents.append(fh.read())
+    return documents
+
+
+def environment():
+    from docconv.engine import pandoc_version
+    from docconv.native import NATIVE_VERSION
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandoc": pandoc_version(),
+        "native_version": NATIVE_VERSION,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def print_result(r):
+    extra = ""
+    if r["server_fallback"]:
+        extra = "  (servidor no disponible: subproceso)"
+    elif r["native_fallbacks"]:
+        extra = f"  ({r['native_fallbacks']} con pandoc)"
+    print(
+        f"{r['dataset']:<14} {r['engine']:<10} {r['cache']:<5} "
+        f"p50 {r['p50_ms']:9.1f} ms  p95 {r['p95_ms']:9.1f} ms  "
+        f"{r['docs_per_s']:8.1f} docs/s  RSS {r['peak_rss_kb'] / 1024:6.1f}"
+        f"+{r['peak_rss_children_kb'] / 1024:.1f} MiB  "
+        f"{r['output_bytes'] / 1024:9.1f} KiB{extra}",
+        flush=True,
+    )
+
+
+def compare(old_path, new_path, threshold):
+    """Compara dos resultados por p50 y devuelve 1 si hay regresiones."""
+    with open(old_path, encoding="utf-8") as fh:
+        old = json.load(fh)
+    with open(new_path, encoding="utf-8") as fh:
+        new = json.load(fh)
+
+    def key(r):
+        return r["dataset"], r["engine"], r["cache"]
+
+    before = {key(r): r for r in old["results"]}
+    print(f"{old['environment']['commit']} -> {new['environment']['commit']}")
+    regressions = 0
+    for r in new["results"]:
+        prev = before.get(key(r))
+        if prev is None or not prev["p50_ms"]:
+            continue
+        ratio = r["p50_ms"] / prev["p50_ms"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  REGRESIÓN"
+            regressions += 1
+        print(
+            f"{r['dataset']:<14} {r['engine']:<10} {r['cache']:<5} "
+            f"p50 {prev['p50_ms']:9.1f} -> {r['p50_ms']:9.1f} ms ({ratio:5.2f}x){mark}"
+        )
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profile", choices=sorted(synthetic.PROFILES), default="quick",
+        help="Tamaños de los documentos sintéticos (default: quick)",
+    )
+    parser.add_argument(
+        "--engines", default=",".join(ENGINES),
+        help=f"Motores separados por comas (default: {','.join(ENGINES)})",
+    )
+    parser.add_argument(
+        "--cache", default=",".join(CACHE_MODES),
+        help=f"Modos de caché separados por comas (default: {','.join(CACHE_MODES)})",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Rondas por caso (default: 5)")
+    parser.add_argument(
+        "--budget", type=float, default=30.0,
+        help="Segundos tras los que un caso deja de repetir rondas (default: 30)",
+    )
+    parser.add_argument("--no-corpus", action="store_true", help="Omite el corpus del repositorio")
+    parser.add_argument("--no-synthetic", action="store_true", help="Omite los documentos sintéticos")
+    parser.add_argument(
+        "-o", "--output", default=None,
+        help="Archivo JSON de resultados (default: build/bench/<commit>-<fecha>.json)",
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("ANTES", "DESPUES"),
+        help="Compara dos archivos de resultados en lugar de medir",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="Aumento relativo del p50 que se considera regresión (default: 0.10)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    modes = [m.strip() for m in args.cache.split(",") if m.strip()]
+    for name, allowed, values in (("motor", ENGINES, engines), ("modo de caché", CACHE_MODES, modes)):
+        unknown = set(values) - set(allowed)
+        if unknown:
+            parser.error(f"{name} desconocido: {', '.join(sorted(unknown))}")
+
+    datasets = {}
+    if not args.no_synthetic:
+        datasets.update({name: [text] for name, text in synthetic.datasets(args.profile).items()})
+    if not args.no_corpus:
+        datasets["corpus"] = corpus_documents()
+
+    env = environment()
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for dataset, documents in datasets.items():
+        # El corpus ya tiene muchos documentos: una ronda basta para los percentiles
+        repeat = 1 if dataset == "corpus" else args.repeat
+        for engine in engines:
+            for mode in modes:
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    future = executor.submit(
+                        run_case, dataset, documents, engine, mode, repeat, args.budget
+                    )
+                    result = future.result()
+                print_result(result)
+                results.append(result)
+
+    output = args.output or os.path.join(
+        ROOT, "build", "bench",
+        f"{env['commit'] or 'local'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump({"environment": env, "results": results}, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados en {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
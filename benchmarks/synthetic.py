@@ -0,0 +1,89 @@
+"""Documentos Markdown sintéticos para las pruebas de rendimiento.
+
+Imitan la propuesta comercial: títulos con emoji, listas con negritas,
+tablas pipe, acentos y símbolos de moneda. Son deterministas para que los
+resultados de distintos commits sean comparables.
+"""
+
+import itertools
+
+EMOJI = "🎯📋📊✨🧩📅👥💰📦⚙️✅⚡💼📈🔴"
+
+SECTION = """\
+## {emoji} SECCIÓN {n}: Gestión de salones y cotizaciones
+
+### {emoji} Características técnicas clave
+
+La plataforma **PLEXO** centraliza la operación de salones de eventos con
+información en tiempo real, reportes de ocupación y *automatización* de
+cobranza. Incluye añadidos como facturación electrónica —CFDI 4.0— y
+“seguimiento post-evento”.
+
+- ✅ **Calendario visual interactivo** (vista día/semana/mes)
+- ✅ **Detección automática de conflictos de horario**
+- ✅ **Múltiples salones/espacios** con gestión independiente
+- ⚡ Reducción de doble reservas a 0%
+
+1. **Multi-Tenant (Multi-Organización)**
+   - Cada cliente tiene su espacio completamente aislado
+   - Datos encriptados y respaldados automáticamente
+2. **Accesibilidad total** desde PC, tablet y smartphone
+
+| Concepto | Inversión | Ahorro anual |
+|----------|----------:|-------------:|
+| Licencia | $15,000 MXN | $45,000 MXN |
+| Soporte | $3,500 MXN | $12,000 MXN |
+
+---
+
+"""
+
+
+def lines_document(lines: int) -> str:
+    """Documento mixto de aproximadamente ``lines`` líneas."""
+    out = ["# 🎯 PROPUESTA SINTÉTICA - PLEXO", ""]
+    for n in itertools.count(1):
+        if len(out) >= lines:
+            break
+        emoji = EMOJI[n % len(EMOJI)]
+        out.extend(SECTION.format(n=n, emoji=emoji).splitlines())
+    return "\n".join(out[:lines]) + "\n"
+
+
+def table_document(rows: int, columns: int = 5) -> str:
+    """Documento con una sola tabla pipe de ``rows`` filas."""
+    header = ["Paquete", "Concepto", "Cantidad", "Precio unitario", "Importe"][:columns]
+    out = [
+        "# 📦 Paquetes y servicios",
+        "",
+        "| " + " | ".join(header) + " |",
+        "|" + "|".join("---:" if i >= 2 else "---" for i in range(len(header))) + "|",
+    ]
+    for i in range(rows):
+        cells = [
+            f"Paquete {EMOJI[i % len(EMOJI)]} {i // 10}",
+            f"**Servicio {i}** — decoración “premium”",
+            str(i % 7 + 1),
+            f"${(i * 137) % 10000:,}.00",
+            f"${(i * 137) % 10000 * (i % 7 + 1):,}.00",
+        ][: len(header)]
+        out.append("| " + " | ".join(cells) + " |")
+    return "\n".join(out) + "\n"
+
+
+# Tamaños por perfil: el rápido cabe en un par de minutos en un portátil
+PROFILES = {
+    "quick": {"lines": (10, 100, 1_000), "table_rows": (10, 1_000)},
+    "full": {"lines": (10, 100, 1_000, 10_000, 100_000), "table_rows": (10, 1_000, 10_000, 50_000)},
+}
+
+
+def datasets(profile: str = "quick") -> dict[str, str]:
+    """Nombre de dataset -> Markdown para un perfil de :data:`PROFILES`."""
+    sizes = PROFILES[profile]
+    docs = {}
+    for lines in sizes["lines"]:
+        docs[f"lines-{lines}"] = lines_document(lines)
+    for rows in sizes["table_rows"]:
+        docs[f"table-{rows}"] = table_document(rows)
+    return docs
@@ -0,0 +1,168 @@
+"""Conversión de la documentación Markdown del repositorio a DOCX con pandoc.
+
+Los nombres públicos se importan de su submódulo al usarlos por primera vez:
+``import docconv`` no carga asyncio, pypandoc ni el servidor HTTP, de modo
+que la CLI arranca rápido cuando solo consulta la caché o muestra la ayuda.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+
+# Submódulo de cada nombre público
+_EXPORTS = {
+    "aio": ("AsyncConverter", "AsyncResult", "run_pandoc_async"),
+    "batch": (
+        "BatchResult",
+        "collect_sources",
+        "convert_batch",
+        "convert_file",
+        "iter_bounded",
+        "open_workers",
+        "write_dead_letter",
+    ),
+    "cache": ("CacheStats", "ConversionCache", "cache_key", "content_digest"),
+    "diagrams": ("DiagramOptions", "DiagramResult", "find_diagrams", "render_diagrams"),
+    "discovery": ("pandoc_version",),
+    "engine": (
+        "FileResult",
+        "convert_bytes",
+        "convert_markdown",
+        "convert_to_file",
+        "markdown_to_docx",
+        "run_pandoc",
+    ),
+    "filters": ("available_filters", "filter_args", "register_filter"),
+    "handbook": ("HandbookResult", "build_handbook", "merge_asts"),
+    "limits": ("ConversionTimeout", "MemoryLimitExceeded", "limits"),
+    "merge": ("merge_docx",),
+    "metrics": ("ConversionMetrics", "JsonLinesWriter", "add_hook", "remove_hook"),
+    "native": ("RowTable", "UnsupportedMarkdown", "markdown_to_docx_native", "write_docx_stream"),
+    "optimize": ("OptimizeOptions", "optimize_docx"),
+    "pool": ("PandocServerPool", "PandocServerUnavailable"),
+    "pricing": ("PriceSheet", "PricingTotals", "compute_totals", "expand_pricing", "load_pricing"),
+    "quotes": ("QuoteRunStats", "generate_quotes", "quote_markdown"),
+    "remote": ("FilesystemStore", "HttpStore", "RemoteStore", "open_remote", "serve_remote"),
+    "render": ("RenderResult", "parse_markdown", "render_ast", "render_formats"),
+    "sections": ("convert_sections", "convert_sections_to_file", "split_sections"),
+    "scheduler": ("ClassPolicy", "PriorityScheduler"),
+    "service": ("RenderService", "ServiceBusy", "serve"),
+    "template": (
+        "build_replacements",
+        "load_records",
+        "render_personalized",
+        "substitute",
+    ),
+    "watch": ("Rebuild", "Watcher", "watch"),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name: str, value: object) -> None:
+        # Importar docconv.limits o docconv.watch no tapa la función del mismo nombre
+        if name in _MODULES and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name: str) -> object:
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Las siguientes consultas ya no pasan por aquí
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+__all__ = [
+    "AsyncConverter",
+    "AsyncResult",
+    "BatchResult",
+    "CacheStats",
+    "ClassPolicy",
+    "ConversionCache",
+    "ConversionMetrics",
+    "ConversionTimeout",
+    "DiagramOptions",
+    "DiagramResult",
+    "FileResult",
+    "FilesystemStore",
+    "HandbookResult",
+    "HttpStore",
+    "JsonLinesWriter",
+    "MemoryLimitExceeded",
+    "OptimizeOptions",
+    "PandocServerPool",
+    "PandocServerUnavailable",
+    "PriceSheet",
+    "PricingTotals",
+    "PriorityScheduler",
+    "QuoteRunStats",
+    "RemoteStore",
+    "Rebuild",
+    "RenderResult",
+    "RenderService",
+    "RowTable",
+    "ServiceBusy",
+    "UnsupportedMarkdown",
+    "Watcher",
+    "add_hook",
+    "available_filters",
+    "build_handbook",
+    "build_replacements",
+    "cache_key",
+    "collect_sources",
+    "compute_totals",
+    "content_digest",
+    "convert_batch",
+    "convert_bytes",
+    "convert_file",
+    "convert_markdown",
+    "convert_sections",
+    "convert_sections_to_file",
+    "convert_to_file",
+    "expand_pricing",
+    "filter_args",
+    "find_diagrams",
+    "generate_quotes",
+    "iter_bounded",
+    "limits",
+    "load_pricing",
+    "load_records",
+    "markdown_to_docx",
+    "markdown_to_docx_native",
+    "merge_asts",
+    "merge_docx",
+    "open_remote",
+    "open_workers",
+    "optimize_docx",
+    "pandoc_version",
+    "parse_markdown",
+    "quote_markdown",
+    "register_filter",
+    "remove_hook",
+    "render_ast",
+    "render_diagrams",
+    "render_formats",
+    "render_personalized",
+    "run_pandoc",
+    "run_pandoc_async",
+    "serve",
+    "serve_remote",
+    "split_sections",
+    "substitute",
+    "watch",
+    "write_dead_letter",
+    "write_docx_stream",
+]
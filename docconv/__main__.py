@@ -0,0 +1,7 @@
+"""``python -m docconv``: la CLI de :mod:`docconv.cli`."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main(prog="python -m docconv"))
@@ -0,0 +1,428 @@
+"""API asíncrona de conversión para servicios basados en asyncio.
+
+:class:`AsyncConverter` convierte sin bloquear el bucle de eventos: lanza
+pandoc con subprocesos de asyncio o envía el documento a servidores ``pandoc
+server`` calientes con un cliente HTTP sobre streams de asyncio, sin un hilo
+por petición. Un semáforo limita las conversiones simultáneas, cada llamada
+admite un tiempo máximo y, si se cancela o vence, el proceso de pandoc que
+la atendía se mata en lugar de quedar trabajando en segundo plano.
+
+Uso::
+
+    async with AsyncConverter(concurrency=4, timeout=30, servers=2) as converter:
+        docx = await converter.convert(markdown)
+        async for result in converter.convert_many(documentos.items()):
+            ...
+
+El escritor nativo se ejecuta en el pool de hilos por defecto de asyncio
+porque es Python puro. Las lecturas y escrituras de la caché también van a
+ese pool: el índice es SQLite y el nivel remoto puede ser HTTP, y ninguno de
+los dos debe bloquear el bucle. Lo mismo la búsqueda de pandoc y de su
+versión, que la primera vez lanza un proceso.
+
+Los límites de :mod:`docconv.limits` activos al llamar se aplican igual que
+en :func:`~docconv.engine.run_pandoc`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Hashable, Iterable
+
+from .cache import ConversionCache, cache_key
+from .engine import (
+    Source,
+    _convert_native,
+    _lookup,
+    _native_applies,
+    _server_options,
+    _store,
+    pandoc_path,
+    pandoc_version,
+    read_source,
+)
+from .filters import key_args, record_timings
+from .limits import HEAP_EXHAUSTED, ConversionTimeout, MemoryLimitExceeded, current_limits
+from .metrics import annotate, measure, phase
+from .native import NATIVE_VERSION
+from .pool import FORMAT_ALIASES, PandocServerUnavailable, _free_port
+
+
+async def run_pandoc_async(
+    source: bytes,
+    to: str,
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+    pandoc: str | None = None,
+) -> bytes:
+    """Equivalente asíncrono de :func:`~docconv.engine.run_pandoc`.
+
+    Si la tarea se cancela mientras pandoc trabaja, el proceso se mata, igual
+    que al vencer el tiempo de los límites activos; el heap se acota con sus
+    opciones ``+RTS``.
+    """
+    fmt = "markdown" if fmt == "md" else fmt
+    limit = current_limits()
+    pandoc = pandoc or await asyncio.to_thread(pandoc_path)
+    command = [pandoc, *limit.rts_args(), "--from", fmt, "--to", to, "--output", "-", *extra_args]
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(source), limit.timeout)
+        except asyncio.TimeoutError:
+            raise ConversionTimeout(f"pandoc no terminó en {limit.timeout:g}s") from None
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode == HEAP_EXHAUSTED and limit.memory_mb:
+        raise MemoryLimitExceeded(f"pandoc superó el límite de {limit.memory_mb} MiB")
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"pandoc falló ({process.returncode}): {error}")
+    record_timings(stderr)
+    return stdout
+
+
+class _AsyncServer:
+    """Un ``pandoc server`` con cliente HTTP/1.0 sobre streams de asyncio.
+
+    Cada petición abre su propia conexión local: con HTTP/1.0 la respuesta
+    termina al cerrarse y no hace falta interpretar longitudes ni chunks.
+    """
+
+    def __init__(self, pandoc: str, timeout: int, startup_timeout: float):
+        self.pandoc = pandoc
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.process: asyncio.subprocess.Process | None = None
+        self.port = 0
+
+    async def start(self) -> None:
+        self.port = _free_port()
+        self.process = await asyncio.create_subprocess_exec(
+            self.pandoc, "server", "--port", str(self.port), "--timeout", str(self.timeout),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.startup_timeout
+        while loop.time() < deadline:
+            if self.process.returncode is not None:
+                error = (await self.process.stderr.read()).decode("utf-8", "replace").strip()
+                self.process = None
+                raise PandocServerUnavailable(f"pandoc server terminó al arrancar: {error}")
+            try:
+                status, _ = await self._request("GET", "/version")
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(0.05)
+        await self.stop()
+        raise PandocServerUnavailable("pandoc server no respondió a tiempo")
+
+    def kill(self) -> None:
+        """Mata el servidor sin esperar; la siguiente petición lo rearranca."""
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+        self.process = None
+
+    async def stop(self) -> None:
+        process, self.process = self.process, None
+        if process is not None and process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+    async def _request(self, method: str, path: str, body: bytes = b"") -> tuple[int, bytes]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            head = (
+                f"{method} {path} HTTP/1.0\r\nHost: 127.0.0.1\r\n"
+                "Content-Type: application/json\r\nAccept: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            )
+            writer.write(head.encode("ascii") + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        status_line, _, rest = response.partition(b"\r\n")
+        _, _, data = rest.partition(b"\r\n\r\n")
+        try:
+            status = int(status_line.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            raise OSError(f"respuesta HTTP no válida: {status_line[:80]!r}") from None
+        return status, data
+
+    async def post(self, payload: dict[str, Any]) -> dict[str, Any]:
+        if self.process is None or self.process.returncode is not None:
+            await self.start()
+        try:
+            status, data = await self._request("POST", "/", json.dumps(payload).encode("utf-8"))
+        except OSError as e:
+            raise PandocServerUnavailable(f"pandoc server no respondió: {e}") from e
+        if status != 200:
+            raise RuntimeError(data.decode("utf-8", "replace").strip() or f"HTTP {status}")
+        result = json.loads(data)
+        if "error" in result:
+            raise RuntimeError(f"pandoc server: {result['error']}")
+        return result
+
+
+@dataclass
+class AsyncResult:
+    """Resultado de una conversión de :meth:`AsyncConverter.convert_many`."""
+
+    key: Hashable
+    output: bytes | None
+    elapsed: float
+    error: str | None = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AsyncConverter:
+    """Conversor asíncrono con concurrencia limitada, timeouts y cancelación.
+
+    ``concurrency`` limita las conversiones simultáneas (por defecto una por
+    núcleo) y ``timeout`` es el máximo en segundos de cada llamada, que
+    :meth:`convert` permite cambiar. Con ``servers`` se arrancan ese número de
+    ``pandoc server`` calientes; si no pueden arrancar se usan subprocesos.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+        cache: ConversionCache | None = None,
+        writer: str = "pandoc",
+        servers: int = 0,
+        pandoc: str | None = None,
+        server_timeout: int = 120,
+        startup_timeout: float = 10.0,
+    ):
+        self.concurrency = max(1, concurrency or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.cache = cache
+        self.writer = writer
+        self.pandoc = pandoc
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._server_count = max(0, servers)
+        self._server_options = (server_timeout, startup_timeout)
+        self._servers: list[_AsyncServer] = []
+        self._idle: asyncio.Queue[_AsyncServer] | None = None
+
+    async def start(self) -> "AsyncConverter":
+        self.pandoc = self.pandoc or await asyncio.to_thread(pandoc_path)
+        # Se resuelve ahora para que la primera clave de caché no espere a pandoc
+        if self.cache is not None:
+            await asyncio.to_thread(pandoc_version)
+        servers = [_AsyncServer(self.pandoc, *self._server_options) for _ in range(self._server_count)]
+        try:
+            await asyncio.gather(*(server.start() for server in servers))
+        except PandocServerUnavailable:
+            await asyncio.gather(*(server.stop() for server in servers))
+            servers = []
+        self._servers = servers
+        self._idle = asyncio.Queue()
+        for server in servers:
+            self._idle.put_nowait(server)
+        return self
+
+    async def close(self) -> None:
+        servers, self._servers = self._servers, []
+        await asyncio.gather(*(server.stop() for server in servers))
+
+    async def __aenter__(self) -> "AsyncConverter":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def convert(
+        self,
+        source: Source,
+        to: str = "docx",
+        fmt: str = "md",
+        extra_args: Iterable[str] = (),
+        timeout: float | None = None,
+    ) -> bytes:
+        """Convierte ``source`` y devuelve los bytes del documento.
+
+        Lanza :class:`TimeoutError` si la conversión supera ``timeout`` (o el
+        del conversor); en ese caso, igual que al cancelar la tarea, el
+        proceso de pandoc se mata.
+        """
+        result, _ = await self._convert(source, to, fmt, list(extra_args), timeout, "<memoria>")
+        return result
+
+    async def convert_many(
+        self,
+        items: Iterable[tuple[Hashable, Source]] | AsyncIterable[tuple[Hashable, Source]],
+        to: str = "docx",
+        fmt: str = "md",
+        extra_args: Iterable[str] = (),
+        timeout: float | None = None,
+    ) -> AsyncIterator[AsyncResult]:
+        """Convierte pares ``(clave, fuente)`` y produce cada resultado al terminar.
+
+        Los errores de un documento no detienen el resto: quedan en
+        :attr:`AsyncResult.error`. Solo se crean tareas para el doble de
+        ``concurrency`` documentos a la vez, así que ``items`` puede ser un
+        iterable perezoso o asíncrono muy largo. Cerrar el generador antes
+        de agotarlo cancela las conversiones en curso.
+        """
+        extra_args = list(extra_args)
+
+        async def run(key: Hashable, source: Source) -> AsyncResult:
+            start = time.perf_counter()
+            try:
+                output, cached = await self._convert(source, to, fmt, extra_args, timeout, str(key))
+            except Exception as e:
+                return AsyncResult(key, None, time.perf_counter() - start, str(e) or type(e).__name__)
+            return AsyncResult(key, output, time.perf_counter() - start, cached=cached)
+
+        if isinstance(items, AsyncIterable):
+            iterator = aiter(items)
+        else:
+            iterator = _as_async(items)
+        pending: set[asyncio.Task[AsyncResult]] = set()
+        limit = self.concurrency * 2
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < limit:
+                    try:
+                        key, source = await anext(iterator)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.create_task(run(key, source)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _convert(
+        self,
+        source: Source,
+        to: str,
+        fmt: str,
+        extra_args: list[str],
+        timeout: float | None,
+        document: str,
+    ) -> tuple[bytes, bool]:
+        timeout = self.timeout if timeout is None else timeout
+        with measure(document, to):
+            data = read_source(source)
+            annotate(input_bytes=len(data))
+            async with self._semaphore:
+                try:
+                    result, cached = await asyncio.wait_for(
+                        self._convert_cached(data, to, fmt, extra_args), timeout
+                    )
+                except ConversionTimeout:
+                    raise
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"la conversión superó {timeout:g}s") from None
+            annotate(output_bytes=len(result))
+        return result, cached
+
+    async def _convert_cached(
+        self, data: bytes, to: str, fmt: str, extra_args: list[str]
+    ) -> tuple[bytes, bool]:
+        cache = self.cache
+        if _native_applies(to, fmt, extra_args, self.writer):
+            key = None
+            if cache is not None:
+                key = cache_key(data, to, f"native-{NATIVE_VERSION}", fmt, key_args(extra_args))
+                cached = await asyncio.to_thread(_lookup, cache, key)
+                if cached is not None:
+                    return cached, True
+            result = await asyncio.to_thread(_convert_native, data)
+            if result is not None:
+                annotate(engine="native")
+                if key is not None:
+                    await asyncio.to_thread(_store, cache, key, result)
+                return result, False
+        key = None
+        if cache is not None:
+            version = await asyncio.to_thread(pandoc_version)
+            key = cache_key(data, to, version, fmt, key_args(extra_args))
+        if key is not None:
+            cached = await asyncio.to_thread(_lookup, cache, key)
+            if cached is not None:
+                return cached, True
+        result = await self._convert_pandoc(data, to, fmt, extra_args)
+        if key is not None:
+            await asyncio.to_thread(_store, cache, key, result)
+        return result, False
+
+    async def _convert_pandoc(self, data: bytes, to: str, fmt: str, extra_args: list[str]) -> bytes:
+        options = _server_options(data, fmt, extra_args) if self._servers else None
+        if options is not None:
+            annotate(engine="server")
+            with phase("pandoc"):
+                try:
+                    return await self._post(data, to, fmt, options)
+                except PandocServerUnavailable:
+                    pass
+        annotate(engine="subprocess")
+        with phase("pandoc"):
+            return await run_pandoc_async(data, to, fmt, extra_args, self.pandoc)
+
+    async def _post(self, data: bytes, to: str, fmt: str, options: dict[str, Any]) -> bytes:
+        payload = dict(options)
+        payload.update(
+            text=data.decode("utf-8"),
+            to=FORMAT_ALIASES.get(to, to),
+            **{"from": FORMAT_ALIASES.get(fmt, fmt)},
+        )
+        server = await self._idle.get()
+        try:
+            try:
+                result = await server.post(payload)
+            except PandocServerUnavailable:
+                server.kill()
+                result = await server.post(payload)
+        except asyncio.CancelledError:
+            # Cancelada o vencida: el servidor seguiría con el documento, se mata
+            server.kill()
+            raise
+        finally:
+            self._idle.put_nowait(server)
+        output = result["output"]
+        if result.get("base64"):
+            return base64.b64decode(output)
+        return output.encode("utf-8")
+
+
+async def _as_async(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
@@ -0,0 +1,506 @@
+"""Conversión por lotes de archivos Markdown usando un pool de procesos.
+
+Con ``engine="server"`` los archivos se reparten entre hilos que envían las
+conversiones a servidores pandoc persistentes (:mod:`docconv.pool`) en lugar
+de lanzar un proceso por documento.
+
+Un documento problemático no detiene el lote: cada conversión corre con los
+límites de :mod:`docconv.limits`, los fallos transitorios se reintentan hasta
+``retries`` veces y, si un proceso del pool muere, los documentos que tenía
+en curso se repiten de uno en uno en un proceso aparte para que un nuevo
+fallo solo afecte al culpable. Un proceso que se queda atascado en Python
+(escritor nativo, posproceso, precios...) no llega a los límites de pandoc:
+el proceso principal le da un plazo y, si lo supera, termina el pool y lo
+sustituye por uno nuevo. Los que fallan definitivamente se listan con
+:func:`write_dead_letter`.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import math
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from .cache import DEFAULT_MAX_BYTES, ConversionCache
+from .diagrams import expand_diagrams
+from .engine import convert_to_file
+from .filters import filter_args
+from .limits import ConversionTimeout, MemoryLimitExceeded, limits
+from .metrics import ConversionMetrics, emit, measure, phase
+from .optimize import OptimizeOptions
+from .pool import PandocServerPool, PandocServerUnavailable
+from .pricing import expand_sidecar
+from .sections import convert_sections_to_file
+
+ENGINES = ("subprocess", "server")
+
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+
+# Directorios que nunca forman parte de la documentación publicada
+EXCLUDED_DIRS = {".git", "node_modules", ".next", "__pycache__", ".venv", "venv"}
+
+DEFAULT_RETRIES = 2
+
+# Errores que pueden no repetirse: servidor caído, recursos del sistema, SQLite ocupado
+TRANSIENT_ERRORS = (
+    PandocServerUnavailable,
+    ConnectionError,
+    BlockingIOError,
+    InterruptedError,
+    sqlite3.OperationalError,
+)
+
+# Tipos de fallo que se reintentan; ``timeout``, ``memory`` y ``error`` son definitivos
+RETRYABLE = ("transient", "crash")
+
+# Margen sobre ``timeout`` antes de matar el proceso: el límite propio avisa mejor
+DEADLINE_GRACE = 5.0
+
+
+@dataclass
+class BatchResult:
+    """Resultado de convertir un archivo dentro de un lote."""
+
+    source: Path
+    output: Path
+    ok: bool
+    elapsed: float
+    error: str | None = None
+    cached: bool = False
+    metrics: ConversionMetrics | None = None
+    failure: str | None = None
+    attempts: int = 1
+    digest: str | None = None
+
+
+def failure_kind(error: BaseException) -> str:
+    """Clasifica ``error`` como ``timeout``, ``memory``, ``transient`` o ``error``."""
+    if isinstance(error, ConversionTimeout):
+        return "timeout"
+    if isinstance(error, MemoryLimitExceeded):
+        return "memory"
+    if isinstance(error, TRANSIENT_ERRORS):
+        return "transient"
+    return "error"
+
+
+def _walk_markdown(directory: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        for name in sorted(filenames):
+            if name.lower().endswith(MARKDOWN_SUFFIXES):
+                yield Path(dirpath) / name
+
+
+def collect_sources(patterns: Iterable[str], root: Path | str = ".") -> list[Path]:
+    """Expande directorios, globs y rutas sueltas a una lista ordenada de Markdown.
+
+    Los directorios se recorren recursivamente; los globs admiten ``**``.
+    Las rutas se devuelven absolutas y sin duplicados.
+    """
+    root = Path(root).resolve()
+    found: dict[Path, None] = {}
+    for pattern in patterns:
+        candidate = (root / pattern) if not os.path.isabs(pattern) else Path(pattern)
+        if candidate.is_dir():
+            matches: Iterable[Path] = _walk_markdown(candidate)
+        elif candidate.is_file():
+            matches = [candidate]
+        else:
+            matches = (
+                Path(p)
+                for p in sorted(glob.glob(str(candidate), recursive=True))
+                if p.lower().endswith(MARKDOWN_SUFFIXES)
+                and not EXCLUDED_DIRS.intersection(Path(p).parts)
+            )
+        for path in matches:
+            found.setdefault(path.resolve(), None)
+    return sorted(found)
+
+
+def output_path_for(source: Path, root: Path, output_dir: Path, to: str = "docx") -> Path:
+    """Ruta de salida que replica la estructura de ``root`` dentro de ``output_dir``."""
+    try:
+        relative = source.resolve().relative_to(root.resolve())
+    except ValueError:
+        # Archivos fuera de la raíz: se colocan en la raíz del árbol de salida
+        relative = Path(source.name)
+    return output_dir / relative.with_suffix(f".{to}")
+
+
+def check_filters(engine: str, filters: tuple[str, ...]) -> None:
+    """Rechaza ``filters`` con ``engine="server"``: el servidor no ejecuta Lua.
+
+    Cada conversión volvería en silencio al subproceso mientras los
+    servidores del pool esperan sin trabajo.
+    """
+    if engine == "server" and filters:
+        raise ValueError("pandoc server no ejecuta filtros Lua: usa engine='subprocess' o sin filtros")
+
+
+@contextmanager
+def open_workers(
+    engine: str = "subprocess",
+    workers: int | None = None,
+    timeout: float | None = None,
+    memory_mb: int | None = None,
+):
+    """Crea el ejecutor de un lote y, con ``engine="server"``, su pool de pandoc.
+
+    Produce ``(executor, pool)``. Con servidores calientes el trabajo se
+    reparte entre hilos que comparten ``pool``; si no pueden arrancar, o con
+    ``engine="subprocess"``, se usa un pool de procesos y ``pool`` es ``None``.
+    ``timeout`` y ``memory_mb`` configuran los servidores como los límites
+    por documento (ver :mod:`docconv.limits`).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"motor desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if engine == "server":
+        try:
+            pool = PandocServerPool(
+                size=workers,
+                timeout=math.ceil(timeout) if timeout else 120,
+                memory_mb=memory_mb,
+            ).start()
+        except PandocServerUnavailable:
+            pool = None
+
+    executor: Executor
+    if pool is not None:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        with executor:
+            yield executor, pool
+    finally:
+        if pool is not None:
+            pool.close()
+
+
+def iter_bounded(
+    executor: Executor,
+    fn: Callable[..., Any],
+    jobs: Iterable[tuple],
+    max_in_flight: int,
+) -> Iterator[Any]:
+    """Ejecuta ``fn(*job)`` para cada job con a lo sumo ``max_in_flight`` pendientes.
+
+    ``jobs`` se consume de forma perezosa, así que puede ser un generador de
+    millones de elementos sin materializarlo. Los resultados se producen en
+    orden de finalización.
+    """
+    pending: set[Future] = set()
+    for job in jobs:
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(executor.submit(fn, *job))
+    for future in as_completed(pending):
+        yield future.result()
+
+
+# Una conexión a la caché por proceso del pool
+_caches: dict[tuple[str, int], ConversionCache] = {}
+
+
+def _open_cache(cache_dir: str, max_bytes: int) -> ConversionCache:
+    key = (cache_dir, max_bytes)
+    if key not in _caches:
+        _caches[key] = ConversionCache(cache_dir, max_bytes)
+    return _caches[key]
+
+
+def convert_file(
+    source: Path | str,
+    output: Path | str,
+    to: str = "docx",
+    cache_dir: str | None = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+    sections: bool = False,
+    timeout: float | None = None,
+    memory_mb: int | None = None,
+    optimize: OptimizeOptions | None = None,
+    filters: Iterable[str] = (),
+    section_workers: int | None = None,
+) -> BatchResult:
+    """Convierte un archivo Markdown a ``to`` y escribe el resultado en ``output``.
+
+    Si se indica ``cache_dir`` los documentos sin cambios se sirven de la caché.
+    Con ``sections`` se convierte sección a sección (ver :mod:`docconv.sections`)
+    en ``section_workers`` hilos y con ``optimize`` se reduce el tamaño del DOCX (ver :mod:`docconv.optimize`).
+    Si junto a ``source`` hay una hoja de precios se expanden sus marcadores
+    (ver :func:`docconv.pricing.expand_sidecar`) y los diagramas mermaid se
+    sustituyen por imágenes (ver :mod:`docconv.diagrams`). ``filters`` es la
+    cadena de filtros Lua que pandoc aplica (ver :mod:`docconv.filters`).
+    Los errores no se propagan: vuelven en el resultado junto con su tipo
+    (ver :func:`failure_kind`).
+    """
+    source, output = Path(source), Path(output)
+    start = time.perf_counter()
+    metrics = None
+    try:
+        with limits(timeout, memory_mb), measure(str(source), to, publish=False) as metrics:
+            cache = _open_cache(cache_dir, cache_max_bytes) if cache_dir else None
+            with phase("load"):
+                data = expand_sidecar(source, source.read_bytes(), raw=to == "docx")
+            data = expand_diagrams(data, to, cache)
+            if sections:
+                convert = partial(convert_sections_to_file, workers=section_workers)
+            else:
+                convert = convert_to_file
+            cached = convert(
+                data,
+                output,
+                to,
+                extra_args=filter_args(filters),
+                cache=cache,
+                pool=pool,
+                writer=writer,
+                optimize=optimize,
+            ).cached
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        error = str(e) or type(e).__name__
+        return BatchResult(
+            source, output, False, elapsed, error, metrics=metrics, failure=failure_kind(e)
+        )
+    elapsed = time.perf_counter() - start
+    return BatchResult(
+        source, output, True, elapsed, cached=cached, metrics=metrics, digest=metrics.digest or None
+    )
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    # El ejecutor no sabe matar una tarea en curso: se matan sus procesos
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(DEADLINE_GRACE)
+        if process.is_alive():
+            process.kill()
+
+
+def convert_batch(
+    sources: Iterable[Path],
+    output_dir: Path | str,
+    root: Path | str = ".",
+    workers: int | None = None,
+    to: str = "docx",
+    progress: Callable[[int, int, BatchResult], None] | None = None,
+    cache_dir: Path | str | None = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    engine: str = "subprocess",
+    writer: str = "pandoc",
+    sections: bool = False,
+    timeout: float | None = None,
+    memory_mb: int | None = None,
+    retries: int = DEFAULT_RETRIES,
+    optimize: OptimizeOptions | None = None,
+    filters: Iterable[str] = (),
+) -> list[BatchResult]:
+    """Convierte ``sources`` en paralelo y escribe un árbol espejo en ``output_dir``.
+
+    ``workers`` por defecto usa todos los núcleos disponibles. ``progress`` se
+    invoca con ``(completados, total, resultado)`` a medida que termina cada
+    archivo, en orden de finalización, y las métricas de cada conversión se
+    entregan a los hooks de :mod:`docconv.metrics` en este proceso. Con
+    ``cache_dir`` los procesos comparten la caché persistente y los documentos
+    sin cambios no se reconvierten.
+
+    ``engine="server"`` mantiene ``workers`` servidores pandoc calientes; si no
+    pueden arrancar se vuelve al pool de procesos con subprocesos de pandoc.
+    ``pandoc server`` no ejecuta filtros Lua, así que no admite ``filters``.
+    ``writer="native"`` genera los DOCX sin pandoc cuando el documento lo
+    permite (ver :mod:`docconv.native`). Con ``sections`` cada documento se
+    convierte por secciones y al editarlo solo se reconvierten las que cambian.
+    ``optimize`` aplica el posproceso de tamaño de :mod:`docconv.optimize` y
+    ``filters`` la cadena de filtros Lua de :mod:`docconv.filters`.
+
+    Cada documento tiene como mucho ``timeout`` segundos y ``memory_mb`` MiB
+    de heap de pandoc. Con el pool de procesos, un documento que sigue en
+    curso :data:`DEADLINE_GRACE` segundos después de ``timeout`` se da por
+    fallido (``timeout``): el pool se termina y los demás documentos que
+    tenía en curso se repiten en uno nuevo. Los fallos transitorios y los de
+    un proceso del pool que murió se reintentan hasta ``retries`` veces; el
+    resto se devuelven con ``ok=False`` sin detener el lote.
+    """
+    filters = tuple(filters)
+    check_filters(engine, filters)
+    root, output_dir = Path(root).resolve(), Path(output_dir).resolve()
+    jobs = [(src, output_path_for(src, root, output_dir, to)) for src in sources]
+    total = len(jobs)
+    cache_dir = str(cache_dir) if cache_dir else None
+    results: list[BatchResult] = []
+    if not jobs:
+        return results
+
+    workers = min(workers or os.cpu_count() or 1, total)
+    # Los hilos de secciones de todos los workers se reparten los núcleos
+    section_workers = max(1, (os.cpu_count() or 1) // workers)
+    options = (to, cache_dir, cache_max_bytes)
+    attempts = [0] * total
+    # Pendientes del pool principal y los que se repiten aislados tras una caída
+    backlog: deque[int] = deque(range(total))
+    isolated: deque[int] = deque()
+    running: dict[Future, tuple[int, Executor]] = {}
+    # Momento de envío de cada tarea, para el plazo de los pools de procesos
+    started: dict[Future, float] = {}
+    deadline = timeout + DEADLINE_GRACE if timeout else None
+
+    with ExitStack() as stack:
+        executor, pool = stack.enter_context(open_workers(engine, workers, timeout, memory_mb))
+        quarantine: Executor | None = None
+
+        def submit(index: int, target: Executor) -> None:
+            src, out = jobs[index]
+            attempts[index] += 1
+            future = target.submit(
+                convert_file,
+                src,
+                out,
+                *options,
+                pool,
+                writer,
+                sections,
+                timeout,
+                memory_mb,
+                optimize,
+                filters,
+                section_workers,
+            )
+            running[future] = (index, target)
+            started[future] = time.monotonic()
+
+        def finish(index: int, result: BatchResult) -> None:
+            result.attempts = attempts[index]
+            results.append(result)
+            if progress:
+                progress(len(results), total, result)
+
+        def expire(now: float) -> None:
+            nonlocal executor, quarantine
+            stuck = {
+                future
+                for future, (_, target) in running.items()
+                if isinstance(target, ProcessPoolExecutor) and now - started[future] > deadline
+            }
+            for target in {running[future][1] for future in stuck}:
+                _terminate(target)
+                for future, (index, owner) in list(running.items()):
+                    if owner is not target:
+                        continue
+                    del running[future]
+                    elapsed = now - started.pop(future)
+                    src, out = jobs[index]
+                    if future in stuck:
+                        error = f"superó el plazo de {deadline:g}s; se reinició el proceso"
+                        finish(index, BatchResult(src, out, False, elapsed, error, failure="timeout"))
+                    else:
+                        # No es culpa suya: se repite sin gastar un intento
+                        attempts[index] -= 1
+                        (isolated if target is quarantine else backlog).appendleft(index)
+                if target is executor:
+                    executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                elif target is quarantine:
+                    quarantine = None
+
+        while backlog or isolated or running:
+            # Como mucho ``workers`` en vuelo: si el pool cae, solo se repiten esos
+            in_flight = sum(target is executor for _, target in running.values())
+            while backlog and in_flight < workers:
+                submit(backlog.popleft(), executor)
+                in_flight += 1
+            if isolated and all(target is not quarantine for _, target in running.values()):
+                if quarantine is None:
+                    quarantine = stack.enter_context(ProcessPoolExecutor(max_workers=1))
+                submit(isolated.popleft(), quarantine)
+
+            wait_for = None
+            if deadline is not None:
+                now = time.monotonic()
+                pending = [
+                    started[future] + deadline - now
+                    for future, (_, target) in running.items()
+                    if isinstance(target, ProcessPoolExecutor)
+                ]
+                wait_for = max(0.0, min(pending)) if pending else None
+            finished, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, target = running.pop(future)
+                started.pop(future)
+                src, out = jobs[index]
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # Un proceso murió (señal, OOM killer): el ejecutor entero queda inservible
+                    result = BatchResult(
+                        src, out, False, 0.0, f"el proceso de conversión terminó: {e}",
+                        failure="crash",
+                    )
+                    if target is executor:
+                        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                    elif target is quarantine:
+                        quarantine = None
+                if result.metrics is not None:
+                    emit(result.metrics)
+                if result.failure in RETRYABLE and attempts[index] <= retries:
+                    (isolated if result.failure == "crash" else backlog).append(index)
+                    continue
+                finish(index, result)
+            if deadline is not None:
+                expire(time.monotonic())
+    results.sort(key=lambda r: r.source)
+    return results
+
+
+def write_dead_letter(results: Iterable[BatchResult], path: Path | str) -> int:
+    """Escribe en ``path`` una línea JSON por documento fallido y devuelve cuántos hay.
+
+    Sin fallos el archivo se elimina, para que no quede el informe de una
+    ejecución anterior.
+    """
+    path = Path(path)
+    failed = [result for result in results if not result.ok]
+    if not failed:
+        path.unlink(missing_ok=True)
+        return 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        for result in failed:
+            record = {
+                "source": str(result.source),
+                "output": str(result.output),
+                "failure": result.failure,
+                "error": result.error,
+                "attempts": result.attempts,
+                "elapsed": round(result.elapsed, 3),
+            }
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(failed)
@@ -0,0 +1,322 @@
+"""Caché persistente de conversiones direccionada por contenido.
+
+La clave de cada entrada combina los bytes del Markdown, la versión del
+binario de pandoc, los formatos de entrada/salida y las opciones de
+conversión, de modo que cualquier cambio en alguno de ellos invalida la
+entrada. Los artefactos se guardan como blobs en disco y un índice SQLite
+lleva el tamaño, el último acceso (para el desalojo LRU) y los contadores de
+aciertos/fallos. SQLite permite que los procesos de un lote compartan la caché
+y un candado interno la hace segura entre hilos del mismo proceso.
+
+Opcionalmente hay un segundo nivel compartido entre máquinas
+(:mod:`docconv.remote`), configurado con ``$DOCCONV_REMOTE_CACHE``: lo que
+falta en disco se busca allí y cada artefacto nuevo se publica allí. Las
+subidas van a un hilo aparte y son best effort (si se acumulan demasiadas se
+descartan), así que una conversión nunca espera al remoto para terminar.
+Tras :data:`REMOTE_FAILURE_LIMIT` fallos seguidos el remoto se ignora
+durante :data:`REMOTE_COOLDOWN` segundos: un servidor caído cuesta unos
+pocos timeouts por proceso, no uno por documento.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .remote import RemoteStore
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# URL o ruta del almacén remoto; los procesos de un lote la heredan
+REMOTE_VARIABLE = "DOCCONV_REMOTE_CACHE"
+REMOTE_FAILURE_LIMIT = 3
+REMOTE_COOLDOWN = 60.0
+# Subidas pendientes como máximo; las que no caben se descartan
+UPLOAD_QUEUE = 64
+
+
+def default_cache_dir() -> Path:
+    """Directorio de caché: ``$DOCCONV_CACHE_DIR`` o ``$XDG_CACHE_HOME/docconv``."""
+    if os.environ.get("DOCCONV_CACHE_DIR"):
+        return Path(os.environ["DOCCONV_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "docconv"
+
+
+def cache_key(
+    source: bytes,
+    to: str,
+    pandoc_version: str,
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+) -> str:
+    """Digest SHA-256 que identifica una conversión concreta."""
+    header = json.dumps(
+        {
+            "pandoc": pandoc_version,
+            "from": fmt,
+            "to": to,
+            "args": list(extra_args),
+        },
+        sort_keys=True,
+    ).encode("utf-8")
+    digest = hashlib.sha256()
+    digest.update(header)
+    digest.update(b"\0")
+    digest.update(source)
+    return digest.hexdigest()
+
+
+def content_digest(data: bytes) -> str:
+    """Digest SHA-256 de un artefacto, apto como ETag o nombre direccionado por contenido."""
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+    size: int
+    max_bytes: int
+    remote_hits: int = 0
+    remote_errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ConversionCache:
+    """Almacén de artefactos convertidos con límite de tamaño y desalojo LRU.
+
+    ``remote`` es el segundo nivel: un :class:`~docconv.remote.RemoteStore`,
+    su URL o ``None`` para usar ``$DOCCONV_REMOTE_CACHE`` si está definida.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        remote: RemoteStore | str | None = None,
+    ):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        if remote is None:
+            remote = os.environ.get(REMOTE_VARIABLE) or None
+        if isinstance(remote, str):
+            from .remote import open_remote
+
+            remote = open_remote(remote)
+        self.remote = remote
+        self.objects = self.directory / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._remote_failures = 0
+        self._remote_retry_at = 0.0
+        self._uploads: deque[tuple[str, bytes]] = deque()
+        self._uploader: threading.Thread | None = None
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(
+            self.directory / "index.sqlite3", timeout=30, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO counters VALUES (?, 0)",
+                [("hits",), ("misses",), ("remote_hits",), ("remote_errors",)],
+            )
+
+    def close(self) -> None:
+        """Espera a las subidas pendientes al remoto y cierra el índice."""
+        uploader = self._uploader
+        if uploader is not None:
+            uploader.join()
+        self._db.close()
+
+    def __enter__(self) -> "ConversionCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _blob_path(self, key: str) -> Path:
+        return self.objects / key[:2] / key
+
+    def _count(self, name: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+    def _remote_available(self) -> bool:
+        return self.remote is not None and time.monotonic() >= self._remote_retry_at
+
+    def _remote_done(self, error: BaseException | None = None) -> None:
+        """Lleva la cuenta de fallos seguidos del remoto y lo aparta si hay demasiados."""
+        with self._lock:
+            if not isinstance(error, OSError):
+                # Un digest que no coincide no dice nada de la disponibilidad
+                self._remote_failures = 0
+            else:
+                self._remote_failures += 1
+                if self._remote_failures >= REMOTE_FAILURE_LIMIT:
+                    self._remote_failures = 0
+                    self._remote_retry_at = time.monotonic() + REMOTE_COOLDOWN
+        if error is not None:
+            self._count("remote_errors")
+
+    def _remote_get(self, key: str) -> bytes | None:
+        try:
+            data = self.remote.get(key)
+        except (OSError, ValueError) as e:
+            # Caída, timeout o digest que no coincide: se sigue sin el remoto
+            self._remote_done(e)
+            return None
+        self._remote_done()
+        if data is not None:
+            self._put_local(key, data)
+            self._count("remote_hits")
+        return data
+
+    def get(self, key: str) -> bytes | None:
+        """Devuelve el artefacto de ``key`` o ``None``; actualiza LRU y contadores.
+
+        Si no está en disco se busca en el almacén remoto y, si está, se
+        guarda en disco y cuenta como acierto.
+        """
+        path = self._blob_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            data = self._remote_get(key) if self._remote_available() else None
+        if data is None:
+            with self._lock, self._db:
+                self.misses += 1
+                # El blob pudo desaparecer fuera de la caché: se olvida la entrada
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count("misses")
+            return None
+        with self._lock, self._db:
+            self.hits += 1
+            self._db.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        self._count("hits")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Guarda ``data`` bajo ``key`` de forma atómica y lo publica en el remoto.
+
+        La subida se hace en segundo plano; :meth:`close` espera a que termine.
+        """
+        self._put_local(key, data)
+        if not self._remote_available():
+            return
+        with self._lock:
+            if len(self._uploads) >= UPLOAD_QUEUE:
+                return
+            self._uploads.append((key, data))
+            if self._uploader is None:
+                # No es daemon: al salir el proceso se terminan las subidas pendientes
+                self._uploader = threading.Thread(target=self._upload, name="docconv-cache-upload")
+                self._uploader.start()
+
+    def _upload(self) -> None:
+        while True:
+            with self._lock:
+                if not self._remote_available():
+                    self._uploads.clear()
+                if not self._uploads:
+                    self._uploader = None
+                    return
+                key, data = self._uploads.popleft()
+            try:
+                self.remote.put(key, data)
+            except (OSError, ValueError) as e:
+                self._remote_done(e)
+            else:
+                self._remote_done()
+
+    def _put_local(self, key: str, data: bytes) -> None:
+        path = self._blob_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, len(data), now, now),
+            )
+        self.evict()
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """Elimina las entradas menos usadas hasta quedar bajo el límite; devuelve cuántas."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            return self._evict(limit)
+
+    def _evict(self, limit: int) -> int:
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= limit:
+            return 0
+        removed = 0
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if total <= limit:
+                break
+            with self._db:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                self._blob_path(key).unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self.evict(max_bytes=0)
+        with self._lock, self._db:
+            self._db.execute("UPDATE counters SET value = 0")
+
+    def stats(self) -> CacheStats:
+        """Contadores persistentes (todas las ejecuciones) y ocupación actual."""
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, value FROM counters"))
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return CacheStats(
+            hits=counters.get("hits", 0),
+            misses=counters.get("misses", 0),
+            entries=entries,
+            size=size,
+            max_bytes=self.max_bytes,
+            remote_hits=counters.get("remote_hits", 0),
+            remote_errors=counters.get("remote_errors", 0),
+        )
@@ -0,0 +1,965 @@
+"""Genera la propuesta comercial en DOCX y convierte la documentación del repo.
+
+Uso:
+    python -m docconv                      # PROPUESTA_COMERCIAL_PLEXO.docx
+    python -m docconv proposal -f docx,html,odt,pdf
+    python -m docconv proposal --writer native   # DOCX sin lanzar pandoc
+    python -m docconv batch . -o build/docs -j 8
+    python -m docconv batch "RESUMEN_*.md" docs/
+    python -m docconv batch . --engine server   # servidores pandoc persistentes
+    python -m docconv batch docs/ --sections     # solo reconvierte las secciones editadas
+    python -m docconv handbook . -o build/MANUAL.docx   # todo el repo en un DOCX con índice
+    python -m docconv proposal --pricing precios.csv   # tablas de precios desde datos
+    python -m docconv campaign clientes.csv -o build/propuestas --engine server
+    python -m docconv quotes export.jsonl --kind contrato --engine server
+    python -m docconv report ventas.csv -o build/ventas.docx   # tabla de 200k filas en streaming
+    python -m docconv watch                # reconvierte la propuesta al guardarla
+    python -m docconv watch docs/ -o build/docs --writer native
+    python -m docconv serve --port 8787 -j 4     # servicio HTTP local de renderizado
+    python -m docconv cache [--clear]      # contadores de la caché
+    python -m docconv remote-cache --root /srv/docconv --host 0.0.0.0   # caché compartida
+    python -m docconv batch . --remote-cache http://cache.interna:8788
+    python -m docconv batch . --metrics build/metrics.jsonl   # fases por documento
+
+En ``batch``, ``watch`` y ``handbook`` los bloques ```` ```mermaid ```` se
+renderizan como imágenes con ``mmdc`` (mermaid-cli) si está instalado, y cada
+imagen se cachea por el código del diagrama y la versión de mmdc.
+
+Con ``--remote-cache`` (o ``$DOCCONV_REMOTE_CACHE``) la caché local tiene un
+segundo nivel compartido por los runners de CI y las instancias del servicio:
+una URL ``http(s)://`` de un servidor ``remote-cache`` o un directorio
+compartido. Lo que una máquina convirtió, las demás lo descargan.
+
+``python convert.py`` en la raíz del repositorio es equivalente. Cada orden
+importa solo los módulos que usa, así que ``--help`` o una propuesta servida
+de la caché no cargan pandoc, asyncio ni el servidor HTTP.
+
+Termina con código 0 si todo se convirtió, 1 si hubo errores y 2 si los
+argumentos no son válidos.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# La propuesta y su hoja de precios viven en la raíz del repositorio
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+proposal_filename = "PROPUESTA_COMERCIAL_PLEXO.md"
+output_filename = "PROPUESTA_COMERCIAL_PLEXO.docx"
+
+
+def open_cache(args):
+    # Siempre con 'with': al cerrar se esperan las subidas pendientes al remoto
+    if args.no_cache:
+        from contextlib import nullcontext
+
+        return nullcontext()
+    from .cache import ConversionCache
+
+    return ConversionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+
+
+def read_source(path):
+    with open(path, encoding='utf-8') as fh:
+        return fh.read()
+
+
+def load_sheet(path, pricing=None):
+    from .pricing import PriceSheet, load_pricing, sidecar_path
+
+    # Las partidas de 'pricing' (JSON, CSV o JSONL) sustituyen a las de la hoja junto a 'path'
+    sidecar = sidecar_path(path)
+    sheet = load_pricing(sidecar) if sidecar.is_file() else PriceSheet()
+    if pricing:
+        sheet = load_pricing(pricing, base=sheet)
+    return sheet
+
+
+def with_pricing(markdown, path, pricing=None, raw=False):
+    from .pricing import expand_pricing
+
+    return expand_pricing(markdown, load_sheet(path, pricing), raw=raw)
+
+
+def convert_proposal(args):
+    from .engine import convert_to_file
+
+    # Por defecto junto a la propuesta, sin depender del directorio actual
+    output_path = args.output or os.path.join(ROOT, output_filename)
+    proposal_path = os.path.join(ROOT, proposal_filename)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+
+    try:
+        extra_args = lua_filter_args(args)
+        markdown = read_source(proposal_path)
+        if formats != ['docx']:
+            source = with_pricing(markdown, proposal_path, args.pricing)
+            with open_cache(args) as cache:
+                return render_proposal(source, formats, output_path, cache, extra_args)
+        # Solo en DOCX las tablas grandes pueden ir como XML de Word
+        source = with_pricing(markdown, proposal_path, args.pricing, raw=True)
+        # Convertir el contenido de Markdown a DOCX (o reutilizar la caché)
+        convert = convert_to_file
+        if args.sections:
+            from .sections import convert_sections_to_file as convert
+        with open_cache(args) as cache:
+            result = convert(
+                source, output_path, 'docx', extra_args=extra_args,
+                cache=cache, writer=args.writer, optimize=optimize_options(args),
+            )
+        if result.written:
+            print(f"Archivo '{output_filename}' creado exitosamente en: {output_path}")
+        else:
+            origin = " (caché)" if result.cached else ""
+            print(f"Archivo '{output_filename}' sin cambios{origin}: {output_path}")
+        if args.reproducible:
+            from .cache import content_digest
+
+            with open(output_path, 'rb') as fh:
+                print(f"sha256: {content_digest(fh.read())}")
+
+    except Exception as e:
+        print(f"Ocurrió un error durante la conversión: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def render_proposal(source, formats, output_path, cache, extra_args=()):
+    from pathlib import Path
+
+    from .engine import write_atomic
+    from .render import render_formats
+
+    # Un solo parseo del Markdown y un escritor en paralelo por formato
+    start = time.perf_counter()
+    result = render_formats(source, formats, cache=cache, extra_args=extra_args)
+    base = os.path.splitext(output_path)[0]
+    for to, data in result.outputs.items():
+        path = f"{base}.{to}"
+        # Quien tenga abierto el archivo anterior nunca ve uno a medio escribir
+        write_atomic(Path(path), data)
+        print(f"Archivo '{os.path.basename(path)}' creado exitosamente en: {path}")
+    for to, reason in result.skipped.items():
+        print(f"Formato '{to}' omitido: {reason}")
+    print(f"{len(result.outputs)} formato(s) en {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def run_batch(args):
+    from .batch import collect_sources, convert_batch, write_dead_letter
+    from .cache import default_cache_dir
+
+    sources = collect_sources(args.sources, root=args.root)
+    if not sources:
+        print("No se encontraron archivos Markdown para convertir.")
+        return 1
+
+    engine = filters_engine(args)
+    print(f"Convirtiendo {len(sources)} archivo(s) a {args.to} en {args.output}")
+
+    def report(done, total, result):
+        status = "ok" if result.ok else "ERROR"
+        if result.ok and result.cached:
+            status = "caché"
+        line = f"[{done}/{total}] {status} {result.source} ({result.elapsed:.2f}s)"
+        if result.attempts > 1:
+            line += f" [intento {result.attempts}]"
+        if result.error:
+            line += f": {result.error}"
+        print(line, flush=True)
+
+    start = time.perf_counter()
+    results = convert_batch(
+        sources,
+        args.output,
+        root=args.root,
+        workers=args.workers,
+        to=args.to,
+        progress=report,
+        cache_dir=None if args.no_cache else (args.cache_dir or default_cache_dir()),
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        engine=engine,
+        writer=args.writer,
+        sections=args.sections,
+        timeout=args.timeout,
+        memory_mb=args.max_memory_mb,
+        retries=args.retries,
+        optimize=optimize_options(args),
+        filters=lua_filters(args),
+    )
+    failed = [r for r in results if not r.ok]
+    hits = sum(1 for r in results if r.cached)
+    print(
+        f"Completado: {len(results) - len(failed)} convertidos, "
+        f"{len(failed)} con error en {time.perf_counter() - start:.2f}s"
+    )
+    if not args.no_cache:
+        print(f"Caché: {hits} aciertos, {len(results) - hits} fallos")
+    dead_letter = args.dead_letter or os.path.join(args.output, "dead-letter.jsonl")
+    if write_dead_letter(results, dead_letter):
+        print(f"Documentos fallidos en {dead_letter}")
+    return 1 if failed else 0
+
+
+def run_handbook(args):
+    from .batch import collect_sources
+    from .handbook import build_handbook
+
+    sources = collect_sources(args.sources or ["."], root=args.root)
+    output = os.path.abspath(args.output)
+    # El propio manual no entra si se escribe en formato Markdown dentro del árbol
+    sources = [s for s in sources if str(s) != output]
+    if not sources:
+        print("No se encontraron archivos Markdown para el manual.")
+        return 1
+
+    pool = None
+    if args.engine == "server":
+        from .pool import PandocServerPool, PandocServerUnavailable
+
+        try:
+            pool = PandocServerPool(size=args.workers or os.cpu_count() or 1).start()
+        except PandocServerUnavailable:
+            pool = None
+    start = time.perf_counter()
+    try:
+        with open_cache(args) as cache:
+            result = build_handbook(
+                sources,
+                args.output,
+                to=args.to,
+                title=args.title,
+                toc_depth=args.toc_depth,
+                extra_args=lua_filter_args(args),
+                cache=cache,
+                pool=pool,
+                workers=args.workers,
+            )
+    finally:
+        if pool is not None:
+            pool.close()
+    print(
+        f"Manual '{result.output}' con {result.documents} documento(s) en "
+        f"{time.perf_counter() - start:.2f}s; parseados: {result.parsed}, "
+        f"de la caché: {result.documents - result.parsed}"
+    )
+    return 0
+
+
+def run_campaign(args):
+    from .pricing import expand_pricing
+    from .template import load_records, render_personalized
+
+    path = args.source or os.path.join(ROOT, proposal_filename)
+    # Los {{campo}} quedan en el AST: los campos de la hoja son los valores por defecto
+    sheet = load_sheet(path, args.pricing)
+    source = expand_pricing(read_source(path), sheet, raw=args.to == 'docx', fields=False)
+
+    def report(done, total, result):
+        status = "ok" if result.ok else "ERROR"
+        count = f"{done}/{total}" if total else f"{done}"
+        line = f"[{count}] {status} {result.output} ({result.elapsed:.2f}s)"
+        if result.error:
+            line += f": {result.error}"
+        print(line, flush=True)
+
+    start = time.perf_counter()
+    with open_cache(args) as cache:
+        results = render_personalized(
+            source,
+            load_records(args.records),
+            args.output,
+            to=args.to,
+            workers=args.workers,
+            engine=args.engine,
+            name_field=args.name_field,
+            cache=cache,
+            progress=report,
+            optimize=optimize_options(args),
+            defaults=sheet.fields,
+        )
+    failed = [r for r in results if not r.ok]
+    print(
+        f"Completado: {len(results) - len(failed)} documentos, "
+        f"{len(failed)} con error en {time.perf_counter() - start:.2f}s"
+    )
+    return 1 if failed else 0
+
+
+def run_quotes(args):
+    from .quotes import TEMPLATES, generate_quotes
+    from .template import load_records
+
+    if args.template:
+        template = read_source(args.template)
+    else:
+        template = TEMPLATES[args.kind]
+
+    def report(done, result):
+        if not result.ok:
+            print(f"[{done}] ERROR {result.output}: {result.error}", flush=True)
+        elif done % args.progress_every == 0:
+            print(f"[{done}] {time.perf_counter() - start:.1f}s", flush=True)
+
+    start = time.perf_counter()
+    stats = generate_quotes(
+        load_records(args.export),
+        args.output,
+        template=template,
+        to=args.to,
+        workers=args.workers,
+        engine=args.engine,
+        max_in_flight=args.max_in_flight,
+        shard_width=args.shard_width,
+        progress=report,
+        writer=args.writer,
+        optimize=optimize_options(args),
+    )
+    rate = stats.total / stats.elapsed if stats.elapsed else 0.0
+    print(
+        f"Completado: {stats.ok} documentos, {stats.failed} con error "
+        f"en {stats.elapsed:.2f}s ({rate:.1f} docs/s)"
+    )
+    return 1 if stats.failed else 0
+
+
+def looks_numeric(value):
+    try:
+        float(str(value).replace(",", "").replace("$", ""))
+    except ValueError:
+        return False
+    return True
+
+
+def run_report(args):
+    from itertools import chain
+
+    from .native import RowTable, write_docx_stream
+    from .template import load_records
+
+    # Los registros se leen y escriben de uno en uno: nunca está la tabla entera en memoria
+    records = iter(load_records(args.data))
+    first = next(records, None)
+    if first is None:
+        print("El archivo no tiene registros.")
+        return 1
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else list(first)
+    aligns = ["right" if looks_numeric(first.get(c)) else "left" for c in columns]
+    rows = ([record.get(c) for c in columns] for record in chain([first], records))
+
+    blocks = []
+    if args.title:
+        blocks.append(f"# {args.title}")
+    if args.intro:
+        blocks.append(read_source(args.intro))
+    blocks.append(RowTable(columns, rows, aligns))
+
+    start = time.perf_counter()
+    count = write_docx_stream(args.output, blocks, title=args.title or "")
+    print(
+        f"Archivo '{args.output}' creado con {count} fila(s) en "
+        f"{time.perf_counter() - start:.2f}s"
+    )
+    return 0
+
+
+def run_watch(args):
+    from .cache import default_cache_dir
+    from .watch import Watcher, watch
+
+    sources = args.sources or [os.path.join(ROOT, proposal_filename)]
+    watcher = Watcher(sources, args.root, args.debounce / 1000)
+    if not watcher.sources and not watcher.trees:
+        watcher.close()
+        print("No se encontraron archivos Markdown para vigilar.")
+        return 1
+
+    def report(rebuild):
+        failed = [r for r in rebuild.results if not r.ok]
+        if rebuild.initial:
+            hits = sum(1 for r in rebuild.results if r.cached)
+            errors = f", {len(failed)} con error" if failed else ""
+            print(
+                f"Conversión inicial: {len(rebuild.results)} archivo(s) en "
+                f"{rebuild.elapsed:.2f}s ({hits} de caché{errors}). "
+                "Vigilando cambios (Ctrl+C para salir)..."
+            )
+        else:
+            names = ", ".join(
+                f"{os.path.relpath(r.source)} ({r.elapsed:.2f}s)" if r.ok
+                else f"{os.path.relpath(r.source)} (ERROR)"
+                for r in rebuild.results
+            )
+            print(f"[{time.strftime('%H:%M:%S')}] {rebuild.elapsed:.2f}s {names}", flush=True)
+        for result in failed:
+            print(f"  ERROR {result.source}: {result.error}", flush=True)
+
+    engine = filters_engine(args)
+    try:
+        watch(
+            sources,
+            args.output,
+            root=args.root,
+            to=args.to,
+            workers=args.workers,
+            engine=engine,
+            writer=args.writer,
+            cache_dir=None if args.no_cache else (args.cache_dir or default_cache_dir()),
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            on_rebuild=report,
+            watcher=watcher,
+            sections=args.sections,
+            filters=lua_filters(args),
+        )
+    except KeyboardInterrupt:
+        print("Vigilancia detenida.")
+    return 0
+
+
+def run_serve(args):
+    from .service import RenderService, serve
+
+    with open_cache(args) as cache:
+        service = RenderService(
+            workers=args.workers or os.cpu_count() or 1,
+            queue_size=args.queue,
+            timeout=args.timeout,
+            engine=args.engine,
+            writer=args.writer,
+            cache=cache,
+            bulk_workers=args.bulk_workers,
+            bulk_queue_size=args.bulk_queue,
+            memory_mb=args.max_memory_mb,
+        )
+        bulk = service.scheduler.policies["bulk"]
+        print(
+            f"Sirviendo en http://{args.host}:{args.port} ({service.workers} workers, "
+            f"hasta {bulk.concurrency} para lotes; Ctrl+C para salir)",
+            flush=True,
+        )
+        try:
+            # serve() espera a los trabajos en curso antes de que se cierre la caché
+            serve(args.host, args.port, service, quiet=args.quiet)
+        except KeyboardInterrupt:
+            print("Servicio detenido.")
+    return 0
+
+
+def run_cache(args):
+    from .cache import ConversionCache
+
+    with ConversionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024) as cache:
+        if args.clear:
+            cache.clear()
+            print(f"Caché vaciada: {cache.directory}")
+        stats = cache.stats()
+        print(f"Directorio: {cache.directory}")
+        print(f"Entradas: {stats.entries} ({stats.size / 1024 / 1024:.1f} / {args.cache_max_mb} MB)")
+        print(f"Aciertos: {stats.hits}  Fallos: {stats.misses}  Tasa: {stats.hit_rate:.0%}")
+        if cache.remote is not None:
+            print(
+                f"Remota: {cache.remote!r}  Descargas: {stats.remote_hits}  "
+                f"Errores: {stats.remote_errors}"
+            )
+    return 0
+
+
+def run_remote_cache(args):
+    from .remote import TOKEN_VARIABLE, serve_remote
+
+    print(
+        f"Caché remota en http://{args.host}:{args.port} sobre {args.root} (Ctrl+C para salir)",
+        flush=True,
+    )
+    try:
+        serve_remote(
+            args.root, args.host, args.port, token=os.environ.get(TOKEN_VARIABLE), quiet=args.quiet
+        )
+    except KeyboardInterrupt:
+        print("Caché remota detenida.")
+    return 0
+
+
+def add_cache_arguments(parser):
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Reconvierte todo sin consultar ni actualizar la caché",
+    )
+    parser.add_argument(
+        "--cache-dir", default=None,
+        help="Directorio de la caché (default: $DOCCONV_CACHE_DIR o ~/.cache/docconv)",
+    )
+    parser.add_argument(
+        "--cache-max-mb", type=int, default=512,
+        help="Tamaño máximo de la caché; se desaloja por LRU (default: 512)",
+    )
+    parser.add_argument(
+        "--remote-cache", default=None, metavar="URL",
+        help="Segundo nivel compartido: http(s)://servidor o un directorio "
+             "(default: $DOCCONV_REMOTE_CACHE)",
+    )
+
+
+def add_metrics_argument(parser):
+    parser.add_argument(
+        "--metrics", default=None, metavar="ARCHIVO",
+        help="Escribe una línea JSON por documento con el tiempo de cada fase, "
+             "bytes y estado de la caché ('-' para stderr)",
+    )
+
+
+def open_metrics(path):
+    from .metrics import JsonLinesWriter, add_hook
+
+    if path == "-":
+        stream = sys.stderr
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        stream = open(path, "a", encoding="utf-8")
+    hook = JsonLinesWriter(stream)
+    add_hook(hook)
+    return hook
+
+
+def close_metrics(hook):
+    from .metrics import remove_hook
+
+    remove_hook(hook)
+    if hook.stream is not sys.stderr:
+        hook.stream.close()
+
+
+def add_writer_argument(parser):
+    parser.add_argument(
+        "--writer", choices=("pandoc", "native"), default="pandoc",
+        help="'native' escribe el DOCX en Python sin lanzar pandoc y vuelve a "
+             "pandoc si el Markdown usa sintaxis no soportada (default: pandoc)",
+    )
+
+
+def add_optimize_arguments(parser):
+    parser.add_argument(
+        "--optimize", action="store_true",
+        help="Reduce el DOCX: una copia por imagen repetida, imágenes al tamaño "
+             "mostrado (requiere Pillow) y sin estilos sin uso",
+    )
+    parser.add_argument(
+        "--reproducible", action="store_true",
+        help="DOCX byte a byte idéntico para el mismo contenido: fechas fijas "
+             "($SOURCE_DATE_EPOCH o 1980-01-01) y orden canónico del zip",
+    )
+    parser.add_argument(
+        "--zip-level", type=int, choices=range(10), default=9, metavar="0-9",
+        help="Nivel de compresión del zip con --optimize o --reproducible; "
+             "0 sin comprimir (default: 9)",
+    )
+    parser.add_argument(
+        "--image-dpi", type=int, default=150,
+        help="Resolución a la que se reducen las imágenes con --optimize (default: 150)",
+    )
+
+
+def optimize_options(args):
+    if not (args.optimize or args.reproducible):
+        return None
+    from .optimize import OptimizeOptions
+
+    return OptimizeOptions(
+        dedupe_media=args.optimize,
+        downscale=args.optimize,
+        prune_styles=args.optimize,
+        dpi=args.image_dpi,
+        compresslevel=args.zip_level,
+        reproducible=args.reproducible,
+    )
+
+
+def add_memory_argument(parser):
+    parser.add_argument(
+        "--max-memory-mb", type=int, default=2048,
+        help="Heap máximo de pandoc por documento en MiB; 0 sin límite (default: 2048)",
+    )
+
+
+def add_pricing_argument(parser):
+    parser.add_argument(
+        "--pricing", default=None, metavar="ARCHIVO",
+        help="Precios en JSON, CSV o JSONL para las tablas {{precios:...}}; se "
+             "superponen a los del <documento>_PRECIOS.json junto al Markdown",
+    )
+
+
+def add_filters_argument(parser):
+    parser.add_argument(
+        "--filters", default=None, metavar="LISTA",
+        help="Filtros Lua que pandoc aplica en orden, separados por comas: anchors, "
+             "tables, heading-emoji, placeholders o rutas a .lua; '' para ninguno "
+             "(default: anchors,tables; ninguno con --writer native). Con filtros, "
+             "--engine server se sustituye por subprocess",
+    )
+
+
+def lua_filters(args):
+    from .filters import parse_filters
+
+    # El escritor nativo no ejecuta Lua: los filtros por defecto lo desactivarían
+    if args.filters is None and getattr(args, "writer", "pandoc") == "native":
+        return []
+    return parse_filters(args.filters)
+
+
+def filters_engine(args):
+    """Motor de batch y watch: pandoc server no ejecuta filtros Lua.
+
+    Sin ``--engine`` (watch) se usa server solo si no hay filtros; un
+    ``--engine server`` explícito con filtros pasa a subprocesos con un aviso
+    en lugar de generar documentos sin ellos.
+    """
+    filters = lua_filters(args)
+    if args.engine is None:
+        return "subprocess" if filters else "server"
+    if args.engine == "server" and filters:
+        print(
+            f"Aviso: pandoc server no ejecuta filtros Lua ({', '.join(filters)}); se usa "
+            "--engine subprocess. Con --filters '' se conserva pandoc server",
+            file=sys.stderr,
+        )
+        return "subprocess"
+    return args.engine
+
+
+def lua_filter_args(args):
+    from .filters import filter_args
+
+    return filter_args(lua_filters(args))
+
+
+def add_sections_argument(parser):
+    parser.add_argument(
+        "--sections", action="store_true",
+        help="Convierte cada documento por secciones en paralelo y une los DOCX; "
+             "con caché, al editar solo se reconvierten las secciones que cambian",
+    )
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Convierte la documentación Markdown del repositorio a DOCX."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    proposal = subparsers.add_parser(
+        "proposal", help="Genera PROPUESTA_COMERCIAL_PLEXO.docx (acción por defecto)"
+    )
+    proposal.add_argument(
+        "-o", "--output", default=None,
+        help=f"Ruta del DOCX (default: {output_filename} junto a convert.py)",
+    )
+    proposal.add_argument(
+        "-f", "--formats", default="docx",
+        help="Formatos separados por comas, p. ej. docx,html,odt,pdf; se parsea "
+             "una sola vez y se renderizan en paralelo (default: docx)",
+    )
+    add_writer_argument(proposal)
+    add_sections_argument(proposal)
+    add_pricing_argument(proposal)
+    add_optimize_arguments(proposal)
+    add_filters_argument(proposal)
+    add_metrics_argument(proposal)
+    add_cache_arguments(proposal)
+    proposal.set_defaults(func=convert_proposal)
+
+    batch = subparsers.add_parser(
+        "batch", help="Convierte en paralelo archivos, directorios o globs de Markdown"
+    )
+    batch.add_argument(
+        "sources", nargs="+", help="Archivos, directorios o globs (admite **)"
+    )
+    batch.add_argument(
+        "-o", "--output", default="build/docs",
+        help="Directorio raíz del árbol de salida (default: build/docs)",
+    )
+    batch.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="Número de procesos (default: todos los núcleos)",
+    )
+    batch.add_argument(
+        "--root", default=".",
+        help="Raíz a partir de la cual se replica la estructura de directorios",
+    )
+    batch.add_argument("--to", default="docx", help="Formato de salida (default: docx)")
+    batch.add_argument(
+        "--engine", choices=("subprocess", "server"), default="subprocess",
+        help="'server' reutiliza procesos 'pandoc server' calientes; "
+             "si no están disponibles se usa un subproceso por archivo",
+    )
+    batch.add_argument(
+        "--timeout", type=float, default=120.0,
+        help="Segundos máximos por documento; al vencer se mata pandoc (default: 120)",
+    )
+    batch.add_argument(
+        "--retries", type=int, default=2,
+        help="Reintentos de fallos transitorios o de procesos caídos (default: 2)",
+    )
+    batch.add_argument(
+        "--dead-letter", default=None, metavar="ARCHIVO",
+        help="Informe JSONL de los documentos fallidos (default: dead-letter.jsonl en --output)",
+    )
+    add_memory_argument(batch)
+    add_writer_argument(batch)
+    add_sections_argument(batch)
+    add_optimize_arguments(batch)
+    add_filters_argument(batch)
+    add_metrics_argument(batch)
+    add_cache_arguments(batch)
+    batch.set_defaults(func=run_batch)
+
+    handbook = subparsers.add_parser(
+        "handbook",
+        help="Une toda la documentación en un solo DOCX con índice, parseando en paralelo",
+    )
+    handbook.add_argument(
+        "sources", nargs="*",
+        help="Archivos, directorios o globs (default: .); los capítulos siguen "
+             "el orden alfabético de las rutas",
+    )
+    handbook.add_argument(
+        "-o", "--output", default="build/MANUAL_OPERACIONES.docx",
+        help="Ruta del manual (default: build/MANUAL_OPERACIONES.docx)",
+    )
+    handbook.add_argument("--root", default=".", help="Raíz de las rutas y globs relativos")
+    handbook.add_argument("--to", default="docx", help="Formato de salida (default: docx)")
+    handbook.add_argument(
+        "--title", default="Manual de operaciones",
+        help="Título del manual (default: Manual de operaciones)",
+    )
+    handbook.add_argument(
+        "--toc-depth", type=int, default=2,
+        help="Niveles de título en el índice; 0 sin índice (default: 2)",
+    )
+    handbook.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="Documentos parseados a la vez (default: todos los núcleos)",
+    )
+    handbook.add_argument(
+        "--engine", choices=("subprocess", "server"), default="subprocess",
+        help="Motor de conversión, como en 'batch' (default: subprocess)",
+    )
+    add_filters_argument(handbook)
+    add_metrics_argument(handbook)
+    add_cache_arguments(handbook)
+    handbook.set_defaults(func=run_handbook)
+
+    campaign = subparsers.add_parser(
+        "campaign",
+        help="Genera una propuesta personalizada por cliente desde un JSON/CSV/JSONL",
+    )
+    campaign.add_argument(
+        "records",
+        help="Archivo de clientes; campos: cliente, fecha_emision, validez, "
+             "archivo o cualquier {{variable}} del documento",
+    )
+    campaign.add_argument(
+        "-s", "--source", default=None,
+        help="Markdown base (default: la propuesta comercial)",
+    )
+    campaign.add_argument(
+        "-o", "--output", default="build/propuestas",
+        help="Directorio de salida (default: build/propuestas)",
+    )
+    campaign.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="Número de workers (default: todos los núcleos)",
+    )
+    campaign.add_argument("--to", default="docx", help="Formato de salida (default: docx)")
+    campaign.add_argument(
+        "--engine", choices=("subprocess", "server"), default="subprocess",
+        help="Motor de conversión, como en 'batch'",
+    )
+    campaign.add_argument(
+        "--name-field", default="archivo",
+        help="Campo con el nombre del archivo de salida (default: archivo)",
+    )
+    add_pricing_argument(campaign)
+    add_optimize_arguments(campaign)
+    add_metrics_argument(campaign)
+    add_cache_arguments(campaign)
+    campaign.set_defaults(func=run_campaign)
+
+    quotes = subparsers.add_parser(
+        "quotes", help="Genera cotizaciones o contratos en streaming desde un export JSONL"
+    )
+    quotes.add_argument("export", help="Export JSONL (o CSV/JSON) de cotizaciones")
+    quotes.add_argument(
+        "-o", "--output", default="build/cotizaciones",
+        help="Directorio de salida (default: build/cotizaciones)",
+    )
+    quotes.add_argument(
+        "--kind", choices=("cotizacion", "contrato"), default="cotizacion",
+        help="Plantilla incluida a usar (default: cotizacion)",
+    )
+    quotes.add_argument(
+        "--template", default=None,
+        help="Plantilla Markdown propia con {{campo}}, {{client.name}}, {{paquetes}}...",
+    )
+    quotes.add_argument("--to", default="docx", help="Formato de salida (default: docx)")
+    quotes.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="Número de workers (default: todos los núcleos)",
+    )
+    quotes.add_argument(
+        "--engine", choices=("subprocess", "server"), default="subprocess",
+        help="Motor de conversión, como en 'batch'",
+    )
+    quotes.add_argument(
+        "--max-in-flight", type=int, default=None,
+        help="Máximo de documentos pendientes a la vez (default: 4 por worker)",
+    )
+    quotes.add_argument(
+        "--shard-width", type=int, default=2,
+        help="Caracteres de hash por subdirectorio de salida; 0 desactiva (default: 2)",
+    )
+    quotes.add_argument(
+        "--progress-every", type=int, default=500,
+        help="Imprime el avance cada N documentos (default: 500)",
+    )
+    add_writer_argument(quotes)
+    add_optimize_arguments(quotes)
+    add_metrics_argument(quotes)
+    quotes.set_defaults(func=run_quotes)
+
+    report = subparsers.add_parser(
+        "report",
+        help="Escribe un CSV/JSONL como tabla DOCX en streaming, con memoria constante",
+    )
+    report.add_argument("data", help="Filas en CSV, JSONL o JSON")
+    report.add_argument(
+        "-o", "--output", default="build/reporte.docx",
+        help="Ruta del DOCX (default: build/reporte.docx)",
+    )
+    report.add_argument("--title", default=None, help="Título del documento")
+    report.add_argument(
+        "--intro", default=None, metavar="ARCHIVO",
+        help="Markdown que se escribe antes de la tabla",
+    )
+    report.add_argument(
+        "--columns", default=None,
+        help="Columnas separadas por comas (default: las del primer registro)",
+    )
+    report.set_defaults(func=run_report)
+
+    watch = subparsers.add_parser(
+        "watch", help="Vigila Markdown con inotify y reconvierte cada archivo al guardarlo"
+    )
+    watch.add_argument(
+        "sources", nargs="*",
+        help="Archivos, directorios o globs (default: PROPUESTA_COMERCIAL_PLEXO.md)",
+    )
+    watch.add_argument(
+        "-o", "--output", default=None,
+        help="Directorio raíz del árbol de salida (default: junto a cada Markdown)",
+    )
+    watch.add_argument(
+        "--root", default=".",
+        help="Raíz a partir de la cual se replica la estructura de directorios",
+    )
+    watch.add_argument("--to", default="docx", help="Formato de salida (default: docx)")
+    watch.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="Número de workers (default: todos los núcleos)",
+    )
+    watch.add_argument(
+        "--engine", choices=("subprocess", "server"), default=None,
+        help="Motor de conversión, como en 'batch' (default: server, ya caliente "
+             "para cada guardado, si no hay filtros Lua; con ellos, subprocess)",
+    )
+    watch.add_argument(
+        "--debounce", type=int, default=100, metavar="MS",
+        help="Milisegundos sin eventos para dar por terminada una ráfaga de guardados "
+             "(default: 100)",
+    )
+    add_writer_argument(watch)
+    add_sections_argument(watch)
+    add_filters_argument(watch)
+    add_metrics_argument(watch)
+    add_cache_arguments(watch)
+    watch.set_defaults(func=run_watch)
+
+    serve = subparsers.add_parser(
+        "serve", help="Servicio HTTP local que renderiza Markdown o plantillas a DOCX/HTML"
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="Interfaz de escucha (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8787, help="Puerto (default: 8787)")
+    serve.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="Conversiones simultáneas (default: todos los núcleos)",
+    )
+    serve.add_argument(
+        "--queue", type=int, default=32,
+        help="Peticiones interactivas en espera antes de responder 429 (default: 32)",
+    )
+    serve.add_argument(
+        "--bulk-workers", type=int, default=None,
+        help="Máximo de workers ocupados por trabajos de lote (default: todos menos uno)",
+    )
+    serve.add_argument(
+        "--bulk-queue", type=int, default=10_000,
+        help="Trabajos de lote en espera antes de responder 429 (default: 10000)",
+    )
+    serve.add_argument(
+        "--timeout", type=float, default=60.0,
+        help="Segundos máximos por documento antes de responder 504 (default: 60)",
+    )
+    serve.add_argument(
+        "--engine", choices=("subprocess", "server"), default="server",
+        help="Motor de conversión, como en 'batch' (default: server). El servicio "
+             "no aplica filtros Lua con ningún motor",
+    )
+    serve.add_argument("--quiet", action="store_true", help="No registra cada petición")
+    add_memory_argument(serve)
+    add_writer_argument(serve)
+    add_metrics_argument(serve)
+    add_cache_arguments(serve)
+    serve.set_defaults(func=run_serve)
+
+    cache = subparsers.add_parser("cache", help="Muestra contadores de la caché o la vacía")
+    cache.add_argument("--clear", action="store_true", help="Elimina todas las entradas")
+    add_cache_arguments(cache)
+    cache.set_defaults(func=run_cache)
+
+    remote = subparsers.add_parser(
+        "remote-cache", help="Sirve un directorio como caché remota compartida por HTTP"
+    )
+    remote.add_argument("--root", required=True, help="Directorio donde se guardan los artefactos")
+    remote.add_argument("--host", default="127.0.0.1", help="Interfaz de escucha (default: 127.0.0.1)")
+    remote.add_argument("--port", type=int, default=8788, help="Puerto (default: 8788)")
+    remote.add_argument("--quiet", action="store_true", help="No registra cada petición")
+    remote.set_defaults(func=run_remote_cache)
+    return parser
+
+
+def main(argv=None, prog=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["proposal", *argv]
+    args = build_parser(prog).parse_args(argv)
+    if getattr(args, "remote_cache", None):
+        # Por el entorno llega también a los procesos de los lotes
+        os.environ["DOCCONV_REMOTE_CACHE"] = args.remote_cache
+    hook = open_metrics(args.metrics) if getattr(args, "metrics", None) else None
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if hook is not None:
+            close_metrics(hook)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Diagramas mermaid del Markdown prerenderizados a imágenes.
+
+pandoc deja los bloques ```` ```mermaid ```` como código. Antes de convertir,
+:func:`render_diagrams` los renderiza con ``mmdc`` (mermaid-cli, instalado
+localmente) en un pool de hilos y sustituye cada bloque por la imagen
+incrustada como URI ``data:``, que pandoc guarda en el DOCX como cualquier
+otra imagen.
+
+Cada imagen se guarda en la :class:`~docconv.cache.ConversionCache` con una
+clave que combina el código del diagrama, la versión de mmdc y las opciones
+de renderizado: en una reconstrucción solo se renderizan los diagramas
+nuevos o editados. Sin mmdc, o si un diagrama no se puede renderizar, el
+bloque se deja como código y el documento se convierte igual.
+"""
+
+from __future__ import annotations
+
+import base64
+import contextvars
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .cache import ConversionCache, cache_key
+from .discovery import cached_tool
+from .limits import current_limits
+from .metrics import phase
+
+RENDERER_FILE = "mmdc.json"
+# Ruta explícita de mmdc y configuración de Puppeteer (p. ej. --no-sandbox en CI)
+RENDERER_VARIABLE = "DOCCONV_MMDC"
+PUPPETEER_VARIABLE = "DOCCONV_PUPPETEER_CONFIG"
+
+DEFAULT_TIMEOUT = 60.0
+# Cada render arranca un Chromium: más hilos que esto satura la máquina
+MAX_WORKERS = 4
+
+MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})[ \t]*([^\n]*)")
+_MERMAID_INFO = re.compile(r"(?:mermaid|\{[^}]*\.mermaid\b[^}]*\})\s*$")
+
+
+@dataclass(frozen=True)
+class DiagramOptions:
+    """Opciones de mmdc. Sin ``fmt`` se usa SVG para HTML y PNG para el resto."""
+
+    fmt: str | None = None
+    theme: str = "default"
+    background: str = "white"
+    scale: int = 2
+
+    def format_for(self, to: str) -> str:
+        fmt = self.fmt or ("svg" if to == "html" else "png")
+        if fmt not in MIME_TYPES:
+            raise ValueError(f"formato de diagrama desconocido: {fmt!r}")
+        return fmt
+
+    def args(self) -> list[str]:
+        return ["--theme", self.theme, "--backgroundColor", self.background, "--scale", str(self.scale)]
+
+
+@dataclass
+class DiagramResult:
+    """Markdown con los diagramas sustituidos y cuántos se renderizaron o fallaron."""
+
+    markdown: str
+    rendered: int = 0
+    cached: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def _discover() -> dict[str, Any]:
+    path = os.environ.get(RENDERER_VARIABLE) or shutil.which("mmdc")
+    if not path:
+        raise FileNotFoundError("mmdc")
+    process = subprocess.run(
+        [path, "--version"], capture_output=True, text=True, timeout=DEFAULT_TIMEOUT, check=True
+    )
+    return {"path": path, "version": process.stdout.strip()}
+
+
+@lru_cache(maxsize=None)
+def find_renderer() -> dict[str, Any] | None:
+    """``{"path", "version"}`` de mmdc o ``None`` si no está instalado."""
+    try:
+        return cached_tool(RENDERER_FILE, _discover, (RENDERER_VARIABLE, "PATH"))
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def find_diagrams(markdown: str) -> list[tuple[int, int, str]]:
+    """``(inicio, fin, código)`` de cada bloque mermaid, en offsets de ``markdown``.
+
+    Los bloques de otros lenguajes se saltan enteros, así que un ejemplo de
+    mermaid dentro de un bloque ```` ```markdown ```` no se renderiza.
+    """
+    lines = markdown.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    blocks = []
+    i = 0
+    while i < len(lines):
+        match = _FENCE.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        fence, info = match.groups()
+        close = next(
+            (
+                j
+                for j in range(i + 1, len(lines))
+                if lines[j].strip().startswith(fence)
+                and set(lines[j].strip()) == {fence[0]}
+            ),
+            None,
+        )
+        if close is None:
+            # Como en pandoc, un delimitador sin cierre no abre bloque
+            i += 1
+            continue
+        if _MERMAID_INFO.match(info.strip()):
+            blocks.append((offsets[i], offsets[close + 1], "".join(lines[i + 1:close])))
+        i = close + 1
+    return blocks
+
+
+def _render(renderer: dict[str, Any], source: str, fmt: str, options: DiagramOptions) -> bytes:
+    timeout = current_limits().timeout or DEFAULT_TIMEOUT
+    with tempfile.TemporaryDirectory(prefix="docconv-mmdc-") as tmp:
+        given = Path(tmp) / "diagram.mmd"
+        output = Path(tmp) / f"diagram.{fmt}"
+        given.write_text(source, encoding="utf-8")
+        command = [
+            renderer["path"], "--input", str(given), "--output", str(output),
+            *options.args(), "--quiet",
+        ]
+        if os.environ.get(PUPPETEER_VARIABLE):
+            command += ["--puppeteerConfigFile", os.environ[PUPPETEER_VARIABLE]]
+        try:
+            process = subprocess.run(command, capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"mmdc no terminó en {timeout:g}s") from None
+        if process.returncode != 0 or not output.is_file():
+            error = process.stderr.decode("utf-8", "replace").strip()
+            raise RuntimeError(f"mmdc falló ({process.returncode}): {error}")
+        return output.read_bytes()
+
+
+def render_diagrams(
+    markdown: str,
+    to: str = "docx",
+    cache: ConversionCache | None = None,
+    workers: int | None = None,
+    options: DiagramOptions | None = None,
+) -> DiagramResult:
+    """Sustituye los bloques mermaid de ``markdown`` por sus imágenes.
+
+    Los diagramas repetidos se renderizan una vez. ``workers`` hilos lanzan
+    mmdc a la vez (por defecto uno por núcleo, hasta :data:`MAX_WORKERS`).
+    """
+    blocks = find_diagrams(markdown)
+    result = DiagramResult(markdown)
+    if not blocks:
+        return result
+    renderer = find_renderer()
+    if renderer is None:
+        result.failed = {source: "mmdc no está instalado" for _, _, source in blocks}
+        return result
+    options = options or DiagramOptions()
+    fmt = options.format_for(to)
+    args = options.args()
+
+    with phase("diagrams"):
+        keys = {
+            source: cache_key(source.encode("utf-8"), fmt, f"mmdc-{renderer['version']}", "mermaid", args)
+            for _, _, source in blocks
+        }
+        images: dict[str, bytes] = {}
+        for source, key in keys.items():
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                images[source] = cached
+        result.cached = len(images)
+
+        pending = [source for source in keys if source not in images]
+        if pending:
+            workers = min(workers or os.cpu_count() or 1, MAX_WORKERS, len(pending))
+            with ThreadPoolExecutor(workers) as executor:
+                futures = {
+                    source: executor.submit(
+                        contextvars.copy_context().run, _render, renderer, source, fmt, options
+                    )
+                    for source in pending
+                }
+                for source, future in futures.items():
+                    try:
+                        images[source] = future.result()
+                    except (OSError, RuntimeError) as e:
+                        result.failed[source] = str(e)
+                        continue
+                    result.rendered += 1
+                    if cache is not None:
+                        cache.put(keys[source], images[source])
+
+    parts = []
+    position = 0
+    for start, end, source in blocks:
+        if source not in images:
+            continue
+        uri = f"data:{MIME_TYPES[fmt]};base64,{base64.b64encode(images[source]).decode('ascii')}"
+        # Líneas en blanco alrededor: la imagen no debe unirse al párrafo vecino
+        parts += [markdown[position:start], f"\n![]({uri})\n\n"]
+        position = end
+    parts.append(markdown[position:])
+    result.markdown = "".join(parts)
+    return result
+
+
+def expand_diagrams(
+    data: bytes, to: str = "docx", cache: ConversionCache | None = None
+) -> bytes:
+    """:func:`render_diagrams` sobre bytes UTF-8; sin bloques mermaid devuelve ``data``."""
+    if b"mermaid" not in data:
+        return data
+    return render_diagrams(data.decode("utf-8"), to, cache).markdown.encode("utf-8")
@@ -0,0 +1,108 @@
+"""Ruta y versión de pandoc, recordadas en disco entre procesos.
+
+``pypandoc`` localiza el binario y ejecuta ``pandoc --version`` en cada
+proceso; en una CLI que se lanza cientos de veces desde hooks y CI eso cuesta
+más que la propia consulta a la caché de conversiones. El resultado se guarda
+en ``pandoc.json`` dentro del directorio de caché junto con el ``mtime`` y el
+tamaño del binario: mientras ni el binario ni ``$PATH``/``$PYPANDOC_PANDOC``
+cambien, no se importa pypandoc ni se lanza ningún proceso.
+
+:func:`cached_tool` aplica lo mismo a otras herramientas externas, como el
+renderizador de diagramas de :mod:`docconv.diagrams`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from typing import Any, Callable
+
+from .cache import default_cache_dir
+
+DISCOVERY_FILE = "pandoc.json"
+
+# Variables de entorno que cambian qué binario de pandoc se encuentra
+PANDOC_VARIABLES = ("PYPANDOC_PANDOC", "PATH")
+
+
+def _fingerprint(path: str) -> list[int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _environment(variables: tuple[str, ...]) -> dict[str, str]:
+    return {name: os.environ.get(name, "") for name in variables}
+
+
+def _load(path: str, variables: tuple[str, ...]) -> dict[str, Any] | None:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            record = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or record.get("env") != _environment(variables):
+        return None
+    binary = record.get("binary")
+    if binary is None or _fingerprint(record.get("path", "")) != binary:
+        return None
+    return record
+
+
+def _save(path: str, record: dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(record, fh)
+        os.replace(tmp, path)
+    except OSError:
+        # Sin caché en disco se vuelve a descubrir en el siguiente proceso
+        pass
+
+
+def cached_tool(
+    filename: str, discover: Callable[[], dict[str, Any]], variables: tuple[str, ...]
+) -> dict[str, Any]:
+    """Registro de una herramienta guardado en ``filename`` o, si caducó, ``discover()``.
+
+    ``discover`` devuelve al menos ``path`` (el binario cuyo ``mtime`` y
+    tamaño validan el registro); ``variables`` son las variables de entorno
+    que cambian qué binario se encuentra.
+    """
+    path = str(default_cache_dir() / filename)
+    record = _load(path, variables)
+    if record is None:
+        record = discover()
+        record.update(binary=_fingerprint(record["path"]), env=_environment(variables))
+        _save(path, record)
+    return record
+
+
+def discover() -> dict[str, Any]:
+    """Localiza pandoc con pypandoc, sin consultar ni actualizar el disco."""
+    import pypandoc
+
+    path = pypandoc.get_pandoc_path()
+    path = shutil.which(path) or path
+    return {"path": path, "version": pypandoc.get_pandoc_version()}
+
+
+@lru_cache(maxsize=None)
+def pandoc_info() -> dict[str, Any]:
+    """``{"path", "version", ...}`` de pandoc, del disco si el binario no cambió."""
+    return cached_tool(DISCOVERY_FILE, discover, PANDOC_VARIABLES)
+
+
+def pandoc_path() -> str:
+    return pandoc_info()["path"]
+
+
+def pandoc_version() -> str:
+    return pandoc_info()["version"]
@@ -0,0 +1,364 @@
+"""Punto único de invocación de pandoc, con caché opcional de resultados.
+
+Las conversiones pasan por un :class:`~docconv.pool.PandocServerPool` cuando
+se proporciona uno; en caso contrario, o si el servidor no está disponible,
+se lanza un subproceso de pandoc por documento.
+
+Con ``writer="native"`` el Markdown a DOCX se genera con el escritor en
+Python de :mod:`docconv.native`, sin pandoc, y solo se recurre a pandoc si el
+documento usa sintaxis que ese escritor no cubre. Con ``optimize`` los DOCX
+pasan por el posproceso de :mod:`docconv.optimize` antes de entregarse.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import stat
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Iterable, Union
+
+from .cache import ConversionCache, cache_key
+from .discovery import pandoc_path, pandoc_version
+from .filters import key_args, record_timings
+from .limits import HEAP_EXHAUSTED, ConversionTimeout, MemoryLimitExceeded, current_limits
+from .metrics import annotate, measure, phase
+
+# El escritor nativo, el posproceso y el pool se importan al usarlos: una
+# conversión servida de la caché no los necesita
+if TYPE_CHECKING:
+    from .optimize import OptimizeOptions
+    from .pool import PandocServerPool
+
+WRITERS = ("pandoc", "native")
+
+# Markdown aceptado por la API en memoria: texto, bytes o un stream legible
+Source = Union[str, bytes, bytearray, memoryview, IO[str], IO[bytes]]
+
+
+def _read_umask() -> int:
+    # os.umask solo se puede leer cambiándola: se hace una vez, al importar
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def output_mode(path: Path) -> int:
+    """Permisos con los que publicar ``path``.
+
+    ``mkstemp`` crea el temporal con 0600; al reemplazar se conservan los del
+    archivo anterior y un archivo nuevo recibe ``0666`` menos la umask, como
+    con ``open``.
+    """
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    with phase("flush"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+                os.fchmod(fh.fileno(), output_mode(path))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """Resultado de :func:`convert_to_file`: si vino de la caché y si se escribió."""
+
+    cached: bool
+    written: bool
+
+
+def publish(
+    output: Path, result: bytes, cached: bool, optimize: OptimizeOptions | None = None
+) -> FileResult:
+    """Escribe ``result`` en ``output`` salvo que sea idéntico a lo que ya hay.
+
+    Solo se compara cuando el resultado puede coincidir: si vino de la caché
+    o si la salida es reproducible (``optimize.reproducible``).
+    """
+    unchanged = cached or (optimize is not None and optimize.reproducible)
+    if unchanged and _same_content(output, result):
+        return FileResult(cached, False)
+    write_atomic(output, result)
+    return FileResult(cached, True)
+
+
+def _same_content(path: Path, data: bytes) -> bool:
+    with phase("flush"):
+        try:
+            if path.stat().st_size != len(data):
+                return False
+            return path.read_bytes() == data
+        except FileNotFoundError:
+            return False
+
+
+def run_pandoc(
+    source: bytes, to: str, fmt: str = "md", extra_args: Iterable[str] = ()
+) -> bytes:
+    """Conversión de un solo uso en un subproceso nuevo de pandoc.
+
+    La salida se lee de stdout, incluso para formatos binarios como docx. Con
+    límites activos (ver :mod:`docconv.limits`) el proceso se mata al vencer
+    el tiempo y su heap se acota. Los tiempos de los filtros Lua de
+    :mod:`docconv.filters` se suman a las métricas.
+    """
+    fmt = "markdown" if fmt == "md" else fmt
+    limit = current_limits()
+    command = [
+        pandoc_path(), *limit.rts_args(), "--from", fmt, "--to", to, "--output", "-", *extra_args
+    ]
+    annotate(engine="subprocess")
+    with phase("pandoc"):
+        try:
+            process = subprocess.run(
+                command, input=source, capture_output=True, timeout=limit.timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise ConversionTimeout(f"pandoc no terminó en {limit.timeout:g}s") from None
+    if process.returncode == HEAP_EXHAUSTED and limit.memory_mb:
+        raise MemoryLimitExceeded(f"pandoc superó el límite de {limit.memory_mb} MiB")
+    if process.returncode != 0:
+        error = process.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"pandoc falló ({process.returncode}): {error}")
+    record_timings(process.stderr)
+    return process.stdout
+
+
+# Opciones de línea de comandos con equivalente en el API JSON del servidor
+SERVER_FLAGS = {
+    "--standalone": ("standalone", True),
+    "-s": ("standalone", True),
+}
+
+
+def _server_options(source: bytes, fmt: str, extra_args: list[str]) -> dict | None:
+    """Opciones para ``pandoc server`` o ``None`` si hace falta el subproceso.
+
+    El servidor no lee archivos locales, así que los documentos con imágenes
+    referenciadas y las opciones sin equivalente JSON usan el subproceso.
+    """
+    image_marker = b'"t":"Image"' if fmt == "json" else b"!["
+    if image_marker in source:
+        return None
+    options = {}
+    for arg in extra_args:
+        if arg not in SERVER_FLAGS:
+            return None
+        name, value = SERVER_FLAGS[arg]
+        options[name] = value
+    return options
+
+
+def _native_applies(to: str, fmt: str, extra_args: list[str], writer: str) -> bool:
+    if writer not in WRITERS:
+        raise ValueError(f"escritor desconocido: {writer!r} (opciones: {', '.join(WRITERS)})")
+    # Las opciones de pandoc (--reference-doc, filtros...) no tienen equivalente nativo
+    return writer == "native" and to == "docx" and fmt in ("md", "markdown") and not extra_args
+
+
+def _convert_native(data: bytes) -> bytes | None:
+    """DOCX del escritor nativo o ``None`` si el documento necesita pandoc."""
+    from .native import UnsupportedMarkdown, markdown_to_docx_native
+
+    try:
+        return markdown_to_docx_native(data.decode("utf-8"))
+    except (UnsupportedMarkdown, UnicodeDecodeError):
+        return None
+
+
+def convert_bytes(
+    source: str | bytes,
+    to: str = "docx",
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+) -> bytes:
+    """Convierte ``source`` y devuelve la salida, usando ``pool`` si es posible.
+
+    ``writer="native"`` prueba primero el escritor DOCX en Python.
+    """
+    extra_args = list(extra_args)
+    data = source.encode("utf-8") if isinstance(source, str) else source
+    if _native_applies(to, fmt, extra_args, writer):
+        result = _convert_native(data)
+        if result is not None:
+            annotate(engine="native")
+            return result
+    options = _server_options(data, fmt, extra_args) if pool is not None else None
+    if options is not None:
+        from .pool import PandocServerUnavailable
+
+        try:
+            annotate(engine="server")
+            with phase("pandoc"):
+                return pool.convert(data, to, fmt, options, timeout=current_limits().timeout)
+        except PandocServerUnavailable:
+            pass
+    return run_pandoc(data, to, fmt, extra_args)
+
+
+def read_source(source: Source) -> bytes:
+    """Normaliza ``source`` a bytes UTF-8, leyendo el stream si es necesario."""
+    with phase("load"):
+        if hasattr(source, "read"):
+            source = source.read()
+        if isinstance(source, str):
+            return source.encode("utf-8")
+        return bytes(source)
+
+
+def convert_cached(
+    data: bytes,
+    to: str,
+    fmt: str,
+    extra_args: list[str],
+    cache: ConversionCache | None,
+    pool: PandocServerPool | None,
+    writer: str = "pandoc",
+    optimize: OptimizeOptions | None = None,
+) -> tuple[bytes, bool]:
+    """Convierte ``data`` consultando ``cache``; devuelve ``(salida, vino_de_caché)``."""
+    annotate(input_bytes=len(data))
+    result, cached = _convert_cached(data, to, fmt, extra_args, cache, pool, writer)
+    if optimize is not None and to == "docx":
+        from .optimize import optimize_docx
+
+        result = optimize_docx(result, optimize, cache)
+    annotate(output_bytes=len(result))
+    return result, cached
+
+
+def _lookup(cache: ConversionCache, key: str) -> bytes | None:
+    with phase("cache"):
+        cached = cache.get(key)
+    annotate(cache="miss" if cached is None else "hit")
+    return cached
+
+
+def _store(cache: ConversionCache, key: str, result: bytes) -> None:
+    with phase("cache"):
+        cache.put(key, result)
+
+
+def _convert_cached(
+    data: bytes,
+    to: str,
+    fmt: str,
+    extra_args: list[str],
+    cache: ConversionCache | None,
+    pool: PandocServerPool | None,
+    writer: str,
+) -> tuple[bytes, bool]:
+    if cache is None:
+        return convert_bytes(data, to, fmt, extra_args, pool=pool, writer=writer), False
+    if _native_applies(to, fmt, extra_args, writer):
+        from .native import NATIVE_VERSION
+
+        # Clave propia sin versión de pandoc: el camino nativo no lo necesita
+        key = cache_key(data, to, f"native-{NATIVE_VERSION}", fmt, key_args(extra_args))
+        cached = _lookup(cache, key)
+        if cached is not None:
+            return cached, True
+        result = _convert_native(data)
+        if result is not None:
+            annotate(engine="native")
+            _store(cache, key, result)
+            return result, False
+    key = cache_key(data, to, pandoc_version(), fmt, key_args(extra_args))
+    cached = _lookup(cache, key)
+    if cached is not None:
+        return cached, True
+    result = convert_bytes(data, to, fmt, extra_args, pool=pool)
+    _store(cache, key, result)
+    return result, False
+
+
+def convert_markdown(
+    source: Source,
+    to: str = "docx",
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+    optimize: OptimizeOptions | None = None,
+) -> bytes:
+    """Convierte Markdown en memoria y devuelve los bytes del documento.
+
+    No escribe en disco ni depende del directorio actual, por lo que el
+    resultado puede enviarse directamente en una respuesta HTTP o subirse a
+    almacenamiento.
+    """
+    with measure("<memoria>", to):
+        data = read_source(source)
+        result, _ = convert_cached(
+            data, to, fmt, list(extra_args), cache, pool, writer, optimize
+        )
+    return result
+
+
+def markdown_to_docx(
+    source: Source,
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+    optimize: OptimizeOptions | None = None,
+) -> io.BytesIO:
+    """Igual que :func:`convert_markdown` a DOCX, pero como ``BytesIO`` rebobinado."""
+    return io.BytesIO(
+        convert_markdown(
+            source,
+            "docx",
+            extra_args=extra_args,
+            cache=cache,
+            pool=pool,
+            writer=writer,
+            optimize=optimize,
+        )
+    )
+
+
+def convert_to_file(
+    source: Source,
+    output: Path | str,
+    to: str = "docx",
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+    optimize: OptimizeOptions | None = None,
+) -> FileResult:
+    """Convierte ``source`` y lo escribe en ``output``.
+
+    Con ``cache`` la conversión se omite si ya existe un artefacto para la
+    misma entrada, versión de pandoc, formatos y opciones; si además el
+    archivo de salida ya tiene ese contenido no se vuelve a escribir, lo
+    mismo que con una salida reproducible (``optimize.reproducible``).
+    """
+    output = Path(output)
+    with measure(str(output), to):
+        data = read_source(source)
+        result, cached = convert_cached(
+            data, to, fmt, list(extra_args), cache, pool, writer, optimize
+        )
+        return publish(output, result, cached, optimize)
@@ -0,0 +1,152 @@
+"""Cadena de filtros Lua que se ejecuta dentro del proceso de pandoc.
+
+Un filtro en Python (pypandoc, pandocfilters) obliga a pandoc a serializar
+el AST a JSON, lanzar un intérprete y volver a leerlo, una vez por filtro y
+documento. Los filtros Lua corren dentro de pandoc sobre el AST ya cargado.
+
+:func:`filter_args` convierte una lista de filtros (nombres registrados o
+rutas a ``.lua``) en opciones de pandoc. Se pasa un único ``--lua-filter``,
+``lua/chain.lua``, que recibe la cadena en los metadatos, aplica cada filtro
+en orden y escribe su tiempo en stderr. :func:`record_timings` suma esos
+tiempos a las métricas como fases ``lua:<nombre>``. Las opciones incluyen
+un digest del contenido de los filtros y :func:`key_args` quita las rutas
+antes de calcular la clave de caché: editar un filtro invalida sus
+entradas, pero dos copias del repositorio en rutas distintas comparten
+caché.
+
+Filtros incluidos (``docconv/lua``):
+
+- ``anchors``: enlaces internos con anclajes de GitHub o incompletos se
+  redirigen al título correspondiente;
+- ``tables``: columnas numéricas alineadas a la derecha;
+- ``heading-emoji``: quita los emojis de los títulos;
+- ``placeholders``: ``{{variable}}`` con los valores de los metadatos.
+
+Con :func:`register_filter` se añaden filtros propios por nombre.
+
+``pandoc server`` acepta la opción ``filters`` pero no la ejecuta, así que
+los lotes con filtros usan subprocesos: ``engine="server"`` con una cadena
+se rechaza (ver :func:`~docconv.batch.check_filters`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Iterable
+
+from .metrics import current
+
+LUA_DIR = Path(__file__).with_name("lua")
+CHAIN = LUA_DIR / "chain.lua"
+
+# Prefijo de las líneas de stderr con el tiempo de cada filtro
+TIMING_PREFIX = b"docconv:lua\t"
+
+DEFAULT_FILTERS = ("anchors", "tables")
+
+_SPEC_PREFIX = "--metadata=docconv_filters="
+
+_registry: dict[str, Path] = {
+    "anchors": LUA_DIR / "anchors.lua",
+    "tables": LUA_DIR / "tables.lua",
+    "heading-emoji": LUA_DIR / "heading_emoji.lua",
+    "placeholders": LUA_DIR / "placeholders.lua",
+}
+
+# Digest por (ruta, mtime, tamaño): no se relee un filtro que no cambió
+_digests: dict[tuple[str, int, int], str] = {}
+
+
+def register_filter(name: str, path: Path | str) -> None:
+    """Registra el filtro Lua ``path`` como ``name`` (sustituye al anterior)."""
+    path = Path(path).resolve()
+    if not path.is_file():
+        raise ValueError(f"no existe el filtro Lua: {path}")
+    _registry[name] = path
+
+
+def available_filters() -> list[str]:
+    return sorted(_registry)
+
+
+def resolve_filter(spec: str) -> tuple[str, Path]:
+    """``(nombre, ruta)`` de un filtro registrado o de una ruta a un ``.lua``."""
+    if spec in _registry:
+        return spec, _registry[spec]
+    path = Path(spec)
+    if path.suffix == ".lua" and path.is_file():
+        return path.stem, path.resolve()
+    raise ValueError(
+        f"filtro Lua desconocido: {spec!r} (registrados: {', '.join(available_filters())})"
+    )
+
+
+def _digest(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _digests:
+        _digests[key] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return _digests[key]
+
+
+def filter_args(filters: Iterable[str]) -> list[str]:
+    """Opciones de pandoc que aplican ``filters`` en orden; ``[]`` si no hay ninguno."""
+    resolved = [resolve_filter(spec) for spec in filters]
+    if not resolved:
+        return []
+    digest = hashlib.sha256(_digest(CHAIN).encode("ascii"))
+    args = [f"--lua-filter={CHAIN}"]
+    for name, path in resolved:
+        digest.update(_digest(path).encode("ascii"))
+        args.append(f"{_SPEC_PREFIX}{name}={path}")
+    args.append(f"--metadata=docconv_filters_sha={digest.hexdigest()[:16]}")
+    return args
+
+
+def key_args(extra_args: Iterable[str]) -> list[str]:
+    """``extra_args`` tal como entran en la clave de caché: la cadena sin rutas.
+
+    El contenido de los filtros ya está en ``docconv_filters_sha``.
+    """
+    result = []
+    for arg in extra_args:
+        if arg == f"--lua-filter={CHAIN}":
+            arg = "--lua-filter=docconv:chain"
+        elif arg.startswith(_SPEC_PREFIX):
+            arg = _SPEC_PREFIX + arg[len(_SPEC_PREFIX):].partition("=")[0]
+        result.append(arg)
+    return result
+
+
+def chain_filters(extra_args: Iterable[str]) -> list[str]:
+    """Nombres de los filtros de la cadena que llevan ``extra_args``, en orden."""
+    return [
+        arg[len(_SPEC_PREFIX):].partition("=")[0]
+        for arg in extra_args
+        if arg.startswith(_SPEC_PREFIX)
+    ]
+
+
+def parse_filters(value: str | None) -> list[str]:
+    """Lista de filtros de una opción ``a,b,ruta.lua`` (``None``: los de por defecto)."""
+    if value is None:
+        return list(DEFAULT_FILTERS)
+    return [spec.strip() for spec in value.split(",") if spec.strip()]
+
+
+def record_timings(stderr: bytes) -> dict[str, float]:
+    """Tiempos por filtro de la salida de error de pandoc, sumados a las métricas."""
+    timings: dict[str, float] = {}
+    if TIMING_PREFIX not in stderr:
+        return timings
+    for line in stderr.splitlines():
+        if line.startswith(TIMING_PREFIX):
+            name, _, seconds = line[len(TIMING_PREFIX):].decode("utf-8").partition("\t")
+            timings[name] = timings.get(name, 0.0) + float(seconds)
+    record = current()
+    if record is not None:
+        for name, seconds in timings.items():
+            record.add(f"lua:{name}", seconds)
+    return timings
+
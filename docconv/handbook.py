@@ -0,0 +1,325 @@
+"""Manual único a partir de muchos documentos, unidos a nivel de AST.
+
+Cada Markdown se parsea por separado al AST JSON de pandoc, en paralelo y a
+través de la :class:`~docconv.cache.ConversionCache`: en la siguiente
+construcción solo se vuelven a parsear los archivos cuyo contenido cambió.
+Los AST se unen en un solo documento en el que:
+
+- cada archivo es un capítulo de nivel 1 (su título ``#`` único, el
+  ``title`` de los metadatos o el nombre del archivo) y sus demás títulos se
+  desplazan para que el mayor quede en nivel 2;
+- los identificadores llevan delante el del capítulo (``guia-demo-intro``),
+  y los enlaces internos (``#intro``) o a otros documentos del manual
+  (``GUIA_DEMO.md#intro``) se reescriben a esos identificadores;
+- las imágenes relativas pasan a rutas absolutas, porque pandoc solo
+  resuelve las del directorio de trabajo;
+- delante va un índice generado con enlaces a los capítulos y secciones.
+
+El documento unido se renderiza una vez con :func:`~docconv.render.render_ast`,
+de modo que si ningún archivo cambió también la salida viene de la caché.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import copy
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from .cache import ConversionCache
+from .diagrams import expand_diagrams
+from .engine import _same_content, convert_cached, write_atomic
+from .metrics import annotate, measure, phase
+from .pool import PandocServerPool
+from .pricing import expand_sidecar
+from .render import render_ast
+
+DEFAULT_TITLE = "Manual de operaciones"
+TOC_TITLE = "Índice"
+TOC_ID = "indice"
+
+# Salto de página antes de cada capítulo; los demás escritores descartan el bloque
+_PAGE_BREAK = {
+    "t": "RawBlock",
+    "c": ["openxml", '<w:p><w:r><w:br w:type="page" /></w:r></w:p>'],
+}
+
+# Elementos con atributos y posición de ``[id, clases, pares]`` en su contenido
+_ATTR_INDEX = {
+    "Header": 1,
+    "Div": 0,
+    "Span": 0,
+    "CodeBlock": 0,
+    "Code": 0,
+    "Link": 0,
+    "Image": 0,
+    "Table": 0,
+    "Figure": 0,
+}
+
+_SCHEME = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+@dataclass
+class HandbookResult:
+    """Resumen de :func:`build_handbook`."""
+
+    output: Path
+    documents: int
+    parsed: int
+
+
+@dataclass
+class _Chapter:
+    path: Path
+    prefix: str
+    ast: dict[str, Any]
+    # Identificador original -> identificador en el manual
+    ids: dict[str, str]
+
+
+def _walk(node: Any, visit) -> None:
+    """Llama a ``visit`` con cada elemento ``{"t", "c"}`` de ``node``, en preorden."""
+    if isinstance(node, list):
+        for item in node:
+            _walk(item, visit)
+    elif isinstance(node, dict):
+        if "t" in node:
+            visit(node)
+        _walk(node.get("c"), visit)
+
+
+def _attr(node: dict[str, Any]) -> list | None:
+    index = _ATTR_INDEX.get(node["t"])
+    return None if index is None else node["c"][index]
+
+
+def _inlines(text: str) -> list[dict[str, Any]]:
+    result: list[dict[str, Any]] = []
+    for word in text.split():
+        if result:
+            result.append({"t": "Space"})
+        result.append({"t": "Str", "c": word})
+    return result
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "doc"
+
+
+def _title(ast: dict[str, Any], path: Path) -> tuple[list, str | None]:
+    """Título del capítulo y, si sale del propio cuerpo, el id de ese título.
+
+    Un único ``#`` que además es el primer título del documento hace de
+    título y se retira del cuerpo.
+    """
+    blocks = ast["blocks"]
+    headers = [i for i, block in enumerate(blocks) if block["t"] == "Header"]
+    top = [i for i in headers if blocks[i]["c"][0] == 1]
+    if len(top) == 1 and top[0] == headers[0]:
+        _, (ident, _, _), inlines = blocks.pop(top[0])["c"]
+        return inlines, ident
+    title = ast.get("meta", {}).get("title")
+    if title and title["t"] == "MetaInlines":
+        return title["c"], None
+    return _inlines(path.stem.replace("_", " ")), None
+
+
+def _rebase(blocks: list) -> None:
+    """Desplaza los títulos para que el de mayor rango quede en nivel 2."""
+    levels: list[int] = []
+    _walk(blocks, lambda node: node["t"] == "Header" and levels.append(node["c"][0]))
+    if not levels:
+        return
+    shift = 2 - min(levels)
+
+    def visit(node: dict[str, Any]) -> None:
+        if node["t"] == "Header":
+            node["c"][0] = min(6, node["c"][0] + shift)
+
+    _walk(blocks, visit)
+
+
+def _chapter(path: Path, ast: dict[str, Any], prefix: str) -> _Chapter:
+    title, title_id = _title(ast, path)
+    _rebase(ast["blocks"])
+    ids = {title_id: prefix} if title_id else {}
+
+    def visit(node: dict[str, Any]) -> None:
+        attr = _attr(node)
+        if attr and attr[0]:
+            attr[0] = ids.setdefault(attr[0], f"{prefix}-{attr[0]}")
+
+    _walk(ast["blocks"], visit)
+    ast["blocks"].insert(0, {"t": "Header", "c": [1, [prefix, [], []], title]})
+    return _Chapter(path, prefix, ast, ids)
+
+
+def _relink(chapter: _Chapter, chapters: dict[Path, _Chapter]) -> None:
+    """Reescribe enlaces internos, enlaces entre documentos y rutas de imágenes."""
+    directory = chapter.path.resolve().parent
+
+    def visit(node: dict[str, Any]) -> None:
+        if node["t"] not in ("Link", "Image"):
+            return
+        target = node["c"][2]
+        url = target[0]
+        if not url or _SCHEME.match(url) or url.startswith("//"):
+            return
+        path, _, fragment = url.partition("#")
+        if node["t"] == "Image":
+            if path and not os.path.isabs(path):
+                target[0] = str(directory / path)
+            return
+        other = chapter if not path else chapters.get((directory / path).resolve())
+        if other is None:
+            return
+        if not fragment:
+            target[0] = f"#{other.prefix}"
+        else:
+            target[0] = "#" + other.ids.get(fragment, f"{other.prefix}-{fragment}")
+
+    _walk(chapter.ast["blocks"], visit)
+
+
+def _toc_text(inlines: list) -> list:
+    """Copia de ``inlines`` apta para un enlace: sin notas ni enlaces anidados."""
+    result = []
+    for inline in inlines:
+        if inline["t"] == "Note":
+            continue
+        if inline["t"] == "Link":
+            result.extend(_toc_text(inline["c"][1]))
+            continue
+        result.append(copy.deepcopy(inline))
+    return result
+
+
+def _toc(blocks: list, depth: int) -> list:
+    """Bloques del índice: título y lista anidada de los títulos hasta ``depth``."""
+    entries = [
+        (block["c"][0], block["c"][1][0], block["c"][2])
+        for block in blocks
+        if block["t"] == "Header"
+        and block["c"][0] <= depth
+        and block["c"][1][0]
+        and "unlisted" not in block["c"][1][1]
+    ]
+
+    def items(i: int, level: int) -> tuple[list, int]:
+        result: list = []
+        while i < len(entries) and entries[i][0] >= level:
+            entry_level, ident, inlines = entries[i]
+            if entry_level == level:
+                link = {"t": "Link", "c": [["", [], []], _toc_text(inlines), [f"#{ident}", ""]]}
+                result.append([{"t": "Plain", "c": [link]}])
+                i += 1
+            elif not result:
+                # Sección sin título de nivel superior: cuelga de un elemento vacío
+                result.append([])
+            if i < len(entries) and entries[i][0] > level:
+                children, i = items(i, level + 1)
+                result[-1].append({"t": "BulletList", "c": children})
+        return result, i
+
+    toc, _ = items(0, 1)
+    header = {"t": "Header", "c": [1, [TOC_ID, ["unnumbered", "unlisted"], []], _inlines(TOC_TITLE)]}
+    return [header, {"t": "BulletList", "c": toc}] if toc else []
+
+
+def merge_asts(
+    documents: Iterable[tuple[Path, dict[str, Any]]],
+    title: str = DEFAULT_TITLE,
+    toc_depth: int = 2,
+    page_breaks: bool = True,
+) -> dict[str, Any]:
+    """Une los AST de ``documents`` (``(ruta, ast)``) en el AST de un manual.
+
+    Los AST se modifican en el sitio. ``toc_depth`` limita el nivel de los
+    títulos que entran en el índice (0 para no generarlo).
+    """
+    chapters: dict[Path, _Chapter] = {}
+    prefixes: set[str] = set()
+    api_version = None
+    for path, ast in documents:
+        api_version = api_version or ast.get("pandoc-api-version")
+        prefix = base = _slug(path.stem)
+        n = 1
+        while prefix in prefixes or prefix == TOC_ID:
+            n += 1
+            prefix = f"{base}-{n}"
+        prefixes.add(prefix)
+        chapters[path.resolve()] = _chapter(path, ast, prefix)
+
+    body: list = []
+    for chapter in chapters.values():
+        _relink(chapter, chapters)
+        if page_breaks and body:
+            body.append(_PAGE_BREAK)
+        body.extend(chapter.ast["blocks"])
+    toc = _toc(body, toc_depth) if toc_depth > 0 else []
+    if toc and page_breaks and body:
+        toc.append(_PAGE_BREAK)
+    return {
+        "pandoc-api-version": api_version or [1, 23, 1],
+        "meta": {"title": {"t": "MetaInlines", "c": _inlines(title)}},
+        "blocks": toc + body,
+    }
+
+
+def build_handbook(
+    sources: Iterable[Path | str],
+    output: Path | str,
+    to: str = "docx",
+    title: str = DEFAULT_TITLE,
+    toc_depth: int = 2,
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    workers: int | None = None,
+) -> HandbookResult:
+    """Parsea ``sources`` en paralelo, los une con :func:`merge_asts` y escribe ``output``.
+
+    ``workers`` hilos parsean a la vez (por defecto uno por núcleo). Los
+    marcadores de precios de cada documento se expanden con su hoja
+    ``_PRECIOS.json`` y sus diagramas mermaid se renderizan, como en los lotes.
+    """
+    sources = [Path(source) for source in sources]
+    if not sources:
+        raise ValueError("no hay documentos para el manual")
+    output = Path(output)
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+
+    def parse(path: Path) -> tuple[dict[str, Any], bool]:
+        data = expand_sidecar(path, path.read_bytes(), raw=to == "docx")
+        data = expand_diagrams(data, to, cache)
+        try:
+            ast, cached = convert_cached(data, "json", "md", [], cache, pool)
+        except RuntimeError as e:
+            raise RuntimeError(f"{path}: {e}") from e
+        return json.loads(ast), cached
+
+    with measure(str(output), to):
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, parse, path) for path in sources
+            ]
+            parsed = [future.result() for future in futures]
+        with phase("merge"):
+            merged = merge_asts(
+                ((path, ast) for path, (ast, _) in zip(sources, parsed)),
+                title=title,
+                toc_depth=toc_depth,
+                page_breaks=to == "docx",
+            )
+            data = json.dumps(merged, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        result = render_ast(data, to, extra_args, cache=cache, pool=pool)
+        annotate(input_bytes=sum(path.stat().st_size for path in sources))
+        if not _same_content(output, result):
+            write_atomic(output, result)
+    return HandbookResult(output, len(sources), sum(not cached for _, cached in parsed))
@@ -0,0 +1,60 @@
+"""Límites por documento: tiempo de reloj y memoria de pandoc.
+
+Una entrada patológica (una tabla enorme, listas anidadas sin fin) puede
+tener a pandoc ocupado indefinidamente o agotar la memoria de la máquina.
+Dentro de :func:`limits` cada conversión de :mod:`docconv.engine` se corta al
+superar ``timeout`` segundos (el subproceso de pandoc se mata y un servidor
+atascado se reemplaza) y el heap de pandoc se acota a ``memory_mb`` con las
+opciones ``+RTS -M`` de su runtime.
+
+Los límites viajan en una variable de contexto, igual que las métricas, así
+que los hilos que convierten en nombre de una conversión deben copiar el
+contexto (:func:`contextvars.copy_context`).
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+# Código de salida del runtime de Haskell al agotar el heap permitido
+HEAP_EXHAUSTED = 251
+
+
+class ConversionTimeout(TimeoutError):
+    """La conversión superó el tiempo máximo por documento."""
+
+
+class MemoryLimitExceeded(MemoryError):
+    """pandoc superó la memoria máxima por documento."""
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Tiempo máximo en segundos y heap máximo de pandoc en MiB (``None``: sin límite)."""
+
+    timeout: float | None = None
+    memory_mb: int | None = None
+
+    def rts_args(self) -> list[str]:
+        """Opciones de línea de comandos de pandoc que aplican ``memory_mb``."""
+        return ["+RTS", f"-M{self.memory_mb}m", "-RTS"] if self.memory_mb else []
+
+
+_current: ContextVar[Limits] = ContextVar("docconv_limits", default=Limits())
+
+
+def current_limits() -> Limits:
+    return _current.get()
+
+
+@contextmanager
+def limits(timeout: float | None = None, memory_mb: int | None = None) -> Iterator[Limits]:
+    """Aplica ``timeout`` y ``memory_mb`` a las conversiones del bloque."""
+    token = _current.set(Limits(timeout or None, memory_mb or None))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
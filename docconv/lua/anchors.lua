@@ -0,0 +1,92 @@
+-- Corrige los enlaces internos que no apuntan a ningún título.
+--
+-- Los índices escritos a mano usan los anclajes de GitHub
+-- ("#1-corrección-de-errores"), que no coinciden con los identificadores de
+-- pandoc ("corrección-de-errores"). Un enlace "#x" sin destino se redirige
+-- al título cuyo anclaje de GitHub es "x" o, si no lo hay, al único título
+-- cuyo identificador empieza por "x-".
+
+-- Puntuación y símbolos no ASCII que GitHub quita de los anclajes
+local function is_symbol(code)
+  return (code >= 0xA0 and code <= 0xBF)
+    or (code >= 0x2000 and code <= 0x2BFF)
+    or (code >= 0x3000 and code <= 0x303F)
+    or (code >= 0xFE00 and code <= 0xFE0F)
+    or (code >= 0x1F000 and code <= 0x1FAFF)
+end
+
+local function github_slug(text)
+  local out = {}
+  for _, code in utf8.codes(pandoc.text.lower(text)) do
+    local char = utf8.char(code)
+    if char == " " then
+      out[#out + 1] = "-"
+    elseif char:match("^[%w_-]$") or (code >= 0x80 and not is_symbol(code)) then
+      out[#out + 1] = char
+    end
+  end
+  return table.concat(out)
+end
+
+local function unescape(fragment)
+  return (fragment:gsub("%%(%x%x)", function(hex)
+    return string.char(tonumber(hex, 16))
+  end))
+end
+
+function Pandoc(doc)
+  local ids, order, github, seen = {}, {}, {}, {}
+  doc:walk {
+    Header = function(header)
+      local ident = header.identifier
+      if ident ~= "" then
+        ids[ident] = true
+        order[#order + 1] = ident
+      end
+      -- Como GitHub: el segundo título igual recibe "-1", el tercero "-2"...
+      local slug = github_slug(pandoc.utils.stringify(header.content))
+      local count = seen[slug]
+      seen[slug] = (count or 0) + 1
+      if count then
+        slug = slug .. "-" .. count
+      end
+      if ident ~= "" and github[slug] == nil then
+        github[slug] = ident
+      end
+    end,
+  }
+
+  local function resolve(fragment)
+    if github[fragment] then
+      return github[fragment]
+    end
+    local match
+    for _, ident in ipairs(order) do
+      if ident:sub(1, #fragment + 1) == fragment .. "-" then
+        if match then
+          return nil
+        end
+        match = ident
+      end
+    end
+    return match
+  end
+
+  return doc:walk {
+    Link = function(link)
+      local fragment = link.target:match("^#(.+)$")
+      if fragment == nil then
+        return nil
+      end
+      fragment = unescape(fragment)
+      if ids[fragment] then
+        return nil
+      end
+      local target = resolve(fragment)
+      if target then
+        link.target = "#" .. target
+        return link
+      end
+    end,
+  }
+end
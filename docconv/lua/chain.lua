@@ -0,0 +1,47 @@
+-- Ejecuta en orden la cadena de filtros de docconv dentro de pandoc.
+--
+-- La cadena llega en los metadatos, como valores "nombre=ruta" de
+-- docconv_filters (ver docconv/filters.py), y se retira antes de escribir
+-- el documento. Cada filtro se carga como lo haría --lua-filter (funciones
+-- globales o una tabla/lista de filtros devuelta por el archivo) y su
+-- tiempo de CPU se escribe en stderr como "docconv:lua<TAB>nombre<TAB>s".
+
+local function load_filters(path)
+  local env = setmetatable({}, {__index = _G})
+  local chunk = assert(loadfile(path, "t", env))
+  local result = chunk()
+  if type(result) == "table" then
+    if #result > 0 then
+      return result
+    end
+    return {result}
+  end
+  local filter = {}
+  for name, value in pairs(env) do
+    if type(value) == "function" then
+      filter[name] = value
+    end
+  end
+  return {filter}
+end
+
+function Pandoc(doc)
+  local specs = doc.meta.docconv_filters
+  doc.meta.docconv_filters = nil
+  doc.meta.docconv_filters_sha = nil
+  if specs == nil then
+    return doc
+  end
+  if type(specs) ~= "table" then
+    specs = {specs}
+  end
+  for _, spec in ipairs(specs) do
+    local name, path = pandoc.utils.stringify(spec):match("^([^=]+)=(.+)$")
+    local start = os.clock()
+    for _, filter in ipairs(load_filters(path)) do
+      doc = doc:walk(filter)
+    end
+    io.stderr:write(string.format("docconv:lua\t%s\t%.6f\n", name, os.clock() - start))
+  end
+  return doc
+end
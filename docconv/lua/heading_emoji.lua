@@ -0,0 +1,38 @@
+-- Quita los emojis de los títulos: "🎯 RESUMEN EJECUTIVO" pasa a
+-- "RESUMEN EJECUTIVO". Los identificadores no cambian, porque pandoc ya
+-- descarta los emojis al generarlos.
+
+local function is_emoji(code)
+  return (code >= 0x1F000 and code <= 0x1FAFF)
+    or (code >= 0x2300 and code <= 0x23FF)
+    or (code >= 0x2600 and code <= 0x27BF)
+    or (code >= 0x2B00 and code <= 0x2BFF)
+    or (code >= 0xFE00 and code <= 0xFE0F)
+    or (code >= 0xE0020 and code <= 0xE007F)
+    or code == 0x200D
+    or code == 0x20E3
+end
+
+function Header(header)
+  local content = pandoc.Inlines {}
+  for _, inline in ipairs(header.content) do
+    if inline.t == "Str" then
+      local kept = {}
+      for _, code in utf8.codes(inline.text) do
+        if not is_emoji(code) then
+          kept[#kept + 1] = utf8.char(code)
+        end
+      end
+      if #kept > 0 then
+        content:insert(pandoc.Str(table.concat(kept)))
+      end
+    elseif not (inline.t == "Space" and (#content == 0 or content[#content].t == "Space")) then
+      content:insert(inline)
+    end
+  end
+  while #content > 0 and content[#content].t == "Space" do
+    content:remove(#content)
+  end
+  header.content = content
+  return header
+end
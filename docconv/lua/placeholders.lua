@@ -0,0 +1,25 @@
+-- Sustituye {{variable}} en el texto por el valor de "variable" en los
+-- metadatos (bloque YAML del documento o --metadata). Los marcadores sin
+-- valor se dejan como están, igual que en docconv/template.py.
+
+local values = {}
+
+return {
+  {
+    Meta = function(meta)
+      for name, value in pairs(meta) do
+        values[name] = pandoc.utils.stringify(value)
+      end
+    end,
+  },
+  {
+    Str = function(str)
+      local text, count = str.text:gsub("{{%s*([%w_]+)%s*}}", function(name)
+        return values[name]
+      end)
+      if count > 0 then
+        return pandoc.Str(text)
+      end
+    end,
+  },
+}
@@ -0,0 +1,37 @@
+-- Alinea a la derecha las columnas numéricas de las tablas.
+--
+-- Una columna es numérica si todas las celdas con texto de su cuerpo son
+-- importes, porcentajes o cantidades ("$1.048.000", "USD 250", "12%",
+-- "3,5"). Solo se cambian las columnas sin alineación explícita en el
+-- Markdown.
+
+local function is_number(text)
+  text = text:gsub("^%u*%s*%$", ""):gsub("^€", ""):gsub("^%u%u%u%s", "")
+  return text:match("^%s*[-+]?%d[%d.,]*%s*%%?$") ~= nil
+end
+
+function Table(tbl)
+  local numeric = {}
+  for _, body in ipairs(tbl.bodies) do
+    for _, row in ipairs(body.body) do
+      local column = 1
+      for _, cell in ipairs(row.cells) do
+        local text = pandoc.utils.stringify(cell.contents)
+        if text ~= "" then
+          numeric[column] = numeric[column] ~= false and is_number(text)
+        end
+        column = column + cell.col_span
+      end
+    end
+  end
+  local changed = false
+  for i, spec in ipairs(tbl.colspecs) do
+    if numeric[i] and spec[1] == "AlignDefault" then
+      tbl.colspecs[i] = {"AlignRight", spec[2]}
+      changed = true
+    end
+  end
+  if changed then
+    return tbl
+  end
+end
@@ -0,0 +1,497 @@
+"""Unión de varios DOCX en uno solo, manteniendo sus referencias internas.
+
+El primer documento hace de base (estilos, tema, ajustes, propiedades y
+sección final). Del resto se añade el cuerpo y se trasladan las partes de
+las que depende, renumerando lo que tiene que ser único en el paquete:
+
+- relaciones del documento y de las notas (imágenes, hipervínculos),
+  copiando los archivos de ``word/media`` con un prefijo por documento;
+- definiciones de numeración (``abstractNum`` y ``num``) y sus ``numId``;
+- notas al pie y sus referencias;
+- marcadores e identificadores de dibujos (``docPr``/``cNvPr``); los
+  nombres de marcador repetidos entre documentos reciben sufijos ``-1``,
+  ``-2``... como los identificadores de pandoc;
+- estilos que la base no define (p. ej. los de resaltado de código) y
+  extensiones de ``[Content_Types].xml``.
+
+El XML se manipula como texto con expresiones regulares acotadas a esos
+elementos, sin reserializarlo, para no alterar prefijos de espacios de
+nombres que Word espera tal cual. No se combinan comentarios ni notas
+finales, que el Markdown de los documentos no genera.
+
+Con ``resolve_anchors`` los hipervínculos internos sin marcador se
+redirigen como hace el filtro ``anchors`` (``docconv/lua/anchors.lua``), pero
+sobre el documento unido: al convertir por secciones el filtro solo ve los
+títulos de la suya y no puede resolver los enlaces de un índice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import io
+import posixpath
+import re
+import zipfile
+from typing import Iterable
+from urllib.parse import unquote
+
+RELS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Relaciones únicas del paquete: se conservan las de la base
+SINGLETON_RELATIONSHIPS = {
+    f"{RELS_NS}/{name}"
+    for name in (
+        "numbering",
+        "styles",
+        "settings",
+        "webSettings",
+        "fontTable",
+        "theme",
+        "footnotes",
+        "endnotes",
+        "comments",
+        "customXml",
+    )
+}
+
+# Separación entre los identificadores numéricos de cada documento
+ID_STRIDE = 100_000
+
+_RELATIONSHIP = re.compile(r"<Relationship\s([^>]*?)/?>")
+_ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+_ROOT_NAMESPACES = re.compile(r'\sxmlns:(\w+)="([^"]*)"')
+_STYLE = re.compile(r'<w:style\b[^>]*\bw:styleId="([^"]+)"[^>]*>.*?</w:style>', re.S)
+_ABSTRACT_NUM = re.compile(r"<w:abstractNum\b.*?</w:abstractNum>", re.S)
+_NUM = re.compile(r"<w:num\b[^>]*>.*?</w:num>", re.S)
+_FOOTNOTE = re.compile(r'<w:footnote\b[^>]*\bw:id="(-?\d+)"[^>]*>.*?</w:footnote>', re.S)
+_DEFAULT = re.compile(r'<Default\s[^>]*Extension="([^"]+)"[^>]*/>')
+_REL_REF = re.compile(r'\br:(id|embed|link|pict)="([^"]+)"')
+_BOOKMARK_NAME = re.compile(r'(<w:bookmarkStart\b[^>]*?\bw:name=")([^"]*)(")')
+_ANCHOR = re.compile(r'(<w:hyperlink\b[^>]*?\bw:anchor=")([^"]*)(")')
+_HEADING_PARAGRAPH = re.compile(r'\s*<w:p>(?:(?!</w:p>).)*?<w:pStyle w:val="Heading\d"', re.S)
+_TEXT = re.compile(r"<w:t(?:\s[^>]*)?>([^<]*)</w:t>")
+# Nombre que pandoc da a los marcadores que Word no admite tal cual
+_HASHED = re.compile(r"X[0-9a-f]{39}")
+
+MAX_BOOKMARK = 40
+
+# (patrón, ¿se renumeran también los valores <= 0?)
+_NUMERIC_IDS = (
+    re.compile(r'(<w:numId w:val=")(\d+)(")'),
+    re.compile(r'(<w:footnoteReference\b[^>]*?\bw:id=")(\d+)(")'),
+    re.compile(r'(<w:bookmark(?:Start|End)\b[^>]*?\bw:id=")(\d+)(")'),
+    re.compile(r'(<wp:docPr\b[^>]*?\bid=")(\d+)(")'),
+    re.compile(r'(<pic:cNvPr\b[^>]*?\bid=")(\d+)(")'),
+)
+
+
+def _shift_ids(xml: str, offset: int) -> str:
+    def shift(match: re.Match) -> str:
+        value = int(match.group(2))
+        # numId 0 significa "sin numeración" y no se desplaza
+        return f"{match.group(1)}{value + offset if value > 0 else value}{match.group(3)}"
+
+    for pattern in _NUMERIC_IDS:
+        xml = pattern.sub(shift, xml)
+    return xml
+
+
+def _bookmark_name(ident: str) -> str:
+    """Nombre del marcador de ``ident``, como lo escribe pandoc.
+
+    Word exige que empiece por una letra y tenga como mucho 40 caracteres; si
+    no, pandoc usa un digest del identificador (también en los enlaces).
+    """
+    if ident[:1].isalpha() and len(ident) <= MAX_BOOKMARK:
+        return ident
+    return "X" + hashlib.sha1(ident.encode("utf-8")).hexdigest()[1:]
+
+
+def _pandoc_identifier(text: str) -> str:
+    """Identificador automático de pandoc para un título de texto ``text``."""
+    kept = "".join(c for c in text.lower() if c.isspace() or c.isalnum() or c in "_-.")
+    ident = "-".join(kept.split())
+    while ident and not ident[0].isalpha():
+        ident = ident[1:]
+    return ident or "section"
+
+
+def _is_symbol(code: int) -> bool:
+    return (
+        0xA0 <= code <= 0xBF
+        or 0x2000 <= code <= 0x2BFF
+        or 0x3000 <= code <= 0x303F
+        or 0xFE00 <= code <= 0xFE0F
+        or 0x1F000 <= code <= 0x1FAFF
+    )
+
+
+def _github_slug(text: str) -> str:
+    """Anclaje de GitHub de un título, como ``github_slug`` en ``anchors.lua``."""
+    out = []
+    for char in text.lower():
+        if char == " ":
+            out.append("-")
+        elif (char.isascii() and (char.isalnum() or char in "_-")) or (
+            ord(char) >= 0x80 and not _is_symbol(ord(char))
+        ):
+            out.append(char)
+    return "".join(out)
+
+
+def _fix_bookmarks(document: str, resolve_anchors: bool) -> str:
+    """Renombra los marcadores repetidos y, con ``resolve_anchors``, redirige enlaces."""
+    # (nombre, identificador o None, texto si es un título) de cada marcador
+    bookmarks = []
+    for match in _BOOKMARK_NAME.finditer(document):
+        name = match.group(2)
+        end = document.index(">", match.end()) + 1
+        heading = _HEADING_PARAGRAPH.match(document, end)
+        text = None
+        if heading:
+            paragraph = document[end:document.index("</w:p>", end)]
+            text = html.unescape("".join(_TEXT.findall(paragraph)))
+        ident: str | None = name
+        if _HASHED.fullmatch(name):
+            computed = _pandoc_identifier(text) if text is not None else ""
+            ident = computed if _bookmark_name(computed) == name else None
+        bookmarks.append([name, ident, text])
+
+    taken = {name for name, _, _ in bookmarks}
+    seen: set[str] = set()
+    for bookmark in bookmarks:
+        name, ident, _ = bookmark
+        if name in seen:
+            base = ident or name
+            n = 1
+            while _bookmark_name(f"{base}-{n}") in taken:
+                n += 1
+            bookmark[0], bookmark[1] = _bookmark_name(f"{base}-{n}"), f"{base}-{n}"
+            taken.add(bookmark[0])
+        seen.add(bookmark[0])
+    names = iter(bookmark[0] for bookmark in bookmarks)
+    document = _BOOKMARK_NAME.sub(lambda m: f"{m.group(1)}{next(names)}{m.group(3)}", document)
+    if not resolve_anchors:
+        return document
+
+    # Los enlaces sin destino llegan con el fragmento o, si pandoc no lo
+    # admitía como marcador, con su digest: se indexa por las dos formas
+    github: dict[str, str] = {}
+    # Fragmento -> títulos cuyo identificador empieza por "<fragmento>-"
+    prefixes: dict[str, set[str]] = {}
+    counts: dict[str, int] = {}
+    for name, ident, text in bookmarks:
+        if text is None:
+            continue
+        slug = _github_slug(text)
+        count = counts.get(slug)
+        counts[slug] = (count or 0) + 1
+        if count:
+            slug = f"{slug}-{count}"
+        for key in (slug, _bookmark_name(slug)):
+            github.setdefault(key, name)
+        if ident is None:
+            continue
+        for position, char in enumerate(ident):
+            if char == "-" and position:
+                fragment = ident[:position]
+                for key in (fragment, _bookmark_name(fragment)):
+                    prefixes.setdefault(key, set()).add(name)
+
+    def resolve(match: re.Match) -> str:
+        fragment = unquote(match.group(2))
+        if fragment in taken:
+            return match.group(0)
+        target = github.get(fragment)
+        if target is None:
+            candidates = prefixes.get(fragment, ())
+            if len(candidates) != 1:
+                return match.group(0)
+            (target,) = candidates
+        return f"{match.group(1)}{target}{match.group(3)}"
+
+    return _ANCHOR.sub(resolve, document)
+
+
+def _relationships(xml: str) -> list[dict[str, str]]:
+    return [dict(_ATTRIBUTE.findall(attrs)) for attrs in _RELATIONSHIP.findall(xml)]
+
+
+def _relationship_xml(rel: dict[str, str]) -> str:
+    attrs = " ".join(f'{name}="{value}"' for name, value in rel.items())
+    return f"<Relationship {attrs} />"
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _body(document: str) -> str:
+    """Contenido de ``w:body`` sin la sección final."""
+    start = document.index(">", document.index("<w:body")) + 1
+    end = document.rfind("<w:sectPr")
+    body_end = document.rfind("</w:body>")
+    if end == -1 or end < start:
+        end = body_end
+    return document[start:end]
+
+
+def _merge_namespaces(base: str, other: str, root: str) -> str:
+    """Añade al elemento raíz de ``base`` los prefijos que solo declara ``other``."""
+    tag_start = base.index(f"<{root}")
+    tag_end = base.index(">", tag_start)
+    tag = base[tag_start:tag_end]
+    other_start = other.index(f"<{root}")
+    other_tag = other[other_start:other.index(">", other_start)]
+    known = dict(_ROOT_NAMESPACES.findall(tag))
+    extra = "".join(
+        f' xmlns:{prefix}="{uri}"'
+        for prefix, uri in _ROOT_NAMESPACES.findall(other_tag)
+        if prefix not in known
+    )
+    if not extra:
+        return base
+    insert = tag_end - 1 if tag.endswith("/") else tag_end
+    return base[:insert] + extra + base[insert:]
+
+
+def _override(content_types: str, part: str) -> str | None:
+    match = re.search(rf'<Override\s[^>]*PartName="/{re.escape(part)}"[^>]*/>', content_types)
+    return match.group(0) if match else None
+
+
+class _Package:
+    """Paquete DOCX en memoria con acceso por nombre de parte."""
+
+    def __init__(self, data: bytes):
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.parts = {name: zf.read(name) for name in zf.namelist()}
+
+    def text(self, name: str) -> str | None:
+        data = self.parts.get(name)
+        return data.decode("utf-8") if data is not None else None
+
+    def set_text(self, name: str, value: str) -> None:
+        self.parts[name] = value.encode("utf-8")
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            # [Content_Types].xml primero, como lo escriben Word y pandoc
+            names = sorted(self.parts, key=lambda n: n != "[Content_Types].xml")
+            for name in names:
+                zf.writestr(name, self.parts[name])
+        return buffer.getvalue()
+
+
+class _Merger:
+    def __init__(self, base: bytes, resolve_anchors: bool = False):
+        self.base = _Package(base)
+        self.resolve_anchors = resolve_anchors
+        self.document = self.base.text("word/document.xml")
+        self.bodies: list[str] = []
+        self.extra_rels: dict[str, list[dict[str, str]]] = {}
+        self.extra_styles: list[str] = []
+        self.extra_abstract: list[str] = []
+        self.extra_nums: list[str] = []
+        self.extra_footnotes: list[str] = []
+        self.extensions: dict[str, str] = {}
+        self.overrides: list[str] = []
+        # Partes copiadas del documento en curso: origen -> destino
+        self.copied: dict[str, str] = {}
+
+    def _copy_relationships(
+        self, package: _Package, part: str, prefix: str
+    ) -> dict[str, str]:
+        """Copia las relaciones no únicas de ``part``; devuelve el mapa de ids."""
+        mapping = {}
+        rels_xml = package.text(_rels_path(part)) or ""
+        for rel in _relationships(rels_xml):
+            if rel.get("Type") in SINGLETON_RELATIONSHIPS:
+                continue
+            new_id = f"{prefix}{rel['Id']}"
+            mapping[rel["Id"]] = new_id
+            rel = dict(rel, Id=new_id)
+            if rel.get("TargetMode") != "External":
+                source = posixpath.normpath(posixpath.join(posixpath.dirname(part), rel["Target"]))
+                directory, name = posixpath.split(rel["Target"])
+                target = posixpath.join(directory, f"{prefix}{name}")
+                if source in package.parts:
+                    copied = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+                    self.base.parts[copied] = package.parts[source]
+                    self.copied[source] = copied
+                rel["Target"] = target
+            self.extra_rels.setdefault(part, []).append(rel)
+        return mapping
+
+    def add(self, data: bytes, index: int) -> None:
+        package = _Package(data)
+        self.copied = {}
+        prefix = f"s{index}"
+        offset = index * ID_STRIDE
+        document = package.text("word/document.xml")
+        self.document = _merge_namespaces(self.document, document, "w:document")
+
+        rel_map = self._copy_relationships(package, "word/document.xml", prefix)
+
+        def remap(xml: str, mapping: dict[str, str]) -> str:
+            xml = _REL_REF.sub(
+                lambda m: f'r:{m.group(1)}="{mapping.get(m.group(2), m.group(2))}"', xml
+            )
+            return _shift_ids(xml, offset)
+
+        self.bodies.append(remap(_body(document), rel_map))
+
+        styles = package.text("word/styles.xml")
+        if styles:
+            self.extra_styles.append(styles)
+
+        numbering = package.text("word/numbering.xml")
+        if numbering:
+            for block in _ABSTRACT_NUM.findall(numbering):
+                self.extra_abstract.append(
+                    re.sub(
+                        r'(w:abstractNumId=")(\d+)(")',
+                        lambda m: f"{m.group(1)}{int(m.group(2)) + offset}{m.group(3)}",
+                        block,
+                    )
+                )
+            for block in _NUM.findall(numbering):
+                block = re.sub(
+                    r'(<w:num\b[^>]*\bw:numId=")(\d+)(")',
+                    lambda m: f"{m.group(1)}{int(m.group(2)) + offset}{m.group(3)}",
+                    block,
+                )
+                block = re.sub(
+                    r'(<w:abstractNumId w:val=")(\d+)(")',
+                    lambda m: f"{m.group(1)}{int(m.group(2)) + offset}{m.group(3)}",
+                    block,
+                )
+                self.extra_nums.append(block)
+            if "word/numbering.xml" not in self.base.parts:
+                self._adopt(package, "word/numbering.xml", "numbering")
+
+        footnotes = package.text("word/footnotes.xml")
+        if footnotes:
+            if "word/footnotes.xml" not in self.base.parts:
+                self._adopt(package, "word/footnotes.xml", "footnotes")
+            note_map = self._copy_relationships(package, "word/footnotes.xml", prefix)
+            for match in _FOOTNOTE.finditer(footnotes):
+                if int(match.group(1)) > 0:
+                    note = remap(match.group(0), note_map)
+                    note = re.sub(
+                        r'(<w:footnote\b[^>]*?\bw:id=")(\d+)(")',
+                        lambda m: f"{m.group(1)}{int(m.group(2)) + offset}{m.group(3)}",
+                        note,
+                        count=1,
+                    )
+                    self.extra_footnotes.append(note)
+
+        content_types = package.text("[Content_Types].xml") or ""
+        for match in _DEFAULT.finditer(content_types):
+            self.extensions.setdefault(match.group(1).lower(), match.group(0))
+        # pandoc declara cada imagen con su propio Override
+        for source, copied in self.copied.items():
+            override = _override(content_types, source)
+            if override:
+                self.overrides.append(override.replace(f'"/{source}"', f'"/{copied}"'))
+
+    def _adopt(self, package: _Package, part: str, kind: str) -> None:
+        """Incorpora una parte única que la base no tiene, vacía de contenido propio."""
+        xml = package.text(part)
+        if kind == "numbering":
+            xml = _NUM.sub("", _ABSTRACT_NUM.sub("", xml))
+        else:
+            xml = _FOOTNOTE.sub(lambda m: m.group(0) if int(m.group(1)) <= 0 else "", xml)
+        self.base.set_text(part, xml)
+        rels = self.base.text("word/_rels/document.xml.rels")
+        rel = {"Id": f"rIdMerged{kind.title()}", "Type": f"{RELS_NS}/{kind}", "Target": posixpath.basename(part)}
+        self.base.set_text(
+            "word/_rels/document.xml.rels",
+            rels.replace("</Relationships>", _relationship_xml(rel) + "</Relationships>"),
+        )
+        content_types = self.base.text("[Content_Types].xml")
+        override = _override(package.text("[Content_Types].xml"), part)
+        if override and override not in content_types:
+            self.base.set_text(
+                "[Content_Types].xml", content_types.replace("</Types>", override + "</Types>")
+            )
+
+    def finish(self) -> bytes:
+        # Cuerpo: se insertan las demás secciones antes de la sección final de la base
+        end = self.document.rfind("<w:sectPr")
+        if end == -1 or end < self.document.index("<w:body"):
+            end = self.document.rfind("</w:body>")
+        document = self.document[:end] + "".join(self.bodies) + self.document[end:]
+        self.base.set_text("word/document.xml", _fix_bookmarks(document, self.resolve_anchors))
+
+        for part, rels in self.extra_rels.items():
+            path = _rels_path(part)
+            xml = self.base.text(path) or (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                "</Relationships>"
+            )
+            added = "".join(_relationship_xml(rel) for rel in rels)
+            self.base.set_text(path, xml.replace("</Relationships>", added + "</Relationships>"))
+
+        styles = self.base.text("word/styles.xml")
+        if styles:
+            known = {match.group(1) for match in _STYLE.finditer(styles)}
+            missing = []
+            for other in self.extra_styles:
+                for match in _STYLE.finditer(other):
+                    if match.group(1) not in known:
+                        known.add(match.group(1))
+                        missing.append(match.group(0))
+            if missing:
+                self.base.set_text("word/styles.xml", styles.replace("</w:styles>", "".join(missing) + "</w:styles>"))
+
+        numbering = self.base.text("word/numbering.xml")
+        if numbering and (self.extra_abstract or self.extra_nums):
+            # El esquema exige todos los abstractNum antes del primer num
+            first_num = _NUM.search(numbering)
+            insert = first_num.start() if first_num else numbering.rindex("</w:numbering>")
+            numbering = numbering[:insert] + "".join(self.extra_abstract) + numbering[insert:]
+            end = numbering.rindex("</w:numbering>")
+            numbering = numbering[:end] + "".join(self.extra_nums) + numbering[end:]
+            self.base.set_text("word/numbering.xml", numbering)
+
+        footnotes = self.base.text("word/footnotes.xml")
+        if footnotes and self.extra_footnotes:
+            end = footnotes.rindex("</w:footnotes>")
+            footnotes = footnotes[:end] + "".join(self.extra_footnotes) + footnotes[end:]
+            self.base.set_text("word/footnotes.xml", footnotes)
+
+        content_types = self.base.text("[Content_Types].xml")
+        present = {m.group(1).lower() for m in _DEFAULT.finditer(content_types)}
+        missing_defaults = [tag for ext, tag in self.extensions.items() if ext not in present]
+        if self.overrides:
+            content_types = content_types.replace("</Types>", "".join(self.overrides) + "</Types>")
+            self.base.set_text("[Content_Types].xml", content_types)
+        if missing_defaults:
+            self.base.set_text(
+                "[Content_Types].xml",
+                content_types.replace("<Override", "".join(missing_defaults) + "<Override", 1)
+                if "<Override" in content_types
+                else content_types.replace("</Types>", "".join(missing_defaults) + "</Types>"),
+            )
+        return self.base.to_bytes()
+
+
+def merge_docx(documents: Iterable[bytes], resolve_anchors: bool = False) -> bytes:
+    """Une ``documents`` en orden en un solo DOCX válido.
+
+    ``resolve_anchors`` corrige los enlaces internos como el filtro ``anchors``.
+    """
+    documents = list(documents)
+    if not documents:
+        raise ValueError("no hay documentos que unir")
+    if len(documents) == 1:
+        return documents[0]
+    merger = _Merger(documents[0], resolve_anchors)
+    for index, data in enumerate(documents[1:], start=1):
+        merger.add(data, index)
+    return merger.finish()
@@ -0,0 +1,167 @@
+"""Métricas por conversión: tiempo de cada fase, bytes y estado de la caché.
+
+Cada conversión de alto nivel abre un registro con :func:`measure`; el código
+del camino crítico marca sus fases con :func:`phase` (``load``, ``cache``,
+``parse``, ``filter``, ``write``, ``zip``, ``pandoc``, ``merge``, ``optimize``,
+``diagrams``, ``flush``), que no hace nada si no hay un registro activo. Las
+fases no se solapan: ``parse``, ``write`` y ``zip`` son del escritor nativo,
+mientras que ``pandoc`` cubre la conversión externa completa, ``optimize`` el
+posproceso de :mod:`docconv.optimize` y ``diagrams`` el renderizado de
+:mod:`docconv.diagrams`. La excepción son las fases ``lua:<nombre>``, el
+tiempo de CPU de cada filtro Lua de :mod:`docconv.filters`, que pandoc
+informa y que ya está incluido en ``pandoc``. En la conversión por secciones
+(:mod:`docconv.sections`) los hilos suman sus fases al mismo registro, así
+que ``pandoc`` puede superar al total. Al terminar, el registro se entrega a
+los hooks instalados con :func:`add_hook`, por ejemplo un
+:class:`JsonLinesWriter` que escribe una línea JSON por documento.
+
+Los lotes que se ejecutan en otros procesos devuelven el registro dentro del
+:class:`~docconv.batch.BatchResult` y lo emite el proceso principal, así que
+los hooks solo hace falta instalarlos ahí.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Callable, Iterator
+
+# Varios hilos pueden sumar fases al mismo registro
+_add_lock = threading.Lock()
+
+PHASES = (
+    "load", "cache", "parse", "filter", "write", "zip", "pandoc", "merge", "optimize",
+    "diagrams", "flush",
+)
+
+
+@dataclass
+class ConversionMetrics:
+    """Mediciones de una conversión; los tiempos están en segundos."""
+
+    document: str
+    to: str = ""
+    engine: str = ""
+    cache: str = "off"
+    input_bytes: int = 0
+    output_bytes: int = 0
+    digest: str = ""
+    phases: dict[str, float] = field(default_factory=dict)
+    total: float = 0.0
+    ok: bool = True
+    error: str | None = None
+    timestamp: str = ""
+
+    @property
+    def pandoc_seconds(self) -> float:
+        return self.phases.get("pandoc", 0.0)
+
+    def add(self, name: str, seconds: float) -> None:
+        with _add_lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["phases"] = {name: round(value, 6) for name, value in self.phases.items()}
+        data["total"] = round(self.total, 6)
+        return data
+
+
+Hook = Callable[[ConversionMetrics], None]
+
+_current: ContextVar[ConversionMetrics | None] = ContextVar("docconv_metrics", default=None)
+_hooks: list[Hook] = []
+
+
+def add_hook(hook: Hook) -> None:
+    """Registra ``hook`` para recibir cada :class:`ConversionMetrics` terminada."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def emit(record: ConversionMetrics) -> None:
+    for hook in list(_hooks):
+        hook(record)
+
+
+def current() -> ConversionMetrics | None:
+    """Registro activo en este hilo o tarea, si lo hay."""
+    return _current.get()
+
+
+def annotate(**fields) -> None:
+    """Asigna ``fields`` al registro activo; no hace nada si no hay ninguno."""
+    record = _current.get()
+    if record is not None:
+        for name, value in fields.items():
+            setattr(record, name, value)
+
+
+@contextmanager
+def measure(document: str, to: str = "", publish: bool = True) -> Iterator[ConversionMetrics]:
+    """Abre el registro de una conversión o reutiliza el que ya esté activo.
+
+    Con ``publish=False`` el registro no se entrega a los hooks al cerrar;
+    lo usan los trabajos de lote que devuelven sus métricas al proceso padre.
+    """
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+    record = ConversionMetrics(document, to)
+    record.timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    token = _current.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.ok = False
+        record.error = str(e) or type(e).__name__
+        raise
+    finally:
+        record.total = time.perf_counter() - start
+        _current.reset(token)
+        if publish:
+            emit(record)
+
+
+class phase:
+    """Suma el tiempo del bloque a la fase ``name`` del registro activo."""
+
+    __slots__ = ("name", "record", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> ConversionMetrics | None:
+        self.record = _current.get()
+        if self.record is not None:
+            self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exc) -> None:
+        if self.record is not None:
+            self.record.add(self.name, time.perf_counter() - self.start)
+
+
+class JsonLinesWriter:
+    """Hook que escribe cada registro como una línea JSON en ``stream``."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, record: ConversionMetrics) -> None:
+        line = json.dumps(record.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
@@ -0,0 +1,1029 @@
+"""Escritor DOCX nativo en Python para el subconjunto de Markdown de la propuesta.
+
+Cubre lo que usan la propuesta comercial y las cotizaciones: títulos ATX,
+párrafos con negritas, cursivas, código en línea, enlaces y saltos de línea,
+listas con viñetas y numeradas (anidadas), tablas pipe, reglas horizontales,
+bloques de código delimitados y bloques crudos ``{=openxml}``. Escribe las partes OOXML directamente en el
+zip, sin lanzar pandoc.
+
+Ante cualquier construcción fuera de ese subconjunto (imágenes, HTML, citas,
+notas al pie, fórmulas, títulos setext...) lanza :class:`UnsupportedMarkdown`
+y el llamador vuelve a pandoc. El parser sigue las reglas de pandoc donde
+difieren de CommonMark: las listas, títulos y tablas no interrumpen un
+párrafo, y la puntuación tipográfica (comillas, guiones, puntos suspensivos)
+se aplica como con la extensión ``smart``.
+
+:func:`write_docx_stream` escribe el DOCX directamente en disco a medida que
+recibe bloques, y las filas de una :class:`RowTable` se consumen de un
+iterable, de modo que la memoria no crece con el número de filas.
+"""
+
+from __future__ import annotations
+
+import html
+import io
+import os
+import re
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from .metrics import phase
+
+# Se incluye en la clave de caché: cambiarlo invalida los DOCX nativos previos
+NATIVE_VERSION = "2"
+
+
+class UnsupportedMarkdown(ValueError):
+    """El documento usa sintaxis que el escritor nativo no cubre."""
+
+
+# --- Modelo intermedio ------------------------------------------------------
+
+
+@dataclass
+class Run:
+    text: str = ""
+    bold: bool = False
+    italic: bool = False
+    code: bool = False
+    link: str | None = None
+    br: bool = False
+
+
+@dataclass
+class Heading:
+    level: int
+    runs: list[Run]
+    ident: str = ""
+
+
+@dataclass
+class Para:
+    runs: list[Run]
+    compact: bool = False
+
+
+@dataclass
+class ListBlock:
+    ordered: bool
+    start: int
+    items: list[list[Any]]
+    tight: bool
+    # Por elemento: None, o True/False para casillas marcadas o no (task_lists)
+    tasks: list[bool | None] = field(default_factory=list)
+
+
+@dataclass
+class Table:
+    aligns: list[str]
+    header: list[list[Run]]
+    rows: list[list[list[Run]]]
+
+
+@dataclass
+class RowTable:
+    """Tabla de texto plano cuyas filas se generan mientras se escribe.
+
+    ``rows`` puede ser un generador: :func:`write_docx_stream` lo recorre una
+    sola vez sin guardar las filas. ``aligns`` por columna (``left``,
+    ``right`` o ``center``); por defecto todas a la izquierda.
+    """
+
+    header: list[str]
+    rows: Iterable[Sequence[Any]]
+    aligns: list[str] | None = None
+
+
+@dataclass
+class CodeBlock:
+    text: str
+    # Formato de un bloque crudo ```{=formato}; vacío en el código normal
+    raw: str = ""
+
+
+@dataclass
+class Rule:
+    pass
+
+
+# --- Inlines ------------------------------------------------------------------
+
+_ESCAPABLE = set("\\`*_{}[]()>#+-.!|~^$\"'")
+_SUBSCRIPT = re.compile(r"~[^\s~]+~|\^[^\s^]+\^|~~")
+_PLAIN = re.compile(r"[^\\\n`*_!\[&<]+")
+_ENTITY = re.compile(r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);")
+_MATH = re.compile(r"\$[^\s$](?:[^$]*[^\s$])?\$(?!\d)")
+
+
+def _smart(text: str) -> str:
+    text = text.replace("---", "\u2014").replace("--", "\u2013").replace("...", "\u2026")
+    return text
+
+
+@dataclass
+class _Flags:
+    bold: bool = False
+    italic: bool = False
+    link: str | None = None
+
+
+class _InlineParser:
+    def __init__(self, text: str):
+        self.text = text
+
+    def parse(self) -> list[Run]:
+        text = self.text
+        if _SUBSCRIPT.search(text):
+            raise UnsupportedMarkdown("subíndices, superíndices o tachado")
+        if _MATH.search(text):
+            raise UnsupportedMarkdown("fórmulas TeX")
+        runs = self._parse(text, _Flags())
+        return _apply_quotes(runs)
+
+    def _parse(self, text: str, flags: _Flags) -> list[Run]:
+        runs: list[Run] = []
+        buf: list[str] = []
+
+        def emit(value: str | None = None, **extra) -> None:
+            if buf:
+                runs.append(Run(_smart("".join(buf)), flags.bold, flags.italic, link=flags.link))
+                buf.clear()
+            if value is not None or extra:
+                runs.append(Run(value or "", flags.bold, flags.italic, link=flags.link, **extra))
+
+        i, n = 0, len(text)
+        while i < n:
+            c = text[i]
+            if c == "\\":
+                if i + 1 < n and text[i + 1] == "\n":
+                    emit(br=True)
+                    i += 2
+                    continue
+                if i + 1 < n and text[i + 1] in _ESCAPABLE:
+                    buf.append(text[i + 1])
+                    i += 2
+                    continue
+                buf.append(c)
+                i += 1
+            elif c == "\n":
+                pending = "".join(buf)
+                hard = pending.endswith("  ")
+                buf[:] = [pending.rstrip(" ")] if pending.strip(" ") else []
+                if hard:
+                    emit(br=True)
+                else:
+                    buf.append(" ")
+                i += 1
+                while i < n and text[i] == " ":
+                    i += 1
+            elif c == "`":
+                ticks = len(text[i:]) - len(text[i:].lstrip("`"))
+                end = text.find("`" * ticks, i + ticks)
+                while end != -1 and end + ticks < n and text[end + ticks] == "`":
+                    end = text.find("`" * ticks, end + ticks + 1)
+                if end == -1:
+                    buf.append("`" * ticks)
+                    i += ticks
+                    continue
+                emit(text[i + ticks:end].replace("\n", " ").strip(), code=True)
+                i = end + ticks
+            elif c in "*_":
+                consumed = self._emphasis(text, i, flags, emit, runs)
+                if consumed:
+                    i = consumed
+                else:
+                    buf.append(c)
+                    i += 1
+            elif c == "!" and text.startswith("![", i):
+                raise UnsupportedMarkdown("imágenes")
+            elif c == "[":
+                if text.startswith("[^", i):
+                    raise UnsupportedMarkdown("notas al pie")
+                close = _matching_bracket(text, i)
+                if close != -1 and close + 1 < n and text[close + 1] == "(":
+                    end = text.find(")", close + 2)
+                    if end == -1:
+                        buf.append(c)
+                        i += 1
+                        continue
+                    target = text[close + 2:end].strip().split(" ", 1)[0].strip("<>")
+                    emit()
+                    inner = _Flags(flags.bold, flags.italic, target)
+                    runs.extend(self._parse(text[i + 1:close], inner))
+                    i = end + 1
+                elif close != -1 and close + 1 < n and text[close + 1] in "[{":
+                    raise UnsupportedMarkdown("enlaces por referencia o atributos")
+                else:
+                    buf.append(c)
+                    i += 1
+            elif c == "&" and _ENTITY.match(text, i):
+                entity = _ENTITY.match(text, i).group(0)
+                buf.append(html.unescape(entity))
+                i += len(entity)
+            elif c == "<" and i + 1 < n and (text[i + 1].isalpha() or text[i + 1] in "/!"):
+                raise UnsupportedMarkdown("HTML en línea o autoenlaces")
+            else:
+                # Tramo de texto sin caracteres especiales de una sola vez
+                plain = _PLAIN.match(text, i)
+                end = plain.end() if plain else i + 1
+                buf.append(text[i:end])
+                i = end
+        emit()
+        return runs
+
+    def _emphasis(self, text, i, flags, emit, runs) -> int:
+        c = text[i]
+        double = text.startswith(c * 2, i)
+        if text.startswith(c * 3, i):
+            raise UnsupportedMarkdown("énfasis triple")
+        delim = c * 2 if double else c
+        start = i + len(delim)
+        if start >= len(text) or text[start].isspace():
+            return 0
+        if c == "_" and i > 0 and text[i - 1].isalnum():
+            return 0
+        end = start
+        while True:
+            end = text.find(delim, end)
+            if end == -1:
+                return 0
+            if _escaped(text, end):
+                end += 1
+                continue
+            before_ok = not text[end - 1].isspace()
+            after = text[end + len(delim)] if end + len(delim) < len(text) else ""
+            if double is False and text.startswith(c * 2, end):
+                # ``*a **b** c*``: se salta el delimitador doble interior
+                end += 2
+                continue
+            if before_ok and end > start and not (c == "_" and after.isalnum()):
+                break
+            end += len(delim)
+        emit()
+        inner = _Flags(flags.bold or double, flags.italic or not double, flags.link)
+        runs.extend(self._parse(text[start:end], inner))
+        return end + len(delim)
+
+
+def _escaped(text: str, i: int) -> bool:
+    backslashes = len(text[:i]) - len(text[:i].rstrip("\\"))
+    return backslashes % 2 == 1
+
+
+def _matching_bracket(text: str, i: int) -> int:
+    depth = 0
+    for j in range(i, len(text)):
+        if _escaped(text, j):
+            continue
+        if text[j] == "[":
+            depth += 1
+        elif text[j] == "]":
+            depth -= 1
+            if depth == 0:
+                return j
+    return -1
+
+
+def _apply_quotes(runs: list[Run]) -> list[Run]:
+    # Comillas tipográficas: abren tras espacio o apertura y ante texto; si no, cierran
+    prev = " "
+    for run in runs:
+        if run.code or run.br:
+            prev = " " if run.br else "x"
+            continue
+        text = run.text
+        if '"' not in text and "'" not in text:
+            prev = text[-1:] or prev
+            continue
+        out = []
+        for i, ch in enumerate(text):
+            following = text[i + 1] if i + 1 < len(text) else " "
+            opening = not prev.isalnum() and prev not in ".,;:!?)]}\u201d\u2019" and not following.isspace()
+            if ch == '"':
+                ch = "\u201c" if opening else "\u201d"
+            elif ch == "'":
+                ch = "\u2018" if opening else "\u2019"
+            out.append(ch)
+            prev = ch
+        run.text = "".join(out)
+    return runs
+
+
+def parse_inlines(text: str) -> list[Run]:
+    return _InlineParser(text.strip()).parse()
+
+
+def plain_text(runs: list[Run]) -> str:
+    return "".join(" " if r.br else r.text for r in runs)
+
+
+def identifier(text: str) -> str:
+    """Identificador de título como ``auto_identifiers`` de pandoc."""
+    kept = "".join(ch for ch in text if ch.isalnum() or ch in "_-. \t\n")
+    ident = re.sub(r"\s+", "-", kept.strip()).lower()
+    match = re.search(r"[^\W\d_]", ident)
+    return ident[match.start():] if match else ""
+
+
+# --- Bloques ------------------------------------------------------------------
+
+_ATX = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?[ \t]*$")
+_RULE = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_FENCE = re.compile(r"^( {0,3})(`{3,}|~{3,})(.*)$")
+_RAW_ATTRIBUTE = re.compile(r"^\s*\{=(\w+)\}\s*$")
+_LIST = re.compile(r"^( *)([-*+]|\d{1,9}[.)])( +|$)(.*)$")
+_TABLE_DELIM = re.compile(r"^ {0,3}\|?[ \t]*:?-+:?[ \t]*(\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_TASK = re.compile(r"^\[([ xX])\] +")
+_SETEXT = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def _split_row(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    cells, buf, i = [], [], 0
+    while i < len(line):
+        if line[i] == "\\" and i + 1 < len(line) and line[i + 1] == "|":
+            buf.append("|")
+            i += 2
+            continue
+        if line[i] == "|":
+            cells.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(line[i])
+        i += 1
+    cells.append("".join(buf).strip())
+    return cells
+
+
+class _BlockParser:
+    def __init__(self, lines: list[str], in_list: bool = False):
+        self.lines = lines
+        self.in_list = in_list
+        self.i = 0
+
+    def parse(self) -> list[Any]:
+        blocks: list[Any] = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if not line.strip():
+                self.i += 1
+                continue
+            stripped = line.lstrip(" ")
+            if _FENCE.match(line):
+                blocks.append(self._fence())
+            elif _ATX.match(line):
+                match = _ATX.match(line)
+                text = re.sub(r"[ \t]+#+$", "", match.group(2) or "")
+                runs = parse_inlines(text)
+                blocks.append(Heading(len(match.group(1)), runs))
+                self.i += 1
+            elif _RULE.match(line):
+                blocks.append(Rule())
+                self.i += 1
+            elif _LIST.match(line) and _indent(line) < 4:
+                blocks.append(self._list())
+            elif (
+                stripped.startswith("|")
+                and self.i + 1 < len(self.lines)
+                and _TABLE_DELIM.match(self.lines[self.i + 1])
+            ):
+                blocks.append(self._table())
+            elif _indent(line) >= 4 and not self.in_list:
+                raise UnsupportedMarkdown("bloques de código indentados")
+            elif stripped.startswith((">", "<")):
+                raise UnsupportedMarkdown("citas o HTML de bloque")
+            elif re.match(r"^ {0,3}\[[^\]]+\]:", line):
+                raise UnsupportedMarkdown("definiciones de enlaces o notas")
+            elif stripped.startswith(("+---", "+===", ":::")) or re.match(r"^ {0,3}: ", line):
+                raise UnsupportedMarkdown("tablas de cuadrícula, divs o definiciones")
+            else:
+                blocks.append(self._paragraph())
+        return blocks
+
+    def _fence(self) -> CodeBlock:
+        match = _FENCE.match(self.lines[self.i])
+        indent, fence = len(match.group(1)), match.group(2)
+        raw = _RAW_ATTRIBUTE.match(match.group(3))
+        self.i += 1
+        body = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            self.i += 1
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                break
+            body.append(line[min(indent, _indent(line)):])
+        return CodeBlock("\n".join(body), raw.group(1) if raw else "")
+
+    def _paragraph(self) -> Para:
+        chunk = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if not line.strip():
+                break
+            if chunk and _FENCE.match(line):
+                break
+            if chunk and _SETEXT.match(line) and len(chunk) == 1:
+                raise UnsupportedMarkdown("títulos setext")
+            if chunk and self.in_list and _LIST.match(line):
+                break
+            chunk.append(line)
+            self.i += 1
+        return Para(parse_inlines("\n".join(chunk)))
+
+    def _table(self) -> Table:
+        header = _split_row(self.lines[self.i])
+        delims = _split_row(self.lines[self.i + 1])
+        aligns = []
+        for d in delims:
+            left, right = d.startswith(":"), d.endswith(":")
+            aligns.append("center" if left and right else "right" if right else "left")
+        self.i += 2
+        rows = []
+        while self.i < len(self.lines) and self.lines[self.i].lstrip().startswith("|"):
+            rows.append(_split_row(self.lines[self.i]))
+            self.i += 1
+        width = len(aligns)
+        if len(header) != width:
+            raise UnsupportedMarkdown("tabla con columnas irregulares")
+
+        def cells(values: list[str]) -> list[list[Run]]:
+            values = (values + [""] * width)[:width]
+            return [parse_inlines(v) for v in values]
+
+        return Table(aligns, cells(header), [cells(r) for r in rows])
+
+    def _list(self) -> ListBlock:
+        first = _LIST.match(self.lines[self.i])
+        base = len(first.group(1))
+        ordered = first.group(2)[0].isdigit()
+        start = int(first.group(2)[:-1]) if ordered else 1
+        items: list[list[Any]] = []
+        tasks: list[bool | None] = []
+        tight = True
+        while self.i < len(self.lines):
+            match = _LIST.match(self.lines[self.i])
+            if not match or len(match.group(1)) != base:
+                break
+            if match.group(2)[0].isdigit() != ordered:
+                break
+            content_col = base + len(match.group(2)) + max(1, min(len(match.group(3)), 4))
+            item_lines = [match.group(4)]
+            task = _TASK.match(match.group(4)) if not ordered else None
+            if task:
+                item_lines[0] = match.group(4)[task.end():]
+            tasks.append(task.group(1) != " " if task else None)
+            self.i += 1
+            saw_blank = False
+            while self.i < len(self.lines):
+                line = self.lines[self.i]
+                if not line.strip():
+                    nxt = self._next_nonblank()
+                    if nxt is None or _indent(self.lines[nxt]) <= base:
+                        break
+                    saw_blank = True
+                    item_lines.append("")
+                    self.i += 1
+                    continue
+                if _indent(line) > base:
+                    item_lines.append(line[min(content_col, _indent(line)):])
+                    self.i += 1
+                    continue
+                # Continuación perezosa del párrafo del elemento
+                if (
+                    item_lines[-1].strip()
+                    and not saw_blank
+                    and not _LIST.match(line)
+                    and not _ATX.match(line)
+                    and not _RULE.match(line)
+                    and not _FENCE.match(line)
+                ):
+                    item_lines.append(line.lstrip(" "))
+                    self.i += 1
+                    continue
+                break
+            blocks = _BlockParser(item_lines, in_list=True).parse()
+            items.append(blocks)
+            if saw_blank:
+                tight = False
+            nxt = self._next_nonblank()
+            if nxt is not None and nxt != self.i:
+                following = _LIST.match(self.lines[nxt])
+                if following and len(following.group(1)) == base:
+                    tight = False
+                    self.i = nxt
+                else:
+                    break
+        if tight:
+            for blocks in items:
+                for block in blocks:
+                    if isinstance(block, Para):
+                        block.compact = True
+        return ListBlock(ordered, start, items, tight, tasks)
+
+    def _next_nonblank(self) -> int | None:
+        j = self.i
+        while j < len(self.lines) and not self.lines[j].strip():
+            j += 1
+        return j if j < len(self.lines) else None
+
+
+def parse_markdown(text: str) -> list[Any]:
+    """Parsea ``text`` al modelo intermedio o lanza :class:`UnsupportedMarkdown`."""
+    lines = text.replace("\r\n", "\n").replace("\t", "    ").split("\n")
+    if lines and lines[0].strip() == "---":
+        raise UnsupportedMarkdown("bloque de metadatos YAML")
+    blocks = _BlockParser(lines).parse()
+    seen: dict[str, int] = {}
+    for block in _walk(blocks):
+        if isinstance(block, Heading):
+            ident = identifier(plain_text(block.runs)) or "section"
+            if ident in seen:
+                seen[ident] += 1
+                ident = f"{ident}-{seen[ident]}"
+            else:
+                seen[ident] = 0
+            block.ident = ident
+    return blocks
+
+
+def _walk(blocks: list[Any]) -> Iterator[Any]:
+    for block in blocks:
+        yield block
+        if isinstance(block, ListBlock):
+            for item in block.items:
+                yield from _walk(item)
+
+
+# --- Escritura OOXML -------------------------------------------------------------
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+# Equivalentes de xml.sax.saxutils, que al importarse arrastra urllib y http.client
+def escape(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+def quoteattr(value: str) -> str:
+    return f'"{html.escape(value)}"'
+
+
+BULLETS = ("\u2022", "\u25e6", "\u25aa")
+UNCHECKED, CHECKED = "\u2610", "\u2612"
+
+# numId de cada tipo de lista; las numeradas usan uno propio a partir de ORDERED_NUM
+BULLET_NUM, UNCHECKED_NUM, CHECKED_NUM, ORDERED_NUM = 1, 2, 3, 4
+
+# Filas de una RowTable que se comprimen y escriben juntas
+ROW_CHUNK = 1024
+
+_DOCUMENT_START = (
+    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:document {_W} {_R}><w:body>'
+)
+_DOCUMENT_END = (
+    '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" '
+    'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr></w:body></w:document>'
+)
+_TABLE_PROPERTIES = (
+    '<w:tblPr><w:tblStyle w:val="Table"/><w:tblW w:w="5000" w:type="pct"/>'
+    '<w:tblLook w:firstRow="1" w:lastRow="0" w:firstColumn="0" w:lastColumn="0" '
+    'w:noHBand="0" w:noVBand="0" w:val="0020"/></w:tblPr>'
+)
+
+
+@dataclass
+class _Writer:
+    body: list[str] = field(default_factory=list)
+    links: dict[str, str] = field(default_factory=dict)
+    ordered_nums: list[tuple[int, int]] = field(default_factory=list)
+    bookmark: int = 0
+    rows: int = 0
+
+    def link_id(self, target: str) -> str:
+        if target not in self.links:
+            self.links[target] = f"rIdLink{len(self.links) + 1}"
+        return self.links[target]
+
+    def runs(self, runs: list[Run], bold: bool = False) -> str:
+        out = []
+        i = 0
+        while i < len(runs):
+            run = runs[i]
+            if run.link is not None:
+                target = run.link
+                group = []
+                while i < len(runs) and runs[i].link == target:
+                    group.append(runs[i])
+                    i += 1
+                inner = "".join(self._run(r, bold, hyperlink=True) for r in group)
+                if target.startswith("#"):
+                    out.append(f"<w:hyperlink w:anchor={quoteattr(target[1:])}>{inner}</w:hyperlink>")
+                else:
+                    out.append(f'<w:hyperlink r:id="{self.link_id(target)}">{inner}</w:hyperlink>')
+                continue
+            out.append(self._run(run, bold))
+            i += 1
+        return "".join(out)
+
+    @staticmethod
+    def _run(run: Run, bold: bool = False, hyperlink: bool = False) -> str:
+        if run.br:
+            return "<w:r><w:br/></w:r>"
+        props = []
+        if run.code:
+            props.append('<w:rStyle w:val="VerbatimChar"/>')
+        elif hyperlink:
+            props.append('<w:rStyle w:val="Hyperlink"/>')
+        if run.bold or bold:
+            props.append("<w:b/><w:bCs/>")
+        if run.italic:
+            props.append("<w:i/><w:iCs/>")
+        rpr = f"<w:rPr>{''.join(props)}</w:rPr>" if props else ""
+        text = escape(_INVALID_XML.sub("", run.text))
+        return f'<w:r>{rpr}<w:t xml:space="preserve">{text}</w:t></w:r>'
+
+    def paragraph(self, style: str, content: str, extra_ppr: str = "") -> None:
+        self.body.append(
+            f'<w:p><w:pPr><w:pStyle w:val="{style}"/>{extra_ppr}</w:pPr>{content}</w:p>'
+        )
+
+    def blocks(self, blocks: list[Any], depth: int = 0, num: int | None = None) -> None:
+        for index, block in enumerate(blocks):
+            # Solo el primer párrafo de un elemento de lista lleva la viñeta/número
+            numbering = ""
+            if num is not None and index == 0 and isinstance(block, Para):
+                numbering = f'<w:numPr><w:ilvl w:val="{depth}"/><w:numId w:val="{num}"/></w:numPr>'
+            elif num is not None:
+                numbering = f'<w:ind w:left="{720 * (depth + 1)}"/>'
+            if isinstance(block, Heading):
+                self.bookmark += 1
+                name = quoteattr(block.ident)
+                content = (
+                    f'<w:bookmarkStart w:id="{self.bookmark}" w:name={name}/>'
+                    f"{self.runs(block.runs)}"
+                    f'<w:bookmarkEnd w:id="{self.bookmark}"/>'
+                )
+                self.paragraph(f"Heading{block.level}", content)
+            elif isinstance(block, Para):
+                style = "Compact" if block.compact else "BodyText"
+                self.paragraph(style, self.runs(block.runs), numbering)
+            elif isinstance(block, CodeBlock) and block.raw:
+                # Como pandoc: el XML de Word va tal cual y otros formatos se omiten
+                if block.raw == "openxml":
+                    self.body.append(block.text)
+            elif isinstance(block, CodeBlock):
+                lines = block.text.split("\n")
+                parts = []
+                for j, line in enumerate(lines):
+                    if j:
+                        parts.append("<w:r><w:br/></w:r>")
+                    parts.append(self._run(Run(line, code=True)))
+                self.paragraph("SourceCode", "".join(parts), numbering)
+            elif isinstance(block, Rule):
+                self.paragraph(
+                    "HorizontalRule",
+                    "",
+                    '<w:pBdr><w:bottom w:val="single" w:sz="6" w:space="1" w:color="auto"/></w:pBdr>',
+                )
+            elif isinstance(block, Table):
+                self.table(block)
+            elif isinstance(block, RowTable):
+                self.body.extend(self.row_table(block))
+            elif isinstance(block, ListBlock):
+                self.list(block, depth + 1 if num is not None else 0)
+
+    def list(self, block: ListBlock, depth: int) -> None:
+        if block.ordered:
+            num = ORDERED_NUM + len(self.ordered_nums)
+            self.ordered_nums.append((depth, block.start))
+        for index, item in enumerate(block.items):
+            if not block.ordered:
+                task = block.tasks[index] if index < len(block.tasks) else None
+                num = BULLET_NUM if task is None else (CHECKED_NUM if task else UNCHECKED_NUM)
+            if not item or not isinstance(item[0], Para):
+                item = [Para([], compact=block.tight), *item]
+            self.blocks(item, depth, num)
+
+    def table(self, table: Table) -> None:
+        width = len(table.aligns)
+        grid = "".join('<w:gridCol w:w="{}"/>'.format(9360 // width) for _ in range(width))
+        rows = []
+
+        def row(cells: list[list[Run]], header: bool) -> str:
+            tr = "<w:trPr><w:tblHeader/></w:trPr>" if header else ""
+            tcs = []
+            for runs, align in zip(cells, table.aligns):
+                jc = {"left": "left", "right": "right", "center": "center"}[align]
+                tcs.append(
+                    "<w:tc><w:tcPr/><w:p><w:pPr><w:pStyle w:val=\"Compact\"/>"
+                    f'<w:jc w:val="{jc}"/></w:pPr>{self.runs(runs, bold=header)}</w:p></w:tc>'
+                )
+            return f"<w:tr>{tr}{''.join(tcs)}</w:tr>"
+
+        rows.append(row(table.header, True))
+        rows.extend(row(r, False) for r in table.rows)
+        self.body.append(
+            f"<w:tbl>{_TABLE_PROPERTIES}<w:tblGrid>{grid}</w:tblGrid>{''.join(rows)}</w:tbl>"
+        )
+        # Word exige un párrafo entre tablas consecutivas
+        self.body.append("<w:p/>")
+
+    @staticmethod
+    def _plain_row(cells: Sequence[Any], aligns: list[str], header: bool = False) -> str:
+        rpr = "<w:rPr><w:b/><w:bCs/></w:rPr>" if header else ""
+        tcs = []
+        for value, align in zip(cells, aligns):
+            text = "" if value is None else escape(_INVALID_XML.sub("", str(value)))
+            tcs.append(
+                '<w:tc><w:tcPr/><w:p><w:pPr><w:pStyle w:val="Compact"/>'
+                f'<w:jc w:val="{align}"/></w:pPr>'
+                f'<w:r>{rpr}<w:t xml:space="preserve">{text}</w:t></w:r></w:p></w:tc>'
+            )
+        tr = "<w:trPr><w:tblHeader/></w:trPr>" if header else ""
+        return f"<w:tr>{tr}{''.join(tcs)}</w:tr>"
+
+    def row_table(self, table: RowTable) -> Iterator[str]:
+        """Genera el XML de ``table`` en trozos de :data:`ROW_CHUNK` filas."""
+        width = len(table.header)
+        aligns = list(table.aligns or [])[:width]
+        aligns += ["left"] * (width - len(aligns))
+        grid = "".join(f'<w:gridCol w:w="{9360 // width}"/>' for _ in range(width))
+        chunk = [
+            f"<w:tbl>{_TABLE_PROPERTIES}<w:tblGrid>{grid}</w:tblGrid>",
+            self._plain_row(table.header, aligns, header=True),
+        ]
+        for row in table.rows:
+            chunk.append(self._plain_row(row, aligns))
+            self.rows += 1
+            if len(chunk) >= ROW_CHUNK:
+                yield "".join(chunk)
+                chunk.clear()
+        chunk.append("</w:tbl><w:p/>")
+        yield "".join(chunk)
+
+
+def _styles_xml() -> str:
+    headings = []
+    sizes = {1: 32, 2: 28, 3: 24, 4: 22, 5: 22, 6: 22}
+    for level, size in sizes.items():
+        headings.append(
+            f'<w:style w:type="paragraph" w:styleId="Heading{level}">'
+            f'<w:name w:val="heading {level}"/><w:basedOn w:val="Normal"/>'
+            '<w:next w:val="BodyText"/><w:uiPriority w:val="9"/><w:qFormat/>'
+            '<w:pPr><w:keepNext/><w:keepLines/><w:spacing w:before="480" w:after="0"/>'
+            f'<w:outlineLvl w:val="{level - 1}"/></w:pPr>'
+            f'<w:rPr><w:b/><w:bCs/><w:color w:val="4F81BD"/><w:sz w:val="{size}"/>'
+            f'<w:szCs w:val="{size}"/></w:rPr></w:style>'
+        )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:styles {_W}>'
+        "<w:docDefaults><w:rPrDefault><w:rPr>"
+        '<w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:eastAsia="Calibri" w:cs="Calibri"/>'
+        '<w:sz w:val="24"/><w:szCs w:val="24"/><w:lang w:val="es-MX"/></w:rPr></w:rPrDefault>'
+        '<w:pPrDefault><w:pPr><w:spacing w:after="200"/></w:pPr></w:pPrDefault></w:docDefaults>'
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+        '<w:style w:type="paragraph" w:styleId="BodyText"><w:name w:val="Body Text"/>'
+        '<w:basedOn w:val="Normal"/><w:qFormat/><w:pPr><w:spacing w:before="180" w:after="180"/></w:pPr></w:style>'
+        '<w:style w:type="paragraph" w:customStyle="1" w:styleId="Compact"><w:name w:val="Compact"/>'
+        '<w:basedOn w:val="BodyText"/><w:qFormat/><w:pPr><w:spacing w:before="36" w:after="36"/></w:pPr></w:style>'
+        '<w:style w:type="paragraph" w:customStyle="1" w:styleId="SourceCode"><w:name w:val="Source Code"/>'
+        '<w:basedOn w:val="Normal"/><w:pPr><w:shd w:val="clear" w:color="auto" w:fill="F8F8F8"/>'
+        '<w:wordWrap w:val="off"/></w:pPr></w:style>'
+        '<w:style w:type="paragraph" w:customStyle="1" w:styleId="HorizontalRule"><w:name w:val="Horizontal Rule"/>'
+        '<w:basedOn w:val="Normal"/></w:style>'
+        + "".join(headings)
+        + '<w:style w:type="character" w:default="1" w:styleId="DefaultParagraphFont">'
+        '<w:name w:val="Default Paragraph Font"/><w:uiPriority w:val="1"/><w:semiHidden/></w:style>'
+        '<w:style w:type="character" w:customStyle="1" w:styleId="VerbatimChar"><w:name w:val="Verbatim Char"/>'
+        '<w:basedOn w:val="DefaultParagraphFont"/><w:rPr><w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/>'
+        '<w:sz w:val="22"/></w:rPr></w:style>'
+        '<w:style w:type="character" w:styleId="Hyperlink"><w:name w:val="Hyperlink"/>'
+        '<w:basedOn w:val="DefaultParagraphFont"/><w:rPr><w:color w:val="4F81BD"/></w:rPr></w:style>'
+        '<w:style w:type="table" w:default="1" w:styleId="TableNormal"><w:name w:val="Normal Table"/>'
+        '<w:semiHidden/><w:tblPr><w:tblInd w:w="0" w:type="dxa"/><w:tblCellMar>'
+        '<w:top w:w="0" w:type="dxa"/><w:left w:w="108" w:type="dxa"/>'
+        '<w:bottom w:w="0" w:type="dxa"/><w:right w:w="108" w:type="dxa"/></w:tblCellMar></w:tblPr></w:style>'
+        '<w:style w:type="table" w:customStyle="1" w:styleId="Table"><w:name w:val="Table"/>'
+        '<w:basedOn w:val="TableNormal"/><w:tblPr><w:tblBorders>'
+        '<w:top w:val="single" w:sz="4" w:space="0" w:color="BFBFBF"/>'
+        '<w:bottom w:val="single" w:sz="4" w:space="0" w:color="BFBFBF"/>'
+        '<w:insideH w:val="single" w:sz="4" w:space="0" w:color="BFBFBF"/>'
+        "</w:tblBorders></w:tblPr></w:style>"
+        "</w:styles>"
+    )
+
+
+def _numbering_xml(ordered_nums: list[tuple[int, int]]) -> str:
+    def levels(glyph: str | None) -> str:
+        out = []
+        for lvl in range(9):
+            if glyph is None:
+                fmt, text = "decimal", f"%{lvl + 1}."
+            else:
+                fmt, text = "bullet", glyph or BULLETS[lvl % len(BULLETS)]
+            out.append(
+                f'<w:lvl w:ilvl="{lvl}"><w:start w:val="1"/><w:numFmt w:val="{fmt}"/>'
+                f'<w:lvlText w:val="{text}"/><w:lvlJc w:val="left"/>'
+                f'<w:pPr><w:ind w:left="{720 * (lvl + 1)}" w:hanging="360"/></w:pPr></w:lvl>'
+            )
+        return "".join(out)
+
+    kinds = {BULLET_NUM: "", UNCHECKED_NUM: UNCHECKED, CHECKED_NUM: CHECKED, ORDERED_NUM: None}
+    abstract = []
+    nums = []
+    for num, glyph in kinds.items():
+        abstract.append(
+            f'<w:abstractNum w:abstractNumId="{num}">'
+            f'<w:multiLevelType w:val="hybridMultilevel"/>{levels(glyph)}</w:abstractNum>'
+        )
+        if num != ORDERED_NUM:
+            nums.append(f'<w:num w:numId="{num}"><w:abstractNumId w:val="{num}"/></w:num>')
+    for offset, (depth, start) in enumerate(ordered_nums):
+        nums.append(
+            f'<w:num w:numId="{ORDERED_NUM + offset}"><w:abstractNumId w:val="{ORDERED_NUM}"/>'
+            f'<w:lvlOverride w:ilvl="{depth}"><w:startOverride w:val="{start}"/></w:lvlOverride></w:num>'
+        )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:numbering {_W}>'
+        + "".join(abstract)
+        + "".join(nums)
+        + "</w:numbering>"
+    )
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '<Override PartName="/word/numbering.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>'
+    '<Override PartName="/docProps/core.xml" '
+    'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+    '<Override PartName="/docProps/app.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="word/document.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/'
+    'relationships/metadata/core-properties" Target="docProps/core.xml"/>'
+    '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/extended-properties" Target="docProps/app.xml"/>'
+    "</Relationships>"
+)
+
+_APP = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+    "<Application>docconv</Application></Properties>"
+)
+
+
+def _core_xml(title: str) -> str:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        f"<dc:title>{escape(title)}</dc:title>"
+        f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+        f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified>'
+        "</cp:coreProperties>"
+    )
+
+
+def _document_rels(links: dict[str, str]) -> str:
+    base = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    rels = [
+        f'<Relationship Id="rIdStyles" Type="{base}/styles" Target="styles.xml"/>',
+        f'<Relationship Id="rIdNumbering" Type="{base}/numbering" Target="numbering.xml"/>',
+    ]
+    for target, rid in links.items():
+        rels.append(
+            f'<Relationship Id="{rid}" Type="{base}/hyperlink" '
+            f"Target={quoteattr(target)} TargetMode=\"External\"/>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(rels)
+        + "</Relationships>"
+    )
+
+
+def write_docx(blocks: list[Any], title: str = "") -> bytes:
+    """Empaqueta el modelo intermedio como un DOCX y devuelve sus bytes."""
+    with phase("write"):
+        writer = _Writer()
+        writer.blocks(blocks)
+        document = _DOCUMENT_START + "".join(writer.body) + _DOCUMENT_END
+    with phase("zip"):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            _write_head(zf, title)
+            zf.writestr("word/document.xml", document)
+            _write_tail(zf, writer)
+        return buffer.getvalue()
+
+
+def _write_head(zf: zipfile.ZipFile, title: str) -> None:
+    zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+    zf.writestr("_rels/.rels", _ROOT_RELS)
+    zf.writestr("docProps/core.xml", _core_xml(title))
+    zf.writestr("docProps/app.xml", _APP)
+
+
+def _write_tail(zf: zipfile.ZipFile, writer: _Writer) -> None:
+    # Dependen de las listas y enlaces vistos al escribir document.xml
+    zf.writestr("word/styles.xml", _styles_xml())
+    zf.writestr("word/numbering.xml", _numbering_xml(writer.ordered_nums))
+    zf.writestr("word/_rels/document.xml.rels", _document_rels(writer.links))
+
+
+def write_docx_stream(path: Path | str, blocks: Iterable[Any], title: str = "") -> int:
+    """Escribe en ``path`` un DOCX cuyo ``word/document.xml`` se genera sobre la marcha.
+
+    ``blocks`` se consume una sola vez; cada elemento es un fragmento de
+    Markdown (``str``), un bloque del modelo intermedio o una
+    :class:`RowTable`. Cada fragmento se escribe y se descarta antes de pedir
+    el siguiente y las filas van al zip en trozos, así que la memoria pico no
+    depende del tamaño del documento. El archivo se reemplaza de forma
+    atómica; devuelve el número de filas de tabla escritas.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    writer = _Writer()
+    seen: set[str] = set()
+    try:
+        with phase("write"), os.fdopen(fd, "wb") as fh:
+            with zipfile.ZipFile(fh, "w", zipfile.ZIP_DEFLATED) as zf:
+                _write_head(zf, title)
+                with zf.open("word/document.xml", "w") as out:
+                    out.write(_DOCUMENT_START.encode("utf-8"))
+                    for block in blocks:
+                        if isinstance(block, RowTable):
+                            for chunk in writer.row_table(block):
+                                out.write(chunk.encode("utf-8"))
+                            continue
+                        if isinstance(block, str):
+                            parsed = parse_markdown(block)
+                            _unique_idents(parsed, seen)
+                            writer.blocks(parsed)
+                        else:
+                            writer.blocks([block])
+                        out.write("".join(writer.body).encode("utf-8"))
+                        writer.body.clear()
+                    out.write(_DOCUMENT_END.encode("utf-8"))
+                _write_tail(zf, writer)
+        from .engine import output_mode
+
+        os.chmod(tmp, output_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return writer.rows
+
+
+def _unique_idents(blocks: list[Any], seen: set[str]) -> None:
+    # parse_markdown solo evita identificadores repetidos dentro de cada fragmento
+    for block in _walk(blocks):
+        if isinstance(block, Heading):
+            ident, n = block.ident, 0
+            while block.ident in seen:
+                n += 1
+                block.ident = f"{ident}-{n}"
+            seen.add(block.ident)
+
+
+def markdown_to_docx_native(text: str) -> bytes:
+    """Convierte ``text`` a DOCX sin pandoc o lanza :class:`UnsupportedMarkdown`."""
+    with phase("parse"):
+        blocks = parse_markdown(text)
+    return write_docx(blocks)
@@ -0,0 +1,337 @@
+"""Reducción del tamaño de los DOCX generados.
+
+Etapa de posproceso sobre el paquete ya escrito por pandoc, el escritor
+nativo o :mod:`docconv.merge`:
+
+- los archivos de ``word/media`` con el mismo contenido se guardan una sola
+  vez y todas las relaciones apuntan a esa copia (la unión por secciones
+  duplica el logo en cada sección);
+- las imágenes mayores que su tamaño mostrado se reducen a ese tamaño a
+  ``dpi`` puntos por pulgada y se recomprimen, si Pillow está instalado; el
+  resultado se guarda por hash de la imagen original en memoria y en la
+  :class:`~docconv.cache.ConversionCache`, así que el mismo logo se procesa
+  una vez para miles de documentos;
+- los estilos que nada usa (ni directamente ni como base, vinculado o
+  siguiente de un estilo usado) se eliminan de ``word/styles.xml``;
+- el zip se reescribe con el nivel de compresión elegido, guardando sin
+  comprimir las imágenes que ya vienen comprimidas.
+
+Con ``reproducible`` el paquete sale byte a byte idéntico para el mismo
+contenido: las entradas del zip llevan una fecha fija y van en orden
+canónico, y las fechas de ``docProps/core.xml`` se normalizan. La fecha es la
+de ``SOURCE_DATE_EPOCH`` (la misma variable que respeta pandoc) o, sin ella,
+el 1 de enero de 1980, la mínima que admite el formato zip. Los
+identificadores de relaciones ya son estables: pandoc, el escritor nativo y
+la unión por secciones los asignan en orden de aparición.
+
+Como en la unión, el XML se edita como texto con expresiones regulares.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import math
+import os
+import posixpath
+import re
+import zipfile
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from threading import Lock
+
+from .cache import ConversionCache, cache_key, content_digest
+from .metrics import annotate, phase
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional: sin él no se reducen imágenes
+    Image = None
+
+# Cambia cuando el resultado de la optimización cambia para la misma entrada
+OPTIMIZE_VERSION = "1"
+
+EMU_PER_INCH = 914_400
+
+# Fecha más antigua representable en una entrada zip
+ZIP_EPOCH = datetime(1980, 1, 1, tzinfo=timezone.utc)
+
+# Formatos que ya vienen comprimidos: deflate apenas los reduce
+COMPRESSED_MEDIA = (".png", ".jpg", ".jpeg", ".gif")
+
+# Formatos de imagen que Pillow reescribe en su mismo formato
+_PIL_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG"}
+
+_DRAWING = re.compile(r"<w:drawing>.*?</w:drawing>", re.S)
+_EXTENT = re.compile(r'<wp:extent\s+cx="(\d+)"\s+cy="(\d+)"')
+_BLIP = re.compile(r'<a:blip\b[^>]*\br:embed="([^"]+)"')
+_RELATIONSHIP = re.compile(r"<Relationship\s[^>]*?/?>")
+_ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+_OVERRIDE = re.compile(r'<Override\s[^>]*PartName="([^"]+)"[^>]*/>')
+_STYLE = re.compile(r'<w:style\b[^>]*\bw:styleId="([^"]+)"[^>]*>.*?</w:style>', re.S)
+_STYLE_REF = re.compile(r'<w:(?:pStyle|rStyle|tblStyle|numStyleLink|styleLink)\s+w:val="([^"]+)"')
+_STYLE_CHAIN = re.compile(r'<w:(?:basedOn|link|next)\s+w:val="([^"]+)"')
+_CORE_DATE = re.compile(r"(<dcterms:(created|modified)\b[^>]*>)[^<]*(</dcterms:\2>)")
+
+_IMAGE_MEMO_SIZE = 64
+_image_memo: OrderedDict[str, bytes] = OrderedDict()
+_image_memo_lock = Lock()
+
+
+@dataclass(frozen=True)
+class OptimizeOptions:
+    """Pasos de :func:`optimize_docx`; ``compresslevel`` 0 guarda todo sin comprimir."""
+
+    dedupe_media: bool = True
+    downscale: bool = True
+    dpi: int = 150
+    jpeg_quality: int = 85
+    prune_styles: bool = True
+    compresslevel: int = 9
+    reproducible: bool = False
+
+    def key(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+def source_date() -> datetime:
+    """Fecha de las salidas reproducibles: ``SOURCE_DATE_EPOCH`` o 1980-01-01."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    if not epoch.isdigit():
+        return ZIP_EPOCH
+    return max(ZIP_EPOCH, datetime.fromtimestamp(int(epoch), timezone.utc))
+
+
+def _normalize_core(files: dict[str, bytes], date: datetime) -> None:
+    """Fija las fechas de creación y modificación de ``docProps/core.xml``."""
+    if "docProps/core.xml" not in files:
+        return
+    stamp = date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    xml = files["docProps/core.xml"].decode("utf-8")
+    files["docProps/core.xml"] = _CORE_DATE.sub(
+        lambda m: f"{m.group(1)}{stamp}{m.group(3)}", xml
+    ).encode("utf-8")
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _relationships(xml: str) -> list[tuple[str, dict[str, str]]]:
+    return [(m.group(0), dict(_ATTRIBUTE.findall(m.group(0)))) for m in _RELATIONSHIP.finditer(xml)]
+
+
+def _rel_target(rels_name: str, target: str) -> str:
+    """Ruta dentro del paquete de un ``Target`` relativo a la parte de ``rels_name``."""
+    base = posixpath.dirname(posixpath.dirname(rels_name))
+    return posixpath.normpath(posixpath.join(base, target))
+
+
+def _dedupe_media(files: dict[str, bytes]) -> int:
+    """Deja una copia de cada archivo de ``word/media`` y devuelve cuántos sobraban."""
+    first: dict[str, str] = {}
+    duplicates: dict[str, str] = {}
+    for name, data in files.items():
+        if name.startswith("word/media/"):
+            keep = first.setdefault(hashlib.sha256(data).hexdigest(), name)
+            if keep != name:
+                duplicates[name] = keep
+    if not duplicates:
+        return 0
+    for rels_name in [name for name in files if name.endswith(".rels")]:
+        xml = files[rels_name].decode("utf-8")
+
+        def retarget(match: re.Match) -> str:
+            element = match.group(0)
+            attrs = dict(_ATTRIBUTE.findall(element))
+            if attrs.get("TargetMode") == "External" or "Target" not in attrs:
+                return element
+            keep = duplicates.get(_rel_target(rels_name, attrs["Target"]))
+            if keep is None:
+                return element
+            base = posixpath.dirname(posixpath.dirname(rels_name))
+            target = posixpath.relpath(keep, base or ".")
+            return element.replace(f'Target="{attrs["Target"]}"', f'Target="{target}"')
+
+        files[rels_name] = _RELATIONSHIP.sub(retarget, xml).encode("utf-8")
+    types = files["[Content_Types].xml"].decode("utf-8")
+    types = _OVERRIDE.sub(
+        lambda m: "" if m.group(1).lstrip("/") in duplicates else m.group(0), types
+    )
+    files["[Content_Types].xml"] = types.encode("utf-8")
+    for name in duplicates:
+        del files[name]
+    return len(duplicates)
+
+
+def _displayed_sizes(files: dict[str, bytes]) -> dict[str, tuple[int, int]]:
+    """Mayor tamaño mostrado, en EMU, de cada imagen del paquete."""
+    sizes: dict[str, tuple[int, int]] = {}
+    for part in [name for name in files if name.startswith("word/") and name.endswith(".xml")]:
+        rels_name = _rels_path(part)
+        if rels_name not in files:
+            continue
+        targets = {
+            attrs["Id"]: _rel_target(rels_name, attrs["Target"])
+            for _, attrs in _relationships(files[rels_name].decode("utf-8"))
+            if "Id" in attrs and "Target" in attrs and attrs.get("TargetMode") != "External"
+        }
+        for drawing in _DRAWING.findall(files[part].decode("utf-8")):
+            extent, blip = _EXTENT.search(drawing), _BLIP.search(drawing)
+            if not (extent and blip and blip.group(1) in targets):
+                continue
+            target = targets[blip.group(1)]
+            cx, cy = int(extent.group(1)), int(extent.group(2))
+            previous = sizes.get(target, (0, 0))
+            sizes[target] = (max(previous[0], cx), max(previous[1], cy))
+    return sizes
+
+
+def _resample(data: bytes, suffix: str, size: tuple[int, int], quality: int) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width <= size[0] and image.height <= size[1]:
+            return data
+        fmt = _PIL_FORMATS[suffix]
+        resized = image.resize(size, Image.LANCZOS)
+        if fmt == "JPEG" and resized.mode not in ("RGB", "L"):
+            resized = resized.convert("RGB")
+        output = io.BytesIO()
+        if fmt == "JPEG":
+            resized.save(output, fmt, quality=quality, optimize=True, progressive=True)
+        else:
+            resized.save(output, fmt, optimize=True)
+    result = output.getvalue()
+    return result if len(result) < len(data) else data
+
+
+def _downscale_image(
+    data: bytes, suffix: str, size: tuple[int, int], quality: int, cache: ConversionCache | None
+) -> bytes:
+    """Imagen reducida a ``size`` píxeles, memorizada por hash del original."""
+    key = cache_key(data, f"image:{size[0]}x{size[1]}", OPTIMIZE_VERSION, suffix, [str(quality)])
+    with _image_memo_lock:
+        if key in _image_memo:
+            _image_memo.move_to_end(key)
+            return _image_memo[key]
+    result = cache.get(key) if cache is not None else None
+    if result is None:
+        result = _resample(data, suffix, size, quality)
+        if cache is not None:
+            cache.put(key, result)
+    with _image_memo_lock:
+        _image_memo[key] = result
+        while len(_image_memo) > _IMAGE_MEMO_SIZE:
+            _image_memo.popitem(last=False)
+    return result
+
+
+def _downscale_media(
+    files: dict[str, bytes], options: OptimizeOptions, cache: ConversionCache | None
+) -> int:
+    """Reduce las imágenes a su tamaño mostrado y devuelve los bytes ahorrados."""
+    saved = 0
+    for name, (cx, cy) in _displayed_sizes(files).items():
+        suffix = posixpath.splitext(name)[1].lower()
+        if name not in files or suffix not in _PIL_FORMATS or not (cx and cy):
+            continue
+        size = (
+            max(1, math.ceil(cx / EMU_PER_INCH * options.dpi)),
+            max(1, math.ceil(cy / EMU_PER_INCH * options.dpi)),
+        )
+        data = files[name]
+        result = _downscale_image(data, suffix, size, options.jpeg_quality, cache)
+        saved += len(data) - len(result)
+        files[name] = result
+    return saved
+
+
+def _prune_styles(files: dict[str, bytes]) -> int:
+    """Elimina los estilos sin uso de ``word/styles.xml`` y devuelve cuántos."""
+    xml = files["word/styles.xml"].decode("utf-8")
+    styles = {m.group(1): m.group(0) for m in _STYLE.finditer(xml)}
+    used: set[str] = set()
+    for name, data in files.items():
+        if name.startswith("word/") and name.endswith(".xml") and name != "word/styles.xml":
+            used.update(_STYLE_REF.findall(data.decode("utf-8")))
+    used.update(style_id for style_id, element in styles.items() if 'w:default="1"' in element)
+    pending = list(used)
+    while pending:
+        element = styles.get(pending.pop())
+        for style_id in _STYLE_CHAIN.findall(element or "") + _STYLE_REF.findall(element or ""):
+            if style_id not in used:
+                used.add(style_id)
+                pending.append(style_id)
+    removed = 0
+
+    def prune(match: re.Match) -> str:
+        nonlocal removed
+        if match.group(1) in used:
+            return match.group(0)
+        removed += 1
+        return ""
+
+    files["word/styles.xml"] = _STYLE.sub(prune, xml).encode("utf-8")
+    return removed
+
+
+def optimize_docx(
+    data: bytes, options: OptimizeOptions | None = None, cache: ConversionCache | None = None
+) -> bytes:
+    """Devuelve ``data`` con los pasos de ``options`` aplicados.
+
+    Con ``cache`` se guarda también el DOCX optimizado, por digest de la
+    entrada y de las opciones, además de cada imagen procesada. Con
+    ``options.reproducible`` el digest del resultado (ver
+    :func:`~docconv.cache.content_digest`) queda en las métricas de la
+    conversión.
+    """
+    options = options or OptimizeOptions()
+    date = source_date() if options.reproducible else None
+    key = cache_key(
+        data, "docx-optimized", OPTIMIZE_VERSION, "docx", [options.key(), str(date)]
+    )
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        if options.reproducible:
+            annotate(digest=content_digest(cached))
+        return cached
+    with phase("optimize"):
+        with zipfile.ZipFile(io.BytesIO(data)) as source:
+            infos = source.infolist()
+            files = {info.filename: source.read(info) for info in infos}
+        if options.dedupe_media:
+            _dedupe_media(files)
+        if options.downscale and Image is not None:
+            _downscale_media(files, options, cache)
+        if options.prune_styles and "word/styles.xml" in files:
+            _prune_styles(files)
+        if date is not None:
+            _normalize_core(files, date)
+            # Orden canónico: [Content_Types].xml primero y el resto por nombre
+            infos.sort(key=lambda info: (info.filename != "[Content_Types].xml", info.filename))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as target:
+            for info in infos:
+                if info.filename not in files:
+                    continue
+                # Se conservan nombre y fecha de cada entrada; solo cambia la compresión
+                entry = zipfile.ZipInfo(info.filename, info.date_time)
+                entry.external_attr = info.external_attr
+                if date is not None:
+                    entry.date_time = date.timetuple()[:6]
+                    entry.create_system = 0
+                    entry.external_attr = 0
+                stored = options.compresslevel == 0 or info.filename.lower().endswith(
+                    COMPRESSED_MEDIA
+                )
+                entry.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                target.writestr(entry, files[info.filename], compresslevel=options.compresslevel)
+        result = buffer.getvalue()
+    if cache is not None:
+        cache.put(key, result)
+    if options.reproducible:
+        annotate(digest=content_digest(result))
+    return result
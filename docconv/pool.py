@@ -0,0 +1,242 @@
+"""Pool de procesos ``pandoc server`` persistentes.
+
+Lanzar pandoc para cada documento cuesta el arranque del proceso y del
+runtime de Haskell, que en documentos pequeños domina el tiempo total. El
+pool mantiene varios ``pandoc server`` vivos en puertos locales y reparte las
+conversiones entre ellos por HTTP con conexiones keep-alive.
+
+Requiere un pandoc compilado con soporte de servidor (``pandoc server``);
+si no está disponible :meth:`PandocServerPool.start` lanza
+:class:`PandocServerUnavailable` y el llamador debe usar el camino de
+subproceso de :mod:`docconv.engine`.
+
+Cada conversión admite un tiempo máximo: el propio servidor responde ``503``
+al agotar su ``--timeout`` y, si aun así no contesta, el servidor atascado se
+mata y se reemplaza por uno nuevo antes de lanzar
+:class:`~docconv.limits.ConversionTimeout`.
+"""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import http.client
+import json
+import queue
+import socket
+import subprocess
+import threading
+import time
+from typing import Any
+
+from .discovery import pandoc_path
+from .limits import ConversionTimeout, Limits
+
+# Nombres de formato que pypandoc acepta y que el servidor no reconoce
+FORMAT_ALIASES = {"md": "markdown"}
+
+# Margen sobre el tiempo máximo para que el servidor responda 503 por sí mismo
+TIMEOUT_GRACE = 1.0
+
+
+class PandocServerUnavailable(RuntimeError):
+    """El servidor de pandoc no pudo arrancar o dejó de responder."""
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _Worker:
+    def __init__(
+        self, pandoc_path: str, timeout: int, startup_timeout: float, memory_mb: int | None = None
+    ):
+        self.pandoc_path = pandoc_path
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.memory_mb = memory_mb
+        self.process: subprocess.Popen | None = None
+        self.connection: http.client.HTTPConnection | None = None
+        self.port = 0
+
+    def start(self) -> None:
+        self.port = _free_port()
+        self.process = subprocess.Popen(
+            [
+                self.pandoc_path, *Limits(memory_mb=self.memory_mb).rts_args(),
+                "server", "--port", str(self.port), "--timeout", str(self.timeout),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                error = self.process.stderr.read().decode("utf-8", "replace").strip()
+                raise PandocServerUnavailable(f"pandoc server terminó al arrancar: {error}")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout + 5)
+                connection.request("GET", "/version")
+                response = connection.getresponse()
+                response.read()
+                if response.status == 200:
+                    self.connection = connection
+                    return
+                connection.close()
+            except OSError:
+                pass
+            time.sleep(0.05)
+        self.stop()
+        raise PandocServerUnavailable("pandoc server no respondió a tiempo")
+
+    def stop(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.process is not None and self.process.stderr:
+            self.process.stderr.close()
+        self.process = None
+
+    def post(self, payload: dict[str, Any], timeout: float | None = None) -> dict[str, Any]:
+        """Envía una conversión; con ``timeout`` mata el servidor si no contesta a tiempo."""
+        if self.connection is None:
+            raise PandocServerUnavailable("pandoc server no está en ejecución")
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        wait = self.timeout + 5 if timeout is None else timeout + TIMEOUT_GRACE
+        self.connection.timeout = wait
+        if self.connection.sock is not None:
+            self.connection.sock.settimeout(wait)
+        try:
+            self.connection.request("POST", "/", body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except TimeoutError:
+            # El servidor sigue ocupado con el documento y no atenderá otro
+            self.stop()
+            raise ConversionTimeout(f"pandoc server no respondió en {wait:g}s") from None
+        except (OSError, http.client.HTTPException) as e:
+            raise PandocServerUnavailable(f"pandoc server no respondió: {e}") from e
+        if response.status == 503:
+            raise ConversionTimeout(f"pandoc server agotó su tiempo de {self.timeout}s")
+        if response.status != 200:
+            raise RuntimeError(data.decode("utf-8", "replace").strip() or f"HTTP {response.status}")
+        result = json.loads(data)
+        if "error" in result:
+            raise RuntimeError(f"pandoc server: {result['error']}")
+        return result
+
+
+class PandocServerPool:
+    """Conjunto de ``size`` servidores pandoc reutilizables y seguros entre hilos.
+
+    Uso::
+
+        with PandocServerPool(size=4) as pool:
+            docx = pool.convert(markdown, "docx")
+
+    ``timeout`` es el ``--timeout`` de cada servidor y ``memory_mb`` acota el
+    heap de cada uno; un documento que lo agote tumba el servidor, que se
+    reinicia como cualquier otro caído.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        pandoc_path: str | None = None,
+        timeout: int = 120,
+        startup_timeout: float = 10.0,
+        memory_mb: int | None = None,
+    ):
+        self.size = max(1, size)
+        self.pandoc_path = pandoc_path
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.memory_mb = memory_mb
+        self._workers: list[_Worker] = []
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._lock = threading.Lock()
+
+    def start(self) -> "PandocServerPool":
+        if self.pandoc_path is None:
+            self.pandoc_path = pandoc_path()
+        try:
+            for _ in range(self.size):
+                worker = _Worker(
+                    self.pandoc_path, self.timeout, self.startup_timeout, self.memory_mb
+                )
+                worker.start()
+                self._workers.append(worker)
+                self._idle.put(worker)
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers.clear()
+
+    def __enter__(self) -> "PandocServerPool":
+        return self.start() if not self._workers else self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def convert(
+        self,
+        source: str | bytes,
+        to: str,
+        fmt: str = "md",
+        options: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> bytes:
+        """Convierte ``source`` en uno de los servidores y devuelve los bytes de salida.
+
+        ``options`` se pasa tal cual al API JSON de ``pandoc server`` (p. ej.
+        ``{"standalone": True}``). Si el servidor elegido cayó se reinicia
+        una vez antes de propagar :class:`PandocServerUnavailable`. Si no
+        termina en ``timeout`` segundos se reemplaza el servidor y se lanza
+        :class:`~docconv.limits.ConversionTimeout`, sin reintentar.
+        """
+        if not self._workers:
+            raise PandocServerUnavailable("el pool no está iniciado")
+        text = source.decode("utf-8") if isinstance(source, bytes) else source
+        payload = dict(options or {})
+        payload.update(
+            text=text,
+            to=FORMAT_ALIASES.get(to, to),
+            **{"from": FORMAT_ALIASES.get(fmt, fmt)},
+        )
+        worker = self._idle.get()
+        try:
+            try:
+                result = worker.post(payload, timeout)
+            except PandocServerUnavailable:
+                worker.stop()
+                worker.start()
+                result = worker.post(payload, timeout)
+        except ConversionTimeout:
+            if worker.process is None:
+                # Si no arranca, el siguiente uso lo reintenta como servidor caído
+                with contextlib.suppress(PandocServerUnavailable):
+                    worker.start()
+            raise
+        finally:
+            self._idle.put(worker)
+        output = result["output"]
+        if result.get("base64"):
+            return base64.b64decode(output)
+        return output.encode("utf-8")
@@ -0,0 +1,756 @@
+"""Tablas de precios generadas desde datos en lugar de cifras escritas a mano.
+
+Las partidas (sección, concepto, cantidad, precio, descuento) se leen de un
+``.json``, ``.csv`` o ``.jsonl`` y los importes se calculan por columnas: el
+importe de cada partida, los subtotales por sección, los impuestos y la
+proyección a varios años. Con NumPy cada paso es una operación vectorizada
+sobre todas las partidas a la vez; sin NumPy se usa un camino en Python puro
+que produce exactamente los mismos centavos.
+
+En el Markdown se escriben marcadores que :func:`expand_pricing` sustituye:
+
+- ``{{precios:seccion}}`` (solo en su párrafo): tabla de la sección y sus totales.
+- ``{{proyeccion:a+b}}`` (solo en su párrafo): importes por año de esas secciones.
+- ``{{total:a+b}}`` (en cualquier texto): importe del primer año.
+- ``{{payback:a+b/c}}`` (en cualquier texto): meses que tarda el ahorro del
+  primer año de ``c`` en cubrir la inversión del primer año de ``a+b``.
+- ``{{roi:a+b/c:n}}`` (en cualquier texto): retorno a ``n`` años (1 si se
+  omite), con el ahorro y la inversión de esos años de la proyección.
+- ``{{promocion:nombre}}`` (solo en su párrafo): precios regulares, descuentos
+  y precios finales de una promoción de la hoja.
+- ``{{comparativa:p+q}}`` (solo en su párrafo): costo por año de esas
+  promociones frente a sus precios regulares.
+- ``{{campo}}`` (en cualquier texto): valor de ``campo`` en los ``campos`` de
+  la hoja, como el cliente o la fecha de emisión. Las campañas de
+  :mod:`docconv.template` los sustituyen por los de cada registro.
+
+Los marcadores dentro de bloques de código delimitados o de código en línea
+se dejan tal cual, de modo que un documento puede mostrar cómo se escriben.
+
+Con ``raw=True`` las tablas de más de :data:`RAW_TABLE_ROWS` filas se
+escriben directamente como XML de tabla de Word en un bloque ``{=openxml}``,
+de modo que pandoc no tiene que leer una tabla de Markdown de miles de filas.
+Solo tiene sentido cuando la salida es DOCX: el resto de formatos descartan
+ese bloque.
+
+Un documento ``X.md`` con un ``X_PRECIOS.json`` al lado se expande al
+convertirlo (ver :func:`expand_sidecar`).
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import re
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from html import escape
+from typing import Any, Callable
+
+# Filas a partir de las cuales una tabla se escribe como XML de Word con raw=True
+RAW_TABLE_ROWS = 200
+
+# Hoja de precios que acompaña a un documento: X.md -> X_PRECIOS.json
+SIDECAR_SUFFIX = "_PRECIOS.json"
+
+_BLOCK = re.compile(
+    r"^\{\{\s*(precios|proyeccion|promocion|comparativa):\s*([\w+]+)\s*\}\}[ \t]*$", re.M
+)
+_INLINE = re.compile(r"\{\{\s*total:\s*([\w+]+)\s*\}\}")
+_RATIO = re.compile(r"\{\{\s*(payback|roi):\s*([\w+]+)/([\w+]+)(?::(\d+))?\s*\}\}")
+FIELD = re.compile(r"\{\{\s*([\w.-]+)\s*\}\}")
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+# Código en línea: el mismo número de comillas invertidas, sin cruzar párrafos
+_CODE_SPAN = re.compile(r"(?<!`)(`+)(?!`)(?:[^\n]|\n(?![ \t]*\n))+?(?<!`)\1(?!`)")
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]<>|$])")
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_TRUE = {"1", "true", "si", "sí", "x", "yes"}
+
+# Claves de las secciones en el JSON y su atributo en Section
+_SECTION_KEYS = {
+    "titulo": "title",
+    "columna": "column",
+    "subtotal": "subtotal",
+    "total_anio1": "first_year",
+    "renovacion": "renewal",
+    "sufijo": "suffix",
+    "recurrente": "recurring",
+    "descripcion": "description",
+    "impuesto": "tax",
+}
+
+# Claves de las promociones en el JSON y su atributo en Promotion
+_PROMOTION_KEYS = {
+    "titulo": "title",
+    "regular": "regular",
+    "columna": "column",
+    "resumen": "summary",
+    "partidas": "items",
+}
+_PROMOTION_ITEM_KEYS = {"concepto", "secciones", "anio", "descuento"}
+
+# Un valor de celda y si va en negritas
+Cell = tuple[str, bool]
+
+
+@dataclass(frozen=True)
+class Section:
+    """Presentación de una sección: encabezados, etiquetas de totales e impuesto.
+
+    ``recurring`` es el valor por defecto de las partidas de la sección
+    (anuales frente a pago único) y ``tax`` sustituye la tasa general.
+    """
+
+    name: str
+    title: str = ""
+    column: str = "Importe"
+    subtotal: str = ""
+    first_year: str = ""
+    renewal: str = ""
+    suffix: str = ""
+    recurring: bool = False
+    description: bool = True
+    tax: float | None = None
+
+
+@dataclass(frozen=True)
+class Promotion:
+    """Descuentos sobre la proyección de algunas secciones, año por año.
+
+    Cada partida de ``items`` tiene ``concepto``, ``secciones`` (``a+b``),
+    ``anio`` y ``descuento`` en porcentaje; con 100 se muestra como incluida.
+    ``summary`` encabeza el resumen por año que sigue a la tabla; sin él
+    solo se escribe la tabla.
+    """
+
+    name: str
+    title: str = ""
+    regular: str = ""
+    column: str = "Descuento"
+    summary: str = ""
+    items: tuple[dict[str, Any], ...] = ()
+
+
+@dataclass
+class PriceSheet:
+    """Partidas y parámetros de una hoja de precios.
+
+    ``tax`` y ``growth`` son porcentajes: la tasa de impuesto y el incremento
+    anual de las partidas recurrentes en la proyección de ``years`` años.
+    """
+
+    items: list[dict[str, Any]] = field(default_factory=list)
+    sections: dict[str, Section] = field(default_factory=dict)
+    currency: str = "MXN"
+    tax: float = 0.0
+    tax_label: str = "IVA"
+    years: int = 3
+    growth: float = 0.0
+    # Valores de los marcadores ``{{campo}}`` del documento
+    fields: dict[str, str] = field(default_factory=dict)
+    promotions: dict[str, Promotion] = field(default_factory=dict)
+
+
+@dataclass
+class PricingTotals:
+    """Importes en centavos calculados por :func:`compute_totals`.
+
+    ``projection`` da por sección el importe de cada año sin impuestos: el
+    primero suma pagos únicos y recurrentes, los siguientes solo recurrentes.
+    """
+
+    sections: list[str]
+    lines: list[int]
+    one_time: dict[str, int]
+    recurring: dict[str, int]
+    tax: dict[str, int]
+    projection: dict[str, list[int]]
+
+    def subtotal(self, name: str) -> int:
+        return self.one_time[name] + self.recurring[name]
+
+    def first_year(self, names: list[str]) -> int:
+        return sum(self.projection[name][0] for name in names)
+
+
+def _number(value: Any, default: float) -> float:
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        value = value.replace(",", "").replace("$", "").strip()
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"importe no numérico en la hoja de precios: {value!r}") from None
+
+
+def _flag(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE
+    return bool(value)
+
+
+def _section(name: str, data: dict[str, Any]) -> Section:
+    unknown = set(data) - set(_SECTION_KEYS)
+    if unknown:
+        raise ValueError(f"sección {name!r}: claves desconocidas {', '.join(sorted(unknown))}")
+    return Section(name, **{_SECTION_KEYS[key]: value for key, value in data.items()})
+
+
+def _promotion(name: str, data: dict[str, Any]) -> Promotion:
+    unknown = set(data) - set(_PROMOTION_KEYS)
+    for item in data.get("partidas", []):
+        unknown |= set(item) - _PROMOTION_ITEM_KEYS
+    if unknown:
+        raise ValueError(f"promoción {name!r}: claves desconocidas {', '.join(sorted(unknown))}")
+    values = {_PROMOTION_KEYS[key]: value for key, value in data.items()}
+    values["items"] = tuple(values.get("items", ()))
+    return Promotion(name, **values)
+
+
+def load_pricing(path: Path | str, base: PriceSheet | None = None) -> PriceSheet:
+    """Lee una hoja de precios y la superpone a ``base``.
+
+    Un ``.json`` es un objeto con ``partidas`` y, opcionalmente, ``secciones``,
+    ``moneda``, ``impuesto``, ``etiqueta_impuesto``, ``anios``,
+    ``incremento_anual``, ``campos`` y ``promociones``; las claves ausentes
+    se toman de ``base``. Un ``.csv`` o ``.jsonl`` solo trae partidas (columnas ``seccion``,
+    ``concepto``, ``descripcion``, ``cantidad``, ``precio``, ``descuento``,
+    ``recurrente``, ``estimado``) y conserva la configuración de ``base``.
+    """
+    path = Path(path)
+    sheet = base or PriceSheet()
+    if path.suffix.lower() != ".json":
+        from .template import load_records
+
+        return replace(sheet, items=list(load_records(path)))
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    if isinstance(data, list):
+        return replace(sheet, items=data)
+    sections = dict(sheet.sections)
+    for name, config in data.get("secciones", {}).items():
+        sections[name] = _section(name, config)
+    promotions = dict(sheet.promotions)
+    for name, config in data.get("promociones", {}).items():
+        promotions[name] = _promotion(name, config)
+    return replace(
+        sheet,
+        items=data.get("partidas", sheet.items),
+        sections=sections,
+        currency=data.get("moneda", sheet.currency),
+        tax=float(data.get("impuesto", sheet.tax)),
+        tax_label=data.get("etiqueta_impuesto", sheet.tax_label),
+        years=max(1, int(data.get("anios", sheet.years))),
+        growth=float(data.get("incremento_anual", sheet.growth)),
+        fields={**sheet.fields, **{k: str(v) for k, v in data.get("campos", {}).items()}},
+        promotions=promotions,
+    )
+
+
+def sidecar_path(source: Path | str) -> Path:
+    source = Path(source)
+    return source.with_name(source.stem + SIDECAR_SUFFIX)
+
+
+def expand_sidecar(source: Path | str, data: bytes, raw: bool = False) -> bytes:
+    """Expande ``data`` (el contenido de ``source``) con su hoja de precios, si la tiene."""
+    sidecar = sidecar_path(source)
+    if not sidecar.is_file():
+        return data
+    markdown = expand_pricing(data.decode("utf-8"), load_pricing(sidecar), raw=raw)
+    return markdown.encode("utf-8")
+
+
+def _numpy():
+    # Solo se importa al calcular: importar NumPy cuesta más que muchos documentos
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _section_names(sheet: PriceSheet) -> list[str]:
+    names = dict.fromkeys(sheet.sections)
+    for item in sheet.items:
+        names.setdefault(str(item.get("seccion") or ""), None)
+    return list(names)
+
+
+def _totals_numpy(np, index, qty, price, discount, recurring, rates, growth, count):
+    lines = np.floor(
+        np.asarray(qty) * np.asarray(price) * 100 * (1 - np.asarray(discount) / 100) + 0.5
+    )
+    recurring = np.asarray(recurring, dtype=bool)
+    index = np.asarray(index, dtype=np.intp)
+    once = np.bincount(index, weights=np.where(recurring, 0.0, lines), minlength=count)
+    yearly = np.bincount(index, weights=np.where(recurring, lines, 0.0), minlength=count)
+    tax = np.floor((once + yearly) * np.asarray(rates) / 100 + 0.5)
+    # Una fila por sección y una columna por año
+    projection = np.floor(np.outer(yearly, np.asarray(growth)) + 0.5)
+    projection[:, 0] += once
+    return (
+        lines.astype(np.int64).tolist(),
+        once.astype(np.int64).tolist(),
+        yearly.astype(np.int64).tolist(),
+        tax.astype(np.int64).tolist(),
+        projection.astype(np.int64).tolist(),
+    )
+
+
+def _totals_python(index, qty, price, discount, recurring, rates, growth, count):
+    lines = [
+        math.floor(q * p * 100 * (1 - d / 100) + 0.5)
+        for q, p, d in zip(qty, price, discount)
+    ]
+    once = [0] * count
+    yearly = [0] * count
+    for i, amount, is_recurring in zip(index, lines, recurring):
+        if is_recurring:
+            yearly[i] += amount
+        else:
+            once[i] += amount
+    tax = [math.floor((o + y) * r / 100 + 0.5) for o, y, r in zip(once, yearly, rates)]
+    projection = [[math.floor(y * g + 0.5) for g in growth] for y in yearly]
+    for row, amount in zip(projection, once):
+        row[0] += amount
+    return lines, once, yearly, tax, projection
+
+
+def compute_totals(sheet: PriceSheet) -> PricingTotals:
+    """Calcula importes, subtotales, impuestos y proyección de todas las partidas.
+
+    Los importes se redondean a centavos (mitad hacia arriba) en cada partida
+    y los subtotales son sumas exactas de centavos.
+    """
+    names = _section_names(sheet)
+    position = {name: i for i, name in enumerate(names)}
+    sections = [sheet.sections.get(name) or Section(name) for name in names]
+    index, qty, price, discount, recurring = [], [], [], [], []
+    for item in sheet.items:
+        i = position[str(item.get("seccion") or "")]
+        index.append(i)
+        qty.append(_number(item.get("cantidad"), 1.0))
+        price.append(_number(item.get("precio"), 0.0))
+        discount.append(_number(item.get("descuento"), 0.0))
+        recurring.append(_flag(item.get("recurrente"), sections[i].recurring))
+    rates = [sheet.tax if s.tax is None else float(s.tax) for s in sections]
+    growth = [(1 + sheet.growth / 100) ** year for year in range(sheet.years)]
+    columns = (index, qty, price, discount, recurring, rates, growth, len(names))
+    np = _numpy()
+    if np is not None:
+        lines, once, yearly, tax, projection = _totals_numpy(np, *columns)
+    else:
+        lines, once, yearly, tax, projection = _totals_python(*columns)
+    return PricingTotals(
+        sections=names,
+        lines=lines,
+        one_time=dict(zip(names, once)),
+        recurring=dict(zip(names, yearly)),
+        tax=dict(zip(names, tax)),
+        projection=dict(zip(names, projection)),
+    )
+
+
+def format_amount(cents: int) -> str:
+    """``$1,048,000`` o ``$1,048,000.50``: los centavos solo si los hay."""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), 100)
+    return f"{sign}${units:,}" + (f".{rest:02d}" if rest else "")
+
+
+def _format_number(value: float) -> str:
+    return f"{value:,.0f}" if value == int(value) else f"{value:,.2f}"
+
+
+def _section_rows(
+    sheet: PriceSheet, totals: PricingTotals, section: Section, members: list[int]
+) -> tuple[list[str], list[list[Cell]], list[str]]:
+    items = [sheet.items[i] for i in members]
+    qty = [_number(item.get("cantidad"), 1.0) for item in items]
+    discount = [_number(item.get("descuento"), 0.0) for item in items]
+    show_qty = any(q != 1 for q in qty)
+    show_discount = any(discount)
+    header = ["Concepto"]
+    if section.description:
+        header.append("Descripción")
+    if show_qty:
+        header += ["Cantidad", "Precio unitario"]
+    if show_discount:
+        header.append("Descuento")
+    header.append(section.column)
+    aligns = ["left"] * (2 if section.description else 1)
+    aligns += ["right"] * (len(header) - len(aligns))
+    rows = []
+    for i, item, q, d in zip(members, items, qty, discount):
+        row: list[Cell] = [(str(item.get("concepto") or ""), True)]
+        if section.description:
+            row.append((str(item.get("descripcion") or ""), False))
+        if show_qty:
+            row.append((_format_number(q), False))
+            price = math.floor(_number(item.get("precio"), 0.0) * 100 + 0.5)
+            row.append((format_amount(price), False))
+        if show_discount:
+            row.append((f"{d:g}%" if d else "", False))
+        amount = totals.lines[i]
+        text = format_amount(amount) if amount else "Incluido"
+        if _flag(item.get("estimado"), False):
+            text += "*"
+        row.append((text, False))
+        rows.append(row)
+    return header, rows, aligns
+
+
+def _pipe_table(header: list[str], rows: list[list[Cell]], aligns: list[str]) -> str:
+    def cell(text: str, bold: bool) -> str:
+        text = _MARKDOWN_SPECIAL.sub(r"\\\1", " ".join(text.split()))
+        return f"**{text}**" if bold and text else text
+
+    # Guiones del ancho del encabezado: pandoc reparte así el ancho de las columnas
+    header = [cell(text, False) for text in header]
+    rule = [
+        "-" * (len(text) + 1) + (":" if align == "right" else "-")
+        for text, align in zip(header, aligns)
+    ]
+    lines = ["| " + " | ".join(header) + " |", "|" + "|".join(rule) + "|"]
+    lines.extend("| " + " | ".join(cell(*c) for c in row) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def _openxml_table(header: list[str], rows: list[list[Cell]], aligns: list[str]) -> str:
+    def row(cells: list[Cell], is_header: bool) -> str:
+        tcs = []
+        for (text, bold), align in zip(cells, aligns):
+            rpr = "<w:rPr><w:b/><w:bCs/></w:rPr>" if bold or is_header else ""
+            text = escape(_INVALID_XML.sub("", " ".join(text.split())), quote=False)
+            tcs.append(
+                '<w:tc><w:tcPr/><w:p><w:pPr><w:pStyle w:val="Compact"/>'
+                f'<w:jc w:val="{align}"/></w:pPr>'
+                f'<w:r>{rpr}<w:t xml:space="preserve">{text}</w:t></w:r></w:p></w:tc>'
+            )
+        tr = "<w:trPr><w:tblHeader/></w:trPr>" if is_header else ""
+        return f"<w:tr>{tr}{''.join(tcs)}</w:tr>"
+
+    width = 9360 // len(header)
+    grid = "".join(f'<w:gridCol w:w="{width}"/>' for _ in header)
+    # Una fila por línea: el bloque sigue siendo legible y no contiene ``` en ningún caso
+    return "\n".join([
+        "```{=openxml}",
+        '<w:tbl><w:tblPr><w:tblStyle w:val="Table"/><w:tblW w:w="5000" w:type="pct"/>'
+        '<w:tblLook w:firstRow="1" w:lastRow="0" w:firstColumn="0" w:lastColumn="0" '
+        f'w:noHBand="0" w:noVBand="0" w:val="0020"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>',
+        row([(text, True) for text in header], True),
+        *(row(cells, False) for cells in rows),
+        "</w:tbl>",
+        "```",
+    ])
+
+
+def _table(header, rows, aligns, raw: bool, raw_rows: int) -> str:
+    if raw and len(rows) > raw_rows:
+        return _openxml_table(header, rows, aligns)
+    return _pipe_table(header, rows, aligns)
+
+
+def _summary(sheet: PriceSheet, totals: PricingTotals, section: Section) -> str:
+    def line(label: str, cents: int, suffix: str = "") -> str:
+        return f"**{label}:** {format_amount(cents)} {sheet.currency}{suffix}".replace("$", r"\$")
+
+    name = section.name
+    lines = []
+    if section.subtotal:
+        lines.append(line(section.subtotal, totals.subtotal(name), section.suffix))
+    tax = totals.tax[name]
+    if tax:
+        rate = sheet.tax if section.tax is None else section.tax
+        lines.append(line(f"{sheet.tax_label} ({rate:g}%)", tax))
+        lines.append(line(f"TOTAL CON {sheet.tax_label}", totals.subtotal(name) + tax))
+    if section.first_year:
+        lines.append(line(section.first_year, totals.projection[name][0], section.suffix))
+    if section.renewal:
+        lines.append(line(section.renewal, totals.recurring[name], section.suffix))
+    return "  \n".join(lines)
+
+
+def _projection(
+    sheet: PriceSheet, totals: PricingTotals, names: list[str], raw: bool, raw_rows: int
+) -> str:
+    years = sheet.years
+    header = ["Concepto", *(f"Año {year}" for year in range(1, years + 1))]
+    if years > 1:
+        header.append(f"Total {years} años")
+    rows = []
+    sums = [0] * years
+    for name in names:
+        amounts = totals.projection[name]
+        sums = [a + b for a, b in zip(sums, amounts)]
+        title = sheet.sections[name].title if name in sheet.sections else ""
+        row = [(title or name, False)]
+        row += [(format_amount(a) if a else "-", False) for a in amounts]
+        if years > 1:
+            row.append((format_amount(sum(amounts)), False))
+        rows.append(row)
+    total = [("TOTAL", True), *((format_amount(a), True) for a in sums)]
+    if years > 1:
+        total.append((format_amount(sum(sums)), True))
+    rows.append(total)
+    aligns = ["left"] + ["right"] * (len(header) - 1)
+    return _table(header, rows, aligns, raw, raw_rows)
+
+
+def _names(spec: str, totals: PricingTotals) -> list[str]:
+    result = [name for name in spec.split("+") if name]
+    for name in result:
+        if name not in totals.projection:
+            raise ValueError(f"sección de precios desconocida: {name}")
+    return result
+
+
+def _percent(part: float, whole: float) -> str:
+    return f"{math.floor(part * 100 / whole + 0.5)}%"
+
+
+def _ratio(sheet: PriceSheet, totals: PricingTotals, match: re.Match) -> str:
+    kind, investment, saving, years = match.groups()
+    years = int(years or 1)
+    if kind == "payback":
+        years = 1
+    if not 1 <= years <= sheet.years:
+        raise ValueError(f"{match.group(0)}: la proyección cubre {sheet.years} años")
+
+    def amount(spec: str) -> int:
+        return sum(sum(totals.projection[name][:years]) for name in _names(spec, totals))
+
+    invested, saved = amount(investment), amount(saving)
+    if kind == "roi":
+        if invested <= 0:
+            raise ValueError(f"{match.group(0)}: sin inversión no hay retorno")
+        return _percent(saved - invested, invested)
+    if saved <= 0:
+        raise ValueError(f"{match.group(0)}: sin ahorro la inversión no se recupera")
+    months = invested * 12 / saved
+    # Un decimal para plazos cortos, meses enteros a partir de diez
+    return f"{months:.1f}".removesuffix(".0") if months < 10 else str(math.floor(months + 0.5))
+
+
+def _promotion_rows(
+    sheet: PriceSheet, totals: PricingTotals, promotion: Promotion
+) -> list[tuple[str, int, float, int, int]]:
+    """``(concepto, año, descuento, regular, final)`` de cada partida de ``promotion``."""
+    rows = []
+    for item in promotion.items:
+        year = int(item.get("anio", 1))
+        if not 1 <= year <= sheet.years:
+            raise ValueError(
+                f"promoción {promotion.name!r}: el año {year} está fuera de la proyección"
+            )
+        names = _names(str(item.get("secciones") or ""), totals)
+        regular = sum(totals.projection[name][year - 1] for name in names)
+        discount = _number(item.get("descuento"), 0.0)
+        final = math.floor(regular * (1 - discount / 100) + 0.5)
+        rows.append((str(item.get("concepto") or ""), year, discount, regular, final))
+    return rows
+
+
+def _promotion_years(rows: list[tuple[str, int, float, int, int]]) -> list[tuple[int, int]]:
+    """``(regular, final)`` por año, del primero al último con partidas."""
+    years = [[0, 0] for _ in range(max((row[1] for row in rows), default=0))]
+    for _, year, _, regular, final in rows:
+        years[year - 1][0] += regular
+        years[year - 1][1] += final
+    return [(regular, final) for regular, final in years]
+
+
+def _discount_cell(discount: float) -> Cell:
+    if discount >= 100:
+        return "Incluido", False
+    return (f"{discount:g}% OFF", True) if discount else ("", False)
+
+
+def _promotion_table(sheet: PriceSheet, totals: PricingTotals, promotion: Promotion) -> str:
+    rows = _promotion_rows(sheet, totals, promotion)
+    header = ["Concepto", "Precio Regular", promotion.column, "Precio Final"]
+    cells = [
+        [
+            (concept, True),
+            (format_amount(regular), False),
+            _discount_cell(discount),
+            (format_amount(final), True),
+        ]
+        for concept, _, discount, regular, final in rows
+    ]
+    parts = [_pipe_table(header, cells, ["left", "right", "right", "right"])]
+    if promotion.summary:
+        years = _promotion_years(rows)
+        lines = [f"**{promotion.summary} ({len(years)} años):**"]
+        for year, (regular, final) in enumerate(years, start=1):
+            lines.append(
+                f"- Año {year}: **{format_amount(final)}** (vs {format_amount(regular)} "
+                f"regular = ahorro de {format_amount(regular - final)})"
+            )
+        regular = sum(regular for regular, _ in years)
+        saved = regular - sum(final for _, final in years)
+        label = f"AHORRO TOTAL {len(years)} AÑOS" if len(years) > 1 else "AHORRO TOTAL"
+        percent = f" ({_percent(saved, regular)})" if regular else ""
+        lines.append(f"- **{label}: {format_amount(saved)} {sheet.currency}{percent}**")
+        parts.append("\n".join(lines).replace("$", r"\$"))
+    return "\n\n".join(parts)
+
+
+def _comparison(sheet: PriceSheet, totals: PricingTotals, promotions: list[Promotion]) -> str:
+    years = {
+        promotion.name: _promotion_years(_promotion_rows(sheet, totals, promotion))
+        for promotion in promotions
+    }
+    count = max((len(amounts) for amounts in years.values()), default=0)
+    header = ["Modalidad", *(f"Año {year}" for year in range(1, count + 1))]
+    if count > 1:
+        header.append(f"Total {count} años")
+    header.append("Ahorro vs Regular")
+
+    def row(label: str, amounts: list[int], bold: bool, saving: str) -> list[Cell]:
+        amounts = amounts + [0] * (count - len(amounts))
+        cells = [(label, bold), *((format_amount(a) if a else "-", False) for a in amounts)]
+        if count > 1:
+            cells.append((format_amount(sum(amounts)), bold))
+        return cells + [(saving, False)]
+
+    rows = []
+    for promotion in promotions:
+        amounts = years[promotion.name]
+        regular = sum(r for r, _ in amounts)
+        saved = regular - sum(f for _, f in amounts)
+        saving = format_amount(saved) + (f" ({_percent(saved, regular)})" if regular else "")
+        rows.append(row(promotion.title or promotion.name, [f for _, f in amounts], True, saving))
+    for promotion in promotions:
+        label = promotion.regular or f"Regular {promotion.title or promotion.name}"
+        rows.append(row(label, [r for r, _ in years[promotion.name]], False, "-"))
+    return _pipe_table(header, rows, ["left"] + ["right"] * (len(header) - 1))
+
+
+def _code_ranges(markdown: str) -> list[tuple[int, int]]:
+    """Rangos ``(inicio, fin)`` de los bloques de código y el código en línea.
+
+    Como en pandoc, un delimitador de apertura sin cierre no abre bloque.
+    """
+    lines = markdown.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    blocks = []
+    i = 0
+    while i < len(lines):
+        match = _FENCE.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        fence = match.group(1)
+        close = next(
+            (
+                j
+                for j in range(i + 1, len(lines))
+                if lines[j].strip().startswith(fence) and set(lines[j].strip()) == {fence[0]}
+            ),
+            None,
+        )
+        if close is None:
+            i += 1
+            continue
+        blocks.append((offsets[i], offsets[close + 1]))
+        i = close + 1
+    ranges = list(blocks)
+    start = 0
+    for begin, end in [*blocks, (len(markdown), len(markdown))]:
+        ranges.extend(m.span() for m in _CODE_SPAN.finditer(markdown, start, begin))
+        start = end
+    return sorted(ranges)
+
+
+def _sub_outside_code(
+    pattern: re.Pattern, repl: Callable[[re.Match], str], markdown: str
+) -> str:
+    """``pattern.sub(repl, markdown)`` sin tocar las coincidencias dentro de código."""
+    ranges = _code_ranges(markdown)
+    starts = [begin for begin, _ in ranges]
+
+    def guarded(match: re.Match) -> str:
+        i = bisect.bisect_right(starts, match.start()) - 1
+        if i >= 0 and match.start() < ranges[i][1]:
+            return match.group(0)
+        return repl(match)
+
+    return pattern.sub(guarded, markdown)
+
+
+def fill_fields(markdown: str, fields: dict[str, str]) -> str:
+    """Sustituye los ``{{campo}}`` de ``markdown`` que tienen valor en ``fields``."""
+    return _sub_outside_code(
+        FIELD,
+        lambda m: _MARKDOWN_SPECIAL.sub(r"\\\1", fields[m.group(1)])
+        if m.group(1) in fields
+        else m.group(0),
+        markdown,
+    )
+
+
+def expand_pricing(
+    markdown: str,
+    sheet: PriceSheet,
+    raw: bool = False,
+    raw_rows: int = RAW_TABLE_ROWS,
+    fields: bool = True,
+) -> str:
+    """Sustituye los marcadores de precios de ``markdown`` por tablas y totales.
+
+    Los totales se calculan una sola vez para todo el documento. Una sección
+    o promoción desconocida en un marcador lanza ``ValueError``. Con
+    ``fields=False`` los ``{{campo}}`` se dejan para que los rellene otro paso.
+    """
+    if "{{" not in markdown:
+        return markdown
+    if fields and sheet.fields:
+        markdown = fill_fields(markdown, sheet.fields)
+    totals = compute_totals(sheet)
+    members: dict[str, list[int]] = {name: [] for name in totals.sections}
+    for i, item in enumerate(sheet.items):
+        members[str(item.get("seccion") or "")].append(i)
+
+    def names(spec: str) -> list[str]:
+        return _names(spec, totals)
+
+    def promotions(spec: str) -> list[Promotion]:
+        result = [name for name in spec.split("+") if name]
+        for name in result:
+            if name not in sheet.promotions:
+                raise ValueError(f"promoción desconocida: {name}")
+        return [sheet.promotions[name] for name in result]
+
+    def block(match: re.Match) -> str:
+        kind, spec = match.groups()
+        if kind == "promocion":
+            if "+" in spec:
+                raise ValueError(f"{{{{promocion:{spec}}}}}: una tabla muestra una sola promoción")
+            return _promotion_table(sheet, totals, *promotions(spec))
+        if kind == "comparativa":
+            return _comparison(sheet, totals, promotions(spec))
+        if kind == "proyeccion":
+            return _projection(sheet, totals, names(spec), raw, raw_rows)
+        if "+" in spec:
+            raise ValueError(f"{{{{precios:{spec}}}}}: una tabla muestra una sola sección")
+        (name,) = names(spec)
+        section = sheet.sections.get(name) or Section(name)
+        header, rows, aligns = _section_rows(sheet, totals, section, members[name])
+        parts = [_table(header, rows, aligns, raw, raw_rows), _summary(sheet, totals, section)]
+        return "\n\n".join(part for part in parts if part)
+
+    markdown = _sub_outside_code(_BLOCK, block, markdown)
+    markdown = _sub_outside_code(_RATIO, lambda m: _ratio(sheet, totals, m), markdown)
+    return _sub_outside_code(
+        _INLINE,
+        lambda m: format_amount(totals.first_year(names(m.group(1)))).replace("$", r"\$"),
+        markdown,
+    )
@@ -0,0 +1,288 @@
+"""Generación masiva de cotizaciones y contratos desde un export JSONL.
+
+Cada línea del export es una cotización con la forma de ``data`` en
+``PDFGenerationOptions`` (``src/types/pdf.ts``): los campos del modelo
+``Quote`` más ``client``, ``event``, ``packages`` y ``business``. El export se
+lee de forma perezosa y cada cotización se convierte a Markdown con una
+plantilla y de ahí a DOCX en el pool de workers, con un número acotado de
+trabajos en curso, de modo que la memoria no crece con el tamaño del export.
+
+Las salidas se reparten en subdirectorios según un hash del nombre del
+archivo para no acumular cientos de miles de entradas en un solo directorio.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from .batch import BatchResult, iter_bounded, open_workers
+from .engine import convert_bytes, write_atomic
+from .metrics import annotate, emit, measure, phase
+from .optimize import OptimizeOptions, optimize_docx
+from .pool import PandocServerPool
+
+QUOTE_TEMPLATE = """\
+# Cotización {{quoteNumber}}
+
+**{{business.name}}**
+{{business.address}} · {{business.phone}} · {{business.email}}
+
+## Cliente
+
+- **Nombre:** {{client.name}}
+- **Email:** {{client.email}}
+- **Teléfono:** {{client.phone}}
+
+## Evento
+
+- **Evento:** {{event.title}}
+- **Fecha:** {{event.date}} {{event.time}}
+- **Lugar:** {{event.location}}
+
+## Paquetes
+
+{{paquetes}}
+
+| Concepto | Importe |
+|----------|--------:|
+| Subtotal | {{subtotal}} |
+| Descuento | {{discount}} |
+| **Total** | **{{total}}** |
+
+*Cotización válida hasta el {{validUntil}}.*
+
+{{notes}}
+"""
+
+CONTRACT_TEMPLATE = """\
+# Contrato de prestación de servicios {{quoteNumber}}
+
+Contrato que celebran por una parte **{{business.name}}** ("EL PRESTADOR") y
+por la otra **{{client.name}}** ("EL CLIENTE"), conforme a la cotización
+{{quoteNumber}}.
+
+## Primera. Objeto
+
+EL PRESTADOR proporcionará los servicios descritos a continuación para el
+evento **{{event.title}}**, a celebrarse el {{event.date}} {{event.time}} en
+{{event.location}}.
+
+{{paquetes}}
+
+## Segunda. Contraprestación
+
+EL CLIENTE pagará la cantidad total de **{{total}}** (subtotal {{subtotal}},
+descuento {{discount}}).
+
+## Tercera. Vigencia
+
+Las condiciones de este contrato se respetan hasta el {{validUntil}}.
+
+{{notes}}
+
+&nbsp;
+
+| EL PRESTADOR | EL CLIENTE |
+|:------------:|:----------:|
+| {{business.name}} | {{client.name}} |
+"""
+
+TEMPLATES = {"cotizacion": QUOTE_TEMPLATE, "contrato": CONTRACT_TEMPLATE}
+
+MONEY_FIELDS = {"subtotal", "discount", "total", "unitPrice", "totalPrice"}
+DATE_FIELDS = {"validUntil", "date", "createdAt", "sentAt"}
+EMPTY = "—"
+
+_TOKEN = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]<>|])")
+
+
+def _escape(text: str) -> str:
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+def format_money(value: Any) -> str:
+    try:
+        return f"${float(value):,.2f}"
+    except (TypeError, ValueError):
+        return EMPTY
+
+
+def format_date(value: Any) -> str:
+    if not value:
+        return EMPTY
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).strftime("%d/%m/%Y")
+    except ValueError:
+        return str(value)
+
+
+def _format(name: str, value: Any) -> str:
+    if value is None or value == "":
+        return EMPTY
+    if name in MONEY_FIELDS:
+        return format_money(value)
+    if name in DATE_FIELDS:
+        return format_date(value)
+    return _escape(str(value))
+
+
+def _lookup(record: dict[str, Any], path: str) -> Any:
+    value: Any = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def packages_table(packages: Iterable[dict[str, Any]] | None) -> str:
+    """Tabla Markdown con los conceptos de todos los paquetes de la cotización."""
+    rows = [
+        "| Paquete | Concepto | Cantidad | Precio unitario | Importe |",
+        "|---------|----------|---------:|----------------:|--------:|",
+    ]
+    for package in packages or ():
+        name = _format("name", package.get("name"))
+        for item in package.get("items") or ():
+            rows.append(
+                f"| {name} | {_format('name', item.get('name'))} "
+                f"| {item.get('quantity', EMPTY)} "
+                f"| {format_money(item.get('unitPrice'))} "
+                f"| {format_money(item.get('totalPrice'))} |"
+            )
+        rows.append(f"| {name} | **Subtotal** | | | **{format_money(package.get('subtotal'))}** |")
+    if len(rows) == 2:
+        return "*Sin paquetes registrados.*"
+    return "\n".join(rows)
+
+
+def quote_markdown(record: dict[str, Any], template: str = QUOTE_TEMPLATE) -> str:
+    """Rellena ``template`` con los datos de una cotización.
+
+    ``{{campo}}`` admite rutas con punto (``{{client.name}}``); ``{{paquetes}}``
+    se expande a la tabla de conceptos.
+    """
+
+    def replace(match: re.Match) -> str:
+        path = match.group(1)
+        if path == "paquetes":
+            return packages_table(record.get("packages"))
+        return _format(path.rsplit(".", 1)[-1], _lookup(record, path))
+
+    return _TOKEN.sub(replace, template)
+
+
+def document_name(record: dict[str, Any], index: int) -> str:
+    label = record.get("quoteNumber") or record.get("id") or f"{index:08d}"
+    return re.sub(r"[^\w.-]+", "-", str(label)).strip("-") or f"{index:08d}"
+
+
+def sharded_path(output_dir: Path, name: str, suffix: str, shard_width: int = 2) -> Path:
+    """``output_dir/<hash[:shard_width]>/<name>.<suffix>``; sin shards si el ancho es 0."""
+    if shard_width <= 0:
+        return output_dir / f"{name}.{suffix}"
+    shard = hashlib.sha1(name.encode("utf-8")).hexdigest()[:shard_width]
+    return output_dir / shard / f"{name}.{suffix}"
+
+
+def _render_quote(
+    record: dict[str, Any],
+    template: str,
+    output: Path,
+    to: str,
+    pool: PandocServerPool | None,
+    writer: str = "pandoc",
+    optimize: OptimizeOptions | None = None,
+) -> BatchResult:
+    start = time.perf_counter()
+    metrics = None
+    try:
+        with measure(str(output), to, publish=False) as metrics:
+            with phase("filter"):
+                markdown = quote_markdown(record, template).encode("utf-8")
+            result = convert_bytes(markdown, to, pool=pool, writer=writer)
+            if optimize is not None and to == "docx":
+                result = optimize_docx(result, optimize)
+            annotate(input_bytes=len(markdown), output_bytes=len(result))
+            write_atomic(output, result)
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        return BatchResult(output, output, False, elapsed, str(e), metrics=metrics)
+    return BatchResult(output, output, True, time.perf_counter() - start, metrics=metrics)
+
+
+@dataclass
+class QuoteRunStats:
+    """Resumen de una ejecución; solo se conservan los fallos, no cada resultado."""
+
+    ok: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    failures: list[BatchResult] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.ok + self.failed
+
+
+def generate_quotes(
+    records: Iterable[dict[str, Any]],
+    output_dir: Path | str,
+    template: str = QUOTE_TEMPLATE,
+    to: str = "docx",
+    workers: int | None = None,
+    engine: str = "subprocess",
+    max_in_flight: int | None = None,
+    shard_width: int = 2,
+    progress: Callable[[int, BatchResult], None] | None = None,
+    writer: str = "pandoc",
+    optimize: OptimizeOptions | None = None,
+) -> QuoteRunStats:
+    """Genera un documento por cotización leyendo ``records`` en streaming.
+
+    Como mucho hay ``max_in_flight`` documentos pendientes (por defecto cuatro
+    por worker) y no se acumulan resultados, así que la memoria es constante
+    aunque ``records`` sea un generador sobre un export de cientos de miles de
+    líneas. ``progress`` recibe ``(completados, resultado)``. Las plantillas
+    incluidas caben en el escritor nativo, así que ``writer="native"`` evita
+    pandoc por completo en DOCX. Con ``optimize`` cada DOCX pasa por
+    :func:`~docconv.optimize.optimize_docx` antes de escribirse.
+    """
+    output_dir = Path(output_dir)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 4 * workers
+    stats = QuoteRunStats()
+    start = time.perf_counter()
+    with open_workers(engine, workers) as (executor, pool):
+        jobs = (
+            (
+                record,
+                template,
+                sharded_path(output_dir, document_name(record, i), to, shard_width),
+                to,
+                pool,
+                writer,
+                optimize,
+            )
+            for i, record in enumerate(records, start=1)
+        )
+        for done, result in enumerate(iter_bounded(executor, _render_quote, jobs, max_in_flight), 1):
+            if result.metrics is not None:
+                emit(result.metrics)
+            if result.ok:
+                stats.ok += 1
+            else:
+                stats.failed += 1
+                stats.failures.append(result)
+            if progress:
+                progress(done, result)
+    stats.elapsed = time.perf_counter() - start
+    return stats
@@ -0,0 +1,308 @@
+"""Segundo nivel de la caché, compartido entre máquinas.
+
+Los runners de CI y las instancias de Cloud Run tienen cada uno su caché en
+disco, así que todos regeneran los mismos documentos. Con un almacén remoto
+la :class:`~docconv.cache.ConversionCache` busca en él lo que no tiene en
+disco y publica en él cada artefacto nuevo: un documento convertido en una
+máquina es una descarga en las demás.
+
+El protocolo es un almacén clave-valor con dos operaciones, :meth:`get` y
+:meth:`put`, cuya clave es el digest de :func:`~docconv.cache.cache_key`.
+Cada artefacto viaja con el SHA-256 de su contenido y se comprueba al leerlo:
+un objeto truncado o alterado cuenta como fallo y no llega a la caché local.
+
+Implementaciones incluidas, que :func:`open_remote` elige según la URL:
+
+- :class:`FilesystemStore` (una ruta o ``file://``): un directorio
+  compartido (NFS, un volumen montado, un bucket con gcsfuse). Cada objeto
+  se escribe en un temporal y se publica con ``os.replace``, así que los
+  lectores nunca ven un objeto a medias y varios escritores a la vez no se
+  pisan: la clave determina el contenido y gana el último.
+- :class:`HttpStore` (``http://`` o ``https://``): ``GET`` y ``PUT`` sobre
+  ``/v1/objects/<clave>`` con la cabecera ``X-Content-SHA256``.
+  :func:`serve_remote` es un servidor de referencia respaldado por un
+  :class:`FilesystemStore`, para pruebas o para una máquina de la red.
+
+Los errores del almacén remoto (``OSError`` o :class:`RemoteIntegrityError`)
+nunca interrumpen una conversión: la caché los cuenta, sigue con el nivel
+local y, si se repiten, deja de consultar el remoto durante un tiempo.
+:class:`HttpStore` separa el timeout de conexión, corto, del de lectura.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import re
+import tempfile
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Protocol
+from urllib.parse import unquote, urlsplit
+
+from .engine import output_mode
+
+# Token opcional para el servidor HTTP (cabecera ``Authorization: Bearer``)
+TOKEN_VARIABLE = "DOCCONV_REMOTE_CACHE_TOKEN"
+
+DIGEST_HEADER = "X-Content-SHA256"
+# Un servidor caído se detecta en CONNECT_TIMEOUT; uno lento tiene TIMEOUT
+# por lectura
+DEFAULT_CONNECT_TIMEOUT = 2.0
+DEFAULT_TIMEOUT = 10.0
+# Tope de un objeto en el servidor de referencia
+MAX_OBJECT_BYTES = 512 * 1024 * 1024
+
+_KEY = re.compile(r"[0-9a-f]{64}")
+_OBJECT_PATH = re.compile(r"/v1/objects/([0-9a-f]{64})")
+
+
+class RemoteIntegrityError(ValueError):
+    """El objeto remoto no coincide con su digest."""
+
+
+class RemoteStore(Protocol):
+    """Almacén de artefactos por clave: lo único que la caché necesita del remoto."""
+
+    def get(self, key: str) -> bytes | None:
+        """Artefacto de ``key`` o ``None`` si no está; verifica su integridad."""
+
+    def put(self, key: str, data: bytes) -> None:
+        """Publica ``data`` bajo ``key`` de forma atómica."""
+
+
+def _check_key(key: str) -> str:
+    if not _KEY.fullmatch(key):
+        raise ValueError(f"clave de caché no válida: {key!r}")
+    return key
+
+
+def _verify(data: bytes, digest: str | None) -> bytes:
+    if digest is None or hashlib.sha256(data).hexdigest() != digest.lower():
+        raise RemoteIntegrityError("el digest del objeto remoto no coincide con su contenido")
+    return data
+
+
+class FilesystemStore:
+    """Objetos en ``root/<2 primeros>/<clave>``, con el digest en la primera línea."""
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    def __repr__(self) -> str:
+        return f"FilesystemStore({str(self.root)!r})"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / _check_key(key)
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        digest, _, data = blob.partition(b"\n")
+        try:
+            return _verify(data, digest.decode("ascii", "replace"))
+        except RemoteIntegrityError:
+            # Se retira para que el siguiente escritor publique una copia buena
+            path.unlink(missing_ok=True)
+            raise
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                # Legible por los demás usuarios del directorio compartido, no 0600
+                os.fchmod(fh.fileno(), output_mode(path))
+                fh.write(hashlib.sha256(data).hexdigest().encode("ascii") + b"\n")
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class HttpStore:
+    """Cliente del protocolo HTTP de :func:`serve_remote`."""
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        token: str | None = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    ):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL de caché remota no válida: {url!r}")
+        self.url = url.rstrip("/")
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.token = token if token is not None else os.environ.get(TOKEN_VARIABLE)
+
+    def __repr__(self) -> str:
+        return f"HttpStore({self.url!r})"
+
+    def _request(
+        self, method: str, key: str, body: bytes | None = None, headers: dict[str, str] | None = None
+    ) -> tuple[int, dict[str, str], bytes]:
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        connection = connection_class(self.host, self.port, timeout=self.connect_timeout)
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            connection.connect()
+            connection.sock.settimeout(self.timeout)
+            connection.request(method, f"{self.prefix}/v1/objects/{_check_key(key)}", body, headers)
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        except http.client.HTTPException as e:
+            # Respuesta incompleta o mal formada: para la caché es como una caída
+            raise ConnectionError(f"caché remota {self.url}: {e!r}") from e
+        finally:
+            connection.close()
+
+    def get(self, key: str) -> bytes | None:
+        status, headers, body = self._request("GET", key)
+        if status == HTTPStatus.NOT_FOUND:
+            return None
+        if status != HTTPStatus.OK:
+            raise ConnectionError(f"la caché remota respondió {status} a GET")
+        digest = next((v for k, v in headers.items() if k.lower() == DIGEST_HEADER.lower()), None)
+        return _verify(body, digest)
+
+    def put(self, key: str, data: bytes) -> None:
+        headers = {
+            DIGEST_HEADER: hashlib.sha256(data).hexdigest(),
+            "Content-Type": "application/octet-stream",
+        }
+        status, _, _ = self._request("PUT", key, data, headers)
+        if status not in (HTTPStatus.OK, HTTPStatus.CREATED):
+            raise ConnectionError(f"la caché remota respondió {status} a PUT")
+
+
+def open_remote(url: str) -> RemoteStore:
+    """Almacén remoto de ``url``: ``http(s)://...``, ``file:///ruta`` o una ruta."""
+    scheme = urlsplit(url).scheme
+    if scheme in ("http", "https"):
+        return HttpStore(url)
+    if scheme == "file":
+        return FilesystemStore(unquote(urlsplit(url).path))
+    return FilesystemStore(url)
+
+
+class RemoteHandler(BaseHTTPRequestHandler):
+    """``GET``/``HEAD``/``PUT`` de ``/v1/objects/<clave>`` sobre un :class:`FilesystemStore`."""
+
+    server_version = "docconv-cache"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _key(self) -> str | None:
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            self.close_connection = True
+            self._reply(HTTPStatus.UNAUTHORIZED)
+            return None
+        match = _OBJECT_PATH.fullmatch(urlsplit(self.path).path)
+        if match is None:
+            self.close_connection = True
+            self._reply(HTTPStatus.NOT_FOUND)
+            return None
+        return match.group(1)
+
+    def do_GET(self) -> None:
+        key = self._key()
+        if key is None:
+            return
+        try:
+            data = self.server.store.get(key)
+        except RemoteIntegrityError:
+            data = None
+        if data is None:
+            self._reply(HTTPStatus.NOT_FOUND)
+            return
+        headers = {
+            "Content-Type": "application/octet-stream",
+            DIGEST_HEADER: hashlib.sha256(data).hexdigest(),
+        }
+        self._reply(HTTPStatus.OK, data, headers)
+
+    do_HEAD = do_GET
+
+    def do_PUT(self) -> None:
+        key = self._key()
+        if key is None:
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self._reply(HTTPStatus.LENGTH_REQUIRED)
+            return
+        if length > MAX_OBJECT_BYTES:
+            self.close_connection = True
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        data = self.rfile.read(length)
+        try:
+            _verify(data, self.headers.get(DIGEST_HEADER))
+        except RemoteIntegrityError:
+            self._reply(HTTPStatus.BAD_REQUEST)
+            return
+        self.server.store.put(key, data)
+        self._reply(HTTPStatus.CREATED)
+
+
+class RemoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        store: FilesystemStore,
+        token: str | None = None,
+        quiet: bool = False,
+    ):
+        super().__init__(address, RemoteHandler)
+        self.store = store
+        self.token = token
+        self.quiet = quiet
+
+
+def serve_remote(
+    root: Path | str,
+    host: str = "127.0.0.1",
+    port: int = 8788,
+    token: str | None = None,
+    quiet: bool = False,
+) -> None:
+    """Sirve el directorio ``root`` como caché remota hasta que se interrumpe."""
+    with RemoteServer((host, port), FilesystemStore(root), token, quiet) as server:
+        server.serve_forever()
@@ -0,0 +1,130 @@
+"""Parsear una vez y renderizar a varios formatos desde el AST de pandoc.
+
+El Markdown se convierte una sola vez al AST JSON de pandoc (cacheado en
+memoria y, opcionalmente, en la :class:`~docconv.cache.ConversionCache`), y
+cada formato de salida se genera en paralelo a partir de ese AST, de modo
+que el coste total se acerca al del escritor más lento.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Iterable
+
+from .cache import ConversionCache
+from .engine import Source, convert_cached, read_source
+from .metrics import measure
+from .pool import PandocServerPool
+
+DEFAULT_FORMATS = ("docx", "html", "odt", "pdf")
+
+# Motores de PDF en orden de preferencia; se usa el primero instalado
+PDF_ENGINES = ("typst", "tectonic", "xelatex", "lualatex", "pdflatex", "wkhtmltopdf", "weasyprint")
+
+# Opciones por formato al renderizar desde el AST
+FORMAT_ARGS = {
+    "html": ["--standalone"],
+}
+
+_AST_MEMO_SIZE = 32
+_ast_memo: OrderedDict[str, bytes] = OrderedDict()
+_ast_memo_lock = Lock()
+
+
+def pdf_engine() -> str | None:
+    """Primer motor de PDF disponible en el ``PATH`` o ``None``."""
+    for engine in PDF_ENGINES:
+        if shutil.which(engine):
+            return engine
+    return None
+
+
+def parse_markdown(
+    source: Source,
+    fmt: str = "md",
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+) -> bytes:
+    """Devuelve el AST JSON de pandoc para ``source``.
+
+    Los AST recientes se conservan en memoria por digest del contenido, así
+    que renderizar el mismo documento varias veces en un proceso no vuelve a
+    ejecutar el lector de Markdown.
+    """
+    data = read_source(source)
+    digest = hashlib.sha256(fmt.encode("utf-8") + b"\0" + data).hexdigest()
+    with _ast_memo_lock:
+        if digest in _ast_memo:
+            _ast_memo.move_to_end(digest)
+            return _ast_memo[digest]
+    with measure("<ast>", "json"):
+        ast, _ = convert_cached(data, "json", fmt, [], cache, pool)
+    with _ast_memo_lock:
+        _ast_memo[digest] = ast
+        while len(_ast_memo) > _AST_MEMO_SIZE:
+            _ast_memo.popitem(last=False)
+    return ast
+
+
+def render_ast(
+    ast: bytes,
+    to: str,
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+) -> bytes:
+    """Renderiza un AST JSON de pandoc al formato ``to``."""
+    args = [*FORMAT_ARGS.get(to, []), *extra_args]
+    if to == "pdf":
+        engine = pdf_engine()
+        if engine is None:
+            raise RuntimeError("no hay un motor de PDF instalado")
+        args.append(f"--pdf-engine={engine}")
+    with measure("<ast>", to):
+        result, _ = convert_cached(ast, to, "json", args, cache, pool)
+    return result
+
+
+@dataclass
+class RenderResult:
+    """Salidas de :func:`render_formats` por formato y formatos omitidos."""
+
+    outputs: dict[str, bytes] = field(default_factory=dict)
+    skipped: dict[str, str] = field(default_factory=dict)
+
+
+def render_formats(
+    source: Source,
+    formats: Iterable[str] = DEFAULT_FORMATS,
+    fmt: str = "md",
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    extra_args: Iterable[str] = (),
+) -> RenderResult:
+    """Parsea ``source`` una vez y genera todos los ``formats`` en paralelo.
+
+    ``extra_args`` (p. ej. filtros Lua) se aplican al renderizar cada formato.
+    ``pdf`` se omite (y se anota en ``skipped``) si no hay motor de PDF local.
+    """
+    formats = list(dict.fromkeys(formats))
+    result = RenderResult()
+    if "pdf" in formats and pdf_engine() is None:
+        formats.remove("pdf")
+        result.skipped["pdf"] = "no hay un motor de PDF instalado"
+    if not formats:
+        return result
+
+    ast = parse_markdown(source, fmt, cache=cache, pool=pool)
+    with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+        futures = {
+            to: executor.submit(render_ast, ast, to, extra_args, cache=cache, pool=pool)
+            for to in formats
+        }
+        for to, future in futures.items():
+            result.outputs[to] = future.result()
+    return result
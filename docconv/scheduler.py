@@ -0,0 +1,220 @@
+"""Planificador de trabajos por prioridad con reparto justo entre tenants.
+
+Hay dos clases de trabajo: ``interactive`` (un vendedor esperando una
+propuesta) y ``bulk`` (lotes de fin de mes). Un worker libre siempre toma
+primero un trabajo interactivo; los de lote solo ocupan hasta su límite de
+concurrencia, que por defecto deja un worker reservado para los
+interactivos. Así, aunque un lote de decenas de miles de documentos esté en
+cola, un documento interactivo espera como mucho a que quede libre ese
+worker y no detrás de todo el lote. Los trabajos en curso no se interrumpen.
+
+Dentro de cada clase, los trabajos se agrupan por tenant y se atienden por
+turnos (round robin), de modo que un tenant con un lote enorme no acapara la
+clase. Para cada clase se mide por separado el tiempo en cola y el de
+ejecución.
+"""
+
+from __future__ import annotations
+
+import math
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+PRIORITIES = ("interactive", "bulk")
+
+DEFAULT_TENANT = "default"
+
+# Muestras de tiempos por clase que se conservan para los percentiles
+STATS_WINDOW = 1000
+
+T = TypeVar("T")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentil ``q`` por rango más cercano."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class ClassPolicy:
+    """Límites de una clase: trabajos simultáneos y trabajos en espera."""
+
+    concurrency: int
+    queue_size: int
+
+
+@dataclass
+class ClassStats:
+    """Contadores y tiempos recientes (en segundos) de una clase."""
+
+    queued: int = 0
+    running: int = 0
+    submitted: int = 0
+    rejected: int = 0
+    completed: int = 0
+    waits: deque[float] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    runs: deque[float] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    run_total: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        def summary(values: deque[float]) -> dict[str, float | None]:
+            if not values:
+                return {"p50_ms": None, "p95_ms": None}
+            values = list(values)
+            return {
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+            }
+
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "queue_wait": summary(self.waits),
+            "run": summary(self.runs),
+        }
+
+
+def default_policies(
+    workers: int, queue_size: int = 32, bulk_queue_size: int = 10_000
+) -> dict[str, ClassPolicy]:
+    """Interactivos con todos los workers; lotes con todos menos uno."""
+    return {
+        "interactive": ClassPolicy(workers, queue_size),
+        "bulk": ClassPolicy(max(1, workers - 1), bulk_queue_size),
+    }
+
+
+@dataclass
+class Ticket(Generic[T]):
+    """Trabajo entregado a un worker; se devuelve con :meth:`PriorityScheduler.done`."""
+
+    item: T
+    priority: str
+    tenant: str
+    queued_at: float
+    started_at: float = 0.0
+
+
+class PriorityScheduler(Generic[T]):
+    """Cola por clases y tenants, segura entre hilos.
+
+    Los productores llaman a :meth:`put` (que lanza :class:`queue.Full` si la
+    clase no admite más trabajos en espera); los workers llaman a :meth:`get`
+    y, al terminar, a :meth:`done` con el ticket recibido.
+    """
+
+    def __init__(self, policies: dict[str, ClassPolicy]):
+        unknown = set(policies) - set(PRIORITIES)
+        if unknown:
+            raise ValueError(f"clase desconocida: {', '.join(sorted(unknown))}")
+        self.policies = policies
+        self.stats = {name: ClassStats() for name in PRIORITIES if name in policies}
+        # clase -> tenant -> trabajos en espera, en orden de turno
+        self._queues: dict[str, OrderedDict[str, deque[Ticket[T]]]] = {
+            name: OrderedDict() for name in self.stats
+        }
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(
+        self, item: T, priority: str = "interactive", tenant: str = DEFAULT_TENANT
+    ) -> Ticket[T]:
+        if priority not in self._queues:
+            options = ", ".join(self._queues)
+            raise ValueError(f"prioridad desconocida: {priority!r} (opciones: {options})")
+        with self._condition:
+            stats = self.stats[priority]
+            if self._closed or stats.queued >= self.policies[priority].queue_size:
+                stats.rejected += 1
+                raise queue.Full(priority)
+            ticket = Ticket(item, priority, tenant, time.perf_counter())
+            tenants = self._queues[priority]
+            tenants.setdefault(tenant, deque()).append(ticket)
+            stats.queued += 1
+            stats.submitted += 1
+            self._condition.notify()
+        return ticket
+
+    def _next(self) -> Ticket[T] | None:
+        for priority, tenants in self._queues.items():
+            if not tenants or self.stats[priority].running >= self.policies[priority].concurrency:
+                continue
+            tenant, pending = next(iter(tenants.items()))
+            ticket = pending.popleft()
+            # El tenant pasa al final del turno, o sale si ya no tiene trabajos
+            if pending:
+                tenants.move_to_end(tenant)
+            else:
+                del tenants[tenant]
+            stats = self.stats[priority]
+            stats.queued -= 1
+            stats.running += 1
+            ticket.started_at = time.perf_counter()
+            stats.waits.append(ticket.started_at - ticket.queued_at)
+            return ticket
+        return None
+
+    def get(self, timeout: float | None = None) -> Ticket[T] | None:
+        """Siguiente trabajo por prioridad; ``None`` al cerrar sin trabajos pendientes.
+
+        También devuelve ``None`` si vence ``timeout`` sin que haya trabajo.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                ticket = self._next()
+                if ticket is not None:
+                    return ticket
+                if self._closed and not any(self._queues.values()):
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def done(self, ticket: Ticket[T], ran: bool = True) -> None:
+        """Libera el hueco de ``ticket``; ``ran=False`` si se descartó sin ejecutarse."""
+        with self._condition:
+            stats = self.stats[ticket.priority]
+            stats.running -= 1
+            if ran:
+                stats.completed += 1
+                elapsed = time.perf_counter() - ticket.started_at
+                stats.runs.append(elapsed)
+                stats.run_total += elapsed
+            # Un hueco de una clase puede desbloquear a cualquier worker
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """No admite más trabajos; los workers terminan al vaciarse la cola."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def queued(self, priority: str) -> int:
+        with self._condition:
+            return self.stats[priority].queued
+
+    def mean_run(self, priority: str) -> float | None:
+        with self._condition:
+            stats = self.stats[priority]
+            return stats.run_total / stats.completed if stats.completed else None
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._condition:
+            result = {}
+            for name, stats in self.stats.items():
+                data = stats.to_dict()
+                data["concurrency"] = self.policies[name].concurrency
+                data["capacity"] = self.policies[name].queue_size
+                data["tenants"] = len(self._queues[name])
+                result[name] = data
+            return result
@@ -0,0 +1,242 @@
+"""Conversión por secciones de documentos grandes.
+
+El Markdown se corta en sus títulos principales (ver :func:`split_sections`),
+cada sección se convierte por separado en paralelo y los DOCX resultantes se
+unen con :func:`~docconv.merge.merge_docx`. Como cada sección pasa por la caché
+direccionada por contenido, al editar un documento solo se reconvierten las
+secciones que cambiaron.
+
+Las definiciones de enlaces por referencia y de notas al pie se copian a las
+secciones que las usan, de modo que cada fragmento sea Markdown completo. Los
+identificadores de los títulos se calculan por sección; al unir, los
+marcadores repetidos entre secciones reciben sufijos ``-1``, ``-2`` como en
+la conversión completa y, si la cadena incluye el filtro ``anchors``, los
+enlaces a títulos de otra sección (un índice) se resuelven sobre el
+documento unido (ver :func:`~docconv.merge.merge_docx`).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from .cache import ConversionCache
+from .engine import FileResult, Source, convert_cached, publish, read_source
+from .filters import chain_filters
+from .merge import merge_docx
+from .optimize import OptimizeOptions, optimize_docx
+from .metrics import annotate, measure, phase
+from .pool import PandocServerPool
+
+_HEADING = re.compile(r" {0,3}(#{1,6})(?:[ \t]|$)")
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+_DEFINITION = re.compile(r" {0,3}\[(\^?)([^\]]+)\]:(?:[ \t]|$)")
+
+
+def _fenced(lines: list[str]) -> list[bool]:
+    """Marca las líneas que pertenecen a bloques de código delimitados.
+
+    Como en pandoc, un delimitador de apertura sin cierre no abre bloque y el
+    cierre no admite lenguaje ni otro texto.
+    """
+    inside = [False] * len(lines)
+    i = 0
+    while i < len(lines):
+        match = _FENCE.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        fence = match.group(1)
+        for j in range(i + 1, len(lines)):
+            close = lines[j].strip()
+            if close.startswith(fence) and close == close[0] * len(close) and close[0] == fence[0]:
+                inside[i:j + 1] = [True] * (j + 1 - i)
+                i = j
+                break
+        i += 1
+    return inside
+
+
+def _definitions(lines: list[str]) -> tuple[list[str], dict[str, str]]:
+    """Separa las definiciones de enlaces y notas del resto de ``lines``.
+
+    Devuelve las líneas restantes y ``etiqueta -> definición`` (la etiqueta
+    lleva ``^`` delante en las notas al pie).
+    """
+    body: list[str] = []
+    definitions: dict[str, str] = {}
+    fenced = _fenced(lines)
+    i = 0
+    while i < len(lines):
+        match = None if fenced[i] else _DEFINITION.match(lines[i])
+        if not match:
+            body.append(lines[i])
+            i += 1
+            continue
+        end = i + 1
+        if match.group(1):
+            # Las notas siguen en líneas sangradas (con líneas vacías entre
+            # medias) y, sin sangría, hasta la siguiente línea vacía o nota
+            while end < len(lines):
+                line = lines[end]
+                if line.startswith(("    ", "\t")):
+                    end += 1
+                elif not line.strip():
+                    if end + 1 < len(lines) and lines[end + 1].startswith(("    ", "\t")):
+                        end += 1
+                    else:
+                        break
+                elif lines[end - 1].strip() and not line.lstrip().startswith("[^"):
+                    end += 1
+                else:
+                    break
+        label = match.group(1) + match.group(2).lower()
+        definitions.setdefault(label, "".join(lines[i:end]).rstrip("\n"))
+        i = end
+    return body, definitions
+
+
+def _heading_levels(lines: list[str]) -> list[int | None]:
+    """Nivel de título ATX de cada línea (``None`` si no lo es o está en código)."""
+    levels: list[int | None] = []
+    for line, code in zip(lines, _fenced(lines)):
+        heading = None if code else _HEADING.match(line)
+        levels.append(len(heading.group(1)) if heading else None)
+    return levels
+
+
+def _split_level(levels: list[int | None]) -> int | None:
+    """Nivel de corte automático: H2 si hay un único H1 de título, si no el menor."""
+    present = [level for level in levels if level is not None]
+    if not present:
+        return None
+    if present.count(1) == 1 and 2 in present:
+        return 2
+    return min(present)
+
+
+def split_sections(text: str, level: int | None = None) -> list[str]:
+    """Divide ``text`` en secciones que empiezan en títulos de nivel ``<= level``.
+
+    Sin ``level`` se usa :func:`_split_level`. El texto anterior al primer
+    corte (título del documento, introducción) forma su propia sección. Nunca
+    se corta dentro de un bloque de código.
+    """
+    lines, definitions = _definitions(text.splitlines(keepends=True))
+    levels = _heading_levels(lines)
+    level = level or _split_level(levels)
+    starts = [0] + [
+        i for i, lvl in enumerate(levels) if i and lvl is not None and lvl <= (level or 0)
+    ]
+    sections = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        chunk = "".join(lines[start:end])
+        if not chunk.strip():
+            continue
+        used = [
+            definition
+            for label, definition in definitions.items()
+            if f"[{label}]" in chunk.lower()
+        ]
+        if used:
+            chunk = chunk.rstrip("\n") + "\n\n" + "\n\n".join(used) + "\n"
+        sections.append(chunk)
+    return sections or [text]
+
+
+def _convert_sections(
+    data: bytes,
+    to: str,
+    fmt: str,
+    extra_args: list[str],
+    cache: ConversionCache | None,
+    pool: PandocServerPool | None,
+    writer: str,
+    level: int | None,
+    workers: int | None,
+    optimize: OptimizeOptions | None = None,
+) -> tuple[bytes, bool]:
+    sections = split_sections(data.decode("utf-8"), level) if to == "docx" else []
+    if len(sections) <= 1:
+        return convert_cached(data, to, fmt, extra_args, cache, pool, writer, optimize)
+
+    workers = min(workers or os.cpu_count() or 1, len(sections))
+
+    def convert(section: str) -> tuple[bytes, bool]:
+        return convert_cached(section.encode("utf-8"), to, fmt, extra_args, cache, pool, writer)
+
+    with ThreadPoolExecutor(workers) as executor:
+        # Cada hilo suma sus fases al registro de métricas de la conversión
+        futures = [
+            executor.submit(contextvars.copy_context().run, convert, section)
+            for section in sections
+        ]
+        parts = [future.result() for future in futures]
+    with phase("merge"):
+        resolve_anchors = "anchors" in chain_filters(extra_args)
+        result = merge_docx((data for data, _ in parts), resolve_anchors)
+    if optimize is not None:
+        # Después de unir: las imágenes repetidas entre secciones se guardan una vez
+        result = optimize_docx(result, optimize, cache)
+    hits = sum(cached for _, cached in parts)
+    if cache is not None:
+        annotate(cache="hit" if hits == len(parts) else "partial" if hits else "miss")
+    annotate(input_bytes=len(data), output_bytes=len(result))
+    return result, hits == len(parts)
+
+
+def convert_sections(
+    source: Source,
+    to: str = "docx",
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+    level: int | None = None,
+    workers: int | None = None,
+    optimize: OptimizeOptions | None = None,
+) -> bytes:
+    """Como :func:`~docconv.engine.convert_markdown`, pero sección a sección.
+
+    ``workers`` hilos convierten las secciones a la vez (por defecto uno por
+    núcleo); con ``pool`` conviene que tenga al menos ese número de
+    servidores. Para formatos distintos de DOCX el documento se convierte
+    entero.
+    """
+    with measure("<memoria>", to):
+        data = read_source(source)
+        result, _ = _convert_sections(
+            data, to, fmt, list(extra_args), cache, pool, writer, level, workers, optimize
+        )
+    return result
+
+
+def convert_sections_to_file(
+    source: Source,
+    output: Path | str,
+    to: str = "docx",
+    fmt: str = "md",
+    extra_args: Iterable[str] = (),
+    cache: ConversionCache | None = None,
+    pool: PandocServerPool | None = None,
+    writer: str = "pandoc",
+    level: int | None = None,
+    workers: int | None = None,
+    optimize: OptimizeOptions | None = None,
+) -> FileResult:
+    """Como :func:`~docconv.engine.convert_to_file`, pero sección a sección.
+
+    ``cached`` indica que todas las secciones vinieron de la caché.
+    """
+    output = Path(output)
+    with measure(str(output), to):
+        data = read_source(source)
+        result, cached = _convert_sections(
+            data, to, fmt, list(extra_args), cache, pool, writer, level, workers, optimize
+        )
+        return publish(output, result, cached, optimize)
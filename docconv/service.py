@@ -0,0 +1,454 @@
+"""Servicio HTTP local de renderizado de documentos.
+
+Pensado para que las rutas de Next.js (``src/app/api/pdf/`` y
+``src/app/api/quotes/[id]/pdf``) deleguen los renderizados pesados en lugar de
+hacerlos en el proceso de Node. Escucha por defecto solo en ``127.0.0.1`` y no
+necesita red: pandoc corre en la misma máquina.
+
+Endpoints:
+
+``POST /render``
+    Con ``Content-Type: text/markdown`` el cuerpo es el Markdown y el formato
+    va en ``?to=docx``. Con ``application/json`` acepta
+    ``{"markdown": "...", "to": "html"}`` o una plantilla con variables,
+    ``{"template": "cotizacion", "variables": {...}}``, donde ``template`` es
+    un nombre de :data:`~docconv.quotes.TEMPLATES` o Markdown con
+    ``{{campo}}``. La prioridad (``interactive`` o ``bulk``) y el tenant se
+    indican con ``?priority=``/``?tenant=``, las cabeceras ``X-Priority`` y
+    ``X-Tenant`` o los campos JSON del mismo nombre. Devuelve los bytes del
+    documento; las cabeceras ``X-Queue-Seconds``, ``X-Render-Seconds`` y
+    ``X-Cache`` informan del tiempo en cola, el de conversión y si vino de la
+    caché. Los DOCX se generan en modo reproducible (ver
+    :mod:`docconv.optimize`), así que el ``ETag``, el SHA-256 del cuerpo, es
+    el mismo mientras no cambie el contenido; con ``If-None-Match`` igual la
+    respuesta es ``304`` sin cuerpo.
+
+``GET /health``
+    Estado del servicio; 503 mientras se detiene.
+
+``GET /metrics``
+    Contadores y, por clase de prioridad, ocupación de la cola y percentiles
+    recientes del tiempo en cola y de ejecución, en JSON.
+
+Las peticiones entran en colas acotadas por prioridad que atiende un número
+fijo de workers (ver :mod:`docconv.scheduler`). Con la cola de su clase
+llena la respuesta es ``429`` con ``Retry-After`` estimado a partir del
+tiempo medio de servicio, y si un documento no termina en ``timeout``
+segundos la respuesta es ``504``. Ese mismo tiempo, y ``memory_mb`` para el
+heap de pandoc, limitan cada conversión (ver :mod:`docconv.limits`): pandoc
+se mata al vencer y el worker queda libre para el siguiente trabajo.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import ConversionCache, content_digest
+from .engine import WRITERS, convert_cached, pandoc_path, pandoc_version
+from .limits import ConversionTimeout, MemoryLimitExceeded, limits
+from .metrics import measure
+from .optimize import OptimizeOptions
+from .pool import PandocServerPool, PandocServerUnavailable
+from .quotes import TEMPLATES, quote_markdown
+from .scheduler import DEFAULT_TENANT, PRIORITIES, PriorityScheduler, default_policies
+
+# Formatos servidos y su tipo MIME
+CONTENT_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "odt": "application/vnd.oasis.opendocument.text",
+    "html": "text/html; charset=utf-8",
+    "rtf": "application/rtf",
+    "md": "text/markdown; charset=utf-8",
+}
+
+# Opciones de pandoc por formato: el HTML se entrega como página completa
+FORMAT_ARGS = {"html": ["--standalone"]}
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class ServiceBusy(Exception):
+    """La cola está llena; ``retry_after`` estima en segundos cuándo reintentar."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"cola llena, reintentar en {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BadRequest(ValueError):
+    """Petición mal formada; se responde con ``status``."""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class RenderJob:
+    """Un documento pendiente de renderizar."""
+
+    markdown: bytes
+    to: str
+    priority: str = "interactive"
+    tenant: str = DEFAULT_TENANT
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.perf_counter)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    cached: bool = False
+    digest: str = ""
+
+
+class RenderService:
+    """Trabajos por prioridad atendidos por ``workers`` hilos.
+
+    Los trabajos ``interactive`` pasan siempre por delante de los ``bulk``,
+    que usan como mucho ``bulk_workers`` hilos (por defecto todos menos uno)
+    y tienen su propia cola de ``bulk_queue_size``; dentro de cada clase los
+    tenants se atienden por turnos (ver :mod:`docconv.scheduler`). Con
+    ``engine="server"`` los workers comparten un pool de ``workers``
+    servidores pandoc calientes; si no arrancan se usa un subproceso por
+    documento. Cada conversión se corta a los ``timeout`` segundos o al
+    superar ``memory_mb`` MiB de heap de pandoc. Con ``reproducible`` los DOCX
+    salen byte a byte idénticos para el mismo Markdown.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 32,
+        timeout: float = 60.0,
+        engine: str = "server",
+        writer: str = "pandoc",
+        cache: ConversionCache | None = None,
+        bulk_workers: int | None = None,
+        bulk_queue_size: int = 10_000,
+        memory_mb: int | None = None,
+        reproducible: bool = True,
+    ):
+        if writer not in WRITERS:
+            raise ValueError(f"escritor desconocido: {writer!r} (opciones: {', '.join(WRITERS)})")
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.engine = engine
+        self.writer = writer
+        self.cache = cache
+        # Solo la normalización: el resto de pasos de optimize se eligen aparte
+        self.optimize = (
+            OptimizeOptions(
+                dedupe_media=False, downscale=False, prune_styles=False, reproducible=True
+            )
+            if reproducible
+            else None
+        )
+        self.pool: PandocServerPool | None = None
+        policies = default_policies(self.workers, max(1, queue_size), max(1, bulk_queue_size))
+        if bulk_workers:
+            policies["bulk"].concurrency = max(1, min(bulk_workers, self.workers))
+        self.scheduler: PriorityScheduler[RenderJob] = PriorityScheduler(policies)
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._busy = 0
+        self.counters = {
+            "accepted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "limit_exceeded": 0,
+            "cache_hits": 0,
+        }
+        self.started = time.time()
+        self.stopping = False
+
+    def start(self) -> "RenderService":
+        if self.engine == "server":
+            try:
+                self.pool = PandocServerPool(
+                    self.workers,
+                    pandoc_path(),
+                    timeout=math.ceil(self.timeout),
+                    memory_mb=self.memory_mb,
+                ).start()
+            except PandocServerUnavailable:
+                self.pool = None
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"docconv-render-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self) -> None:
+        """Deja de aceptar trabajos y espera a que terminen los pendientes."""
+        self.stopping = True
+        self.scheduler.close()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def __enter__(self) -> "RenderService":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def retry_after(self, priority: str = "interactive") -> int:
+        """Segundos estimados hasta que se vacíe la cola actual de ``priority``."""
+        average = self.scheduler.mean_run(priority) or 1.0
+        concurrency = self.scheduler.policies[priority].concurrency
+        return max(1, math.ceil(average * (self.scheduler.queued(priority) + 1) / concurrency))
+
+    def submit(
+        self, markdown: bytes, to: str, priority: str = "interactive", tenant: str = DEFAULT_TENANT
+    ) -> RenderJob:
+        """Encola un documento; lanza :class:`ServiceBusy` si su cola está llena."""
+        job = RenderJob(markdown, to, priority, tenant)
+        try:
+            self.scheduler.put(job, priority, tenant)
+        except queue.Full:
+            self._count("rejected")
+            raise ServiceBusy(self.retry_after(priority)) from None
+        self._count("accepted")
+        return job
+
+    def render(
+        self, markdown: bytes, to: str, priority: str = "interactive", tenant: str = DEFAULT_TENANT
+    ) -> RenderJob:
+        """Encola y espera el resultado; lanza :class:`TimeoutError` si vence."""
+        job = self.submit(markdown, to, priority, tenant)
+        try:
+            job.future.result(self.timeout)
+        except FutureTimeout:
+            # Si aún no empezó, el worker lo descartará al sacarlo de la cola
+            job.future.cancel()
+            self._count("timeouts")
+            raise TimeoutError(f"el documento no terminó en {self.timeout:g}s") from None
+        return job
+
+    def _work(self) -> None:
+        while True:
+            ticket = self.scheduler.get()
+            if ticket is None:
+                return
+            job = ticket.item
+            if not job.future.set_running_or_notify_cancel():
+                self.scheduler.done(ticket, ran=False)
+                continue
+            job.started_at = ticket.started_at
+            with self._lock:
+                self._busy += 1
+            try:
+                with limits(self.timeout, self.memory_mb), measure("<http>", job.to):
+                    result, job.cached = convert_cached(
+                        job.markdown, job.to, "md", FORMAT_ARGS.get(job.to, []),
+                        self.cache, self.pool, self.writer, self.optimize,
+                    )
+                    job.digest = content_digest(result)
+            except Exception as e:
+                job.finished_at = time.perf_counter()
+                self._count("failed")
+                if isinstance(e, (ConversionTimeout, MemoryLimitExceeded)):
+                    self._count("limit_exceeded")
+                job.future.set_exception(e)
+            else:
+                job.finished_at = time.perf_counter()
+                with self._lock:
+                    self.counters["completed"] += 1
+                    self.counters["cache_hits"] += job.cached
+                job.future.set_result(result)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                self.scheduler.done(ticket)
+
+    def health(self) -> dict[str, Any]:
+        return {
+            "status": "stopping" if self.stopping else "ok",
+            "pandoc": pandoc_version(),
+            "engine": "server" if self.pool is not None else "subprocess",
+            "writer": self.writer,
+            "workers": self.workers,
+            "uptime": round(time.time() - self.started, 1),
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            busy = self._busy
+        return {
+            "workers": {"total": self.workers, "busy": busy},
+            "requests": counters,
+            "classes": self.scheduler.snapshot(),
+        }
+
+
+def _template_markdown(payload: dict[str, Any]) -> str:
+    template = payload.get("template")
+    if not isinstance(template, str):
+        raise BadRequest("'template' debe ser un nombre o texto Markdown")
+    variables = payload.get("variables") or {}
+    if not isinstance(variables, dict):
+        raise BadRequest("'variables' debe ser un objeto")
+    return quote_markdown(variables, TEMPLATES.get(template, template))
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """Traduce las peticiones HTTP a trabajos de :class:`RenderService`."""
+
+    server_version = "docconv"
+    protocol_version = "HTTP/1.1"
+    service: RenderService
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(
+        self, status: int, body: bytes, content_type: str, headers: dict[str, str] | None = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, data: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _error(self, status: int, message: str, headers: dict[str, str] | None = None) -> None:
+        self._json(status, {"error": message}, headers)
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        service = self.server.service
+        if path == "/health":
+            status = HTTPStatus.SERVICE_UNAVAILABLE if service.stopping else HTTPStatus.OK
+            self._json(status, service.health())
+        elif path == "/metrics":
+            self._json(HTTPStatus.OK, service.metrics())
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"ruta desconocida: {path}")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self._error(HTTPStatus.NOT_FOUND, f"ruta desconocida: {url.path}")
+            return
+        try:
+            markdown, to, priority, tenant = self._read_request(parse_qs(url.query))
+        except BadRequest as e:
+            self.close_connection = True
+            self._error(e.status, str(e))
+            return
+        service = self.server.service
+        try:
+            job = service.render(markdown, to, priority, tenant)
+            result = job.future.result()
+        except ServiceBusy as e:
+            self._error(HTTPStatus.TOO_MANY_REQUESTS, str(e), {"Retry-After": str(e.retry_after)})
+        except TimeoutError as e:
+            self._error(HTTPStatus.GATEWAY_TIMEOUT, str(e))
+        except Exception as e:
+            self._error(HTTPStatus.UNPROCESSABLE_ENTITY, str(e) or type(e).__name__)
+        else:
+            etag = f'"{job.digest}"'
+            headers = {
+                "ETag": etag,
+                "X-Queue-Seconds": f"{job.started_at - job.queued_at:.4f}",
+                "X-Render-Seconds": f"{job.finished_at - job.started_at:.4f}",
+                "X-Cache": "hit" if job.cached else "miss",
+            }
+            if etag in self.headers.get("If-None-Match", "").replace(" ", "").split(","):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+            else:
+                self._send(HTTPStatus.OK, result, CONTENT_TYPES[to], headers)
+
+    def _read_request(self, query: dict[str, list[str]]) -> tuple[bytes, str, str, str]:
+        """Cuerpo Markdown, formato, prioridad y tenant de la petición."""
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise BadRequest("falta Content-Length", HTTPStatus.LENGTH_REQUIRED) from None
+        if length > MAX_BODY_BYTES:
+            raise BadRequest(
+                f"el cuerpo supera {MAX_BODY_BYTES // (1024 * 1024)} MiB",
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            )
+        body = self.rfile.read(length)
+        to = query.get("to", ["docx"])[0]
+        priority = query.get("priority", [self.headers.get("X-Priority", "interactive")])[0]
+        tenant = query.get("tenant", [self.headers.get("X-Tenant", DEFAULT_TENANT)])[0]
+        content_type = self.headers.get_content_type()
+        if content_type == "application/json":
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                raise BadRequest(f"JSON no válido: {e}") from None
+            if not isinstance(payload, dict):
+                raise BadRequest("se esperaba un objeto JSON")
+            to = payload.get("to", to)
+            priority = payload.get("priority", priority)
+            tenant = str(payload.get("tenant", tenant))
+            if "markdown" in payload:
+                if not isinstance(payload["markdown"], str):
+                    raise BadRequest("'markdown' debe ser texto")
+                markdown = payload["markdown"]
+            elif "template" in payload:
+                markdown = _template_markdown(payload)
+            else:
+                raise BadRequest("se esperaba 'markdown' o 'template'")
+            body = markdown.encode("utf-8")
+        if to not in CONTENT_TYPES:
+            raise BadRequest(f"formato no soportado: {to!r} (opciones: {', '.join(CONTENT_TYPES)})")
+        if priority not in PRIORITIES:
+            raise BadRequest(f"prioridad no válida: {priority!r} (opciones: {', '.join(PRIORITIES)})")
+        return body, to, priority, tenant
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: RenderService, quiet: bool = False):
+        super().__init__(address, RenderHandler)
+        self.service = service
+        self.quiet = quiet
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8787,
+    service: RenderService | None = None,
+    quiet: bool = False,
+) -> None:
+    """Atiende peticiones hasta que se interrumpe; cierra el servicio al salir."""
+    service = service or RenderService()
+    with service, RenderServer((host, port), service, quiet) as server:
+        try:
+            server.serve_forever()
+        finally:
+            service.stopping = True
@@ -0,0 +1,294 @@
+"""Generación masiva de documentos personalizados a partir de un único AST.
+
+El documento base se parsea una sola vez al AST JSON de pandoc. Para cada
+registro (cliente) se sustituyen los marcadores directamente en el AST y se
+renderiza el resultado, sin volver a ejecutar el lector de Markdown.
+
+Los marcadores son tokens ``{{variable}}`` escritos en el propio Markdown;
+para documentos que no los tienen también se pueden asociar frases literales
+a un nombre de variable. La propuesta lleva ``{{cliente}}``,
+``{{fecha_emision}}`` y ``{{validez}}``, con sus valores por defecto en los
+``campos`` de su hoja ``_PRECIOS.json``.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sized
+
+from .batch import BatchResult, iter_bounded, open_workers
+from .cache import ConversionCache
+from .engine import Source, convert_bytes, write_atomic
+from .metrics import annotate, emit, measure, phase
+from .optimize import OptimizeOptions, optimize_docx
+from .pool import PandocServerPool
+from .render import parse_markdown
+
+# Inlines que se pueden fusionar en texto plano para buscar frases
+_TEXT_INLINES = {"Str", "Space", "SoftBreak"}
+
+_TOKEN = re.compile(r"\{\{\s*([\w.-]+)\s*\}\}")
+
+
+def load_records(path: Path | str) -> Iterator[dict[str, Any]]:
+    """Lee registros de un archivo ``.json``, ``.jsonl`` o ``.csv``.
+
+    JSONL y CSV se leen de forma perezosa, línea a línea. Un ``.json`` puede
+    contener una lista de objetos o un objeto con una lista ``records``.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            yield from csv.DictReader(fh)
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as fh:
+            for number, line in enumerate(fh, start=1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"{path}:{number}: JSON inválido: {e}") from e
+    elif suffix == ".json":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if isinstance(data, dict):
+            data = data.get("records", [])
+        yield from data
+    else:
+        raise ValueError(f"formato de registros no soportado: {path.suffix or path.name}")
+
+
+def build_replacements(
+    record: dict[str, Any], placeholders: dict[str, str] | None = None
+) -> dict[str, str]:
+    """Traduce un registro a pares ``frase -> valor`` para :func:`substitute`.
+
+    Cada campo del registro reemplaza los tokens ``{{campo}}`` y, si aparece
+    en ``placeholders``, también la frase literal asociada.
+    """
+    placeholders = placeholders or {}
+    replacements = {}
+    for name, value in record.items():
+        if value is None:
+            continue
+        value = str(value)
+        replacements[f"{{{{{name}}}}}"] = value
+        if name in placeholders:
+            replacements[placeholders[name]] = value
+    return replacements
+
+
+def _tokens(text: str) -> list[dict[str, Any]]:
+    inlines: list[dict[str, Any]] = []
+    for i, word in enumerate(text.split(" ")):
+        if i:
+            inlines.append({"t": "Space"})
+        if word:
+            inlines.append({"t": "Str", "c": word})
+    return inlines
+
+
+def _substitute_run(run: list[dict[str, Any]], replacements: dict[str, str]) -> list | None:
+    text = "".join(node["c"] if node["t"] == "Str" else " " for node in run)
+    if "{{" in text:
+        text_new = _TOKEN.sub(
+            lambda m: replacements.get(f"{{{{{m.group(1)}}}}}", m.group(0)), text
+        )
+    else:
+        text_new = text
+    for phrase, value in replacements.items():
+        if phrase in text_new and not phrase.startswith("{{"):
+            text_new = text_new.replace(phrase, value)
+    if text_new == text:
+        return None
+    return _tokens(text_new)
+
+
+def _substitute_inlines(inlines: list[dict[str, Any]], replacements: dict[str, str]) -> int:
+    changed = 0
+    result: list[dict[str, Any]] = []
+    run: list[dict[str, Any]] = []
+
+    def flush() -> None:
+        nonlocal changed
+        if run:
+            new = _substitute_run(run, replacements)
+            if new is None:
+                result.extend(run)
+            else:
+                result.extend(new)
+                changed += 1
+            run.clear()
+
+    for node in inlines:
+        if node.get("t") in _TEXT_INLINES:
+            run.append(node)
+        else:
+            flush()
+            result.append(node)
+    flush()
+    if changed:
+        inlines[:] = result
+    return changed
+
+
+def _is_inline_list(value: list) -> bool:
+    # Str solo aparece dentro de listas de inlines
+    return any(isinstance(node, dict) and node.get("t") == "Str" for node in value)
+
+
+def substitute(node: Any, replacements: dict[str, str]) -> int:
+    """Sustituye in situ las frases de ``replacements`` en un AST de pandoc.
+
+    Recorre todas las listas de inlines del documento (párrafos, títulos,
+    celdas de tabla, metadatos...) y devuelve cuántos tramos cambiaron.
+    """
+    changed = 0
+    if isinstance(node, dict):
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                changed += substitute(value, replacements)
+    elif isinstance(node, list):
+        if _is_inline_list(node):
+            changed += _substitute_inlines(node, replacements)
+        for value in node:
+            if isinstance(value, (dict, list)):
+                changed += substitute(value, replacements)
+    return changed
+
+
+def render_record(
+    ast: bytes,
+    replacements: dict[str, str],
+    to: str = "docx",
+    pool: PandocServerPool | None = None,
+) -> bytes:
+    """Aplica ``replacements`` a una copia de ``ast`` y la renderiza a ``to``."""
+    with phase("filter"):
+        document = json.loads(ast)
+        substitute(document, replacements)
+        data = json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+    result = convert_bytes(data, to, "json", pool=pool)
+    annotate(input_bytes=len(data), output_bytes=len(result))
+    return result
+
+
+def _slug(value: str) -> str:
+    # Sin puntos en los extremos: "S.A." no deja "..docx" ni archivos ocultos
+    slug = re.sub(r"[^\w.-]+", "-", value, flags=re.UNICODE).strip("-.")
+    return slug[:80].rstrip("-.") or "documento"
+
+
+def output_name(record: dict[str, Any], index: int, name_field: str = "archivo") -> str:
+    """Nombre de archivo (sin extensión) para un registro."""
+    if record.get(name_field):
+        return _slug(str(record[name_field]))
+    label = record.get("cliente") or record.get("id") or ""
+    return f"{index:05d}-{_slug(str(label))}" if label else f"{index:05d}"
+
+
+def _rejected(output: Path, error: str) -> BatchResult:
+    return BatchResult(output, output, False, 0.0, error)
+
+
+def _render_job(
+    ast: bytes,
+    replacements: dict[str, str],
+    output: Path,
+    to: str,
+    pool: PandocServerPool | None,
+    optimize: OptimizeOptions | None = None,
+) -> BatchResult:
+    start = time.perf_counter()
+    metrics = None
+    try:
+        with measure(str(output), to, publish=False) as metrics:
+            result = render_record(ast, replacements, to, pool)
+            if optimize is not None and to == "docx":
+                result = optimize_docx(result, optimize)
+                annotate(output_bytes=len(result))
+            write_atomic(output, result)
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        return BatchResult(output, output, False, elapsed, str(e), metrics=metrics)
+    return BatchResult(output, output, True, time.perf_counter() - start, metrics=metrics)
+
+
+def render_personalized(
+    source: Source,
+    records: Iterable[dict[str, Any]],
+    output_dir: Path | str,
+    placeholders: dict[str, str] | None = None,
+    to: str = "docx",
+    workers: int | None = None,
+    engine: str = "subprocess",
+    name_field: str = "archivo",
+    cache: ConversionCache | None = None,
+    progress: Callable[[int, int | None, BatchResult], None] | None = None,
+    optimize: OptimizeOptions | None = None,
+    defaults: dict[str, str] | None = None,
+) -> list[BatchResult]:
+    """Genera un documento por registro a partir de un único parseo de ``source``.
+
+    ``defaults`` da el valor de los campos que un registro no trae y
+    ``placeholders`` asocia nombres de campo con frases literales del
+    documento. Un registro al que le falta algún ``{{campo}}`` del documento,
+    o cuyo nombre de salida repite el de otro, no se renderiza y vuelve como
+    error. ``records`` se consume de forma perezosa con trabajo en curso
+    acotado. ``progress``
+    recibe ``(completados, total, resultado)``, con ``total`` en ``None`` si
+    ``records`` no tiene longitud; ``engine`` funciona como en
+    :func:`~docconv.batch.convert_batch`. Con ``optimize`` cada DOCX pasa por
+    :func:`~docconv.optimize.optimize_docx` antes de escribirse.
+    """
+    placeholders = placeholders or {}
+    defaults = defaults or {}
+    output_dir = Path(output_dir)
+    total = len(records) if isinstance(records, Sized) else None
+    workers = workers or os.cpu_count() or 1
+    ast = parse_markdown(source, cache=cache)
+    fields = set(_TOKEN.findall(ast.decode("utf-8")))
+    results: list[BatchResult] = []
+    # Registros descartados antes de renderizar; se informan junto a los demás
+    rejected: list[BatchResult] = []
+    seen: dict[Path, int] = {}
+
+    def jobs(pool: PandocServerPool | None) -> Iterator[tuple]:
+        for index, record in enumerate(records, start=1):
+            record = {**defaults, **record}
+            output = output_dir / f"{output_name(record, index, name_field)}.{to}"
+            if output in seen:
+                error = f"registro {index}: salida repetida (registro {seen[output]})"
+                rejected.append(_rejected(output, error))
+                continue
+            seen[output] = index
+            missing = sorted(name for name in fields if record.get(name) is None)
+            if missing:
+                error = f"registro {index}: faltan campos {', '.join(missing)}"
+                rejected.append(_rejected(output, error))
+                continue
+            yield ast, build_replacements(record, placeholders), output, to, pool, optimize
+
+    def report(result: BatchResult) -> None:
+        results.append(result)
+        if result.metrics is not None:
+            emit(result.metrics)
+        if progress:
+            progress(len(results), total, result)
+
+    with open_workers(engine, workers) as (executor, pool):
+        completed = iter_bounded(executor, _render_job, jobs(pool), max_in_flight=4 * workers)
+        for result in completed:
+            while rejected:
+                report(rejected.pop(0))
+            report(result)
+        while rejected:
+            report(rejected.pop(0))
+    results.sort(key=lambda r: r.output)
+    return results
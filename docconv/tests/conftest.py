@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+from docconv.cache import REMOTE_VARIABLE
+
+
+@pytest.fixture(autouse=True)
+def isolated_environment(tmp_path, monkeypatch):
+    # Ni la caché del usuario ni un remoto configurado en la máquina
+    monkeypatch.setenv("DOCCONV_CACHE_DIR", str(tmp_path / "user-cache"))
+    monkeypatch.delenv(REMOTE_VARIABLE, raising=False)
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+
+
+@pytest.fixture
+def pandoc():
+    from docconv.discovery import pandoc_path
+
+    try:
+        return pandoc_path()
+    except (ImportError, OSError):
+        pytest.skip("pandoc no está instalado")
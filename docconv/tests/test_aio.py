@@ -0,0 +1,80 @@
+"""Conversión asíncrona: límites por documento y nada bloqueante en el bucle.
+
+pandoc se sustituye por un script que imprime sus argumentos o se queda
+esperando, según lo que reciba en stdin.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from docconv import aio
+from docconv.aio import AsyncConverter, run_pandoc_async
+from docconv.cache import ConversionCache
+from docconv.limits import ConversionTimeout, MemoryLimitExceeded, limits
+
+FAKE_PANDOC = """#!/bin/sh
+input=$(cat)
+case "$input" in
+  sleep) exec sleep 30 ;;
+  heap) exit 251 ;;
+esac
+echo "$@"
+"""
+
+
+@pytest.fixture
+def fake_pandoc(tmp_path):
+    path = tmp_path / "pandoc"
+    path.write_text(FAKE_PANDOC)
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_memory_limit_reaches_pandoc(fake_pandoc):
+    async def run(source):
+        with limits(memory_mb=64):
+            return await run_pandoc_async(source, "html", pandoc=fake_pandoc)
+
+    assert asyncio.run(run(b"texto")).split()[:3] == [b"+RTS", b"-M64m", b"-RTS"]
+    with pytest.raises(MemoryLimitExceeded):
+        asyncio.run(run(b"heap"))
+    assert b"+RTS" not in asyncio.run(run_pandoc_async(b"texto", "html", pandoc=fake_pandoc))
+
+
+def test_timeout_kills_pandoc(fake_pandoc):
+    async def run():
+        with limits(timeout=0.2):
+            await AsyncConverter(pandoc=fake_pandoc).convert("sleep", to="html")
+
+    start = time.monotonic()
+    with pytest.raises(ConversionTimeout):
+        asyncio.run(run())
+    assert time.monotonic() - start < 10
+
+
+def test_discovery_runs_off_the_loop(fake_pandoc, tmp_path, monkeypatch):
+    threads = []
+
+    def record(value):
+        def lookup():
+            threads.append(threading.current_thread())
+            return value
+
+        return lookup
+
+    monkeypatch.setattr(aio, "pandoc_path", record(fake_pandoc))
+    monkeypatch.setattr(aio, "pandoc_version", record("3.6.1"))
+
+    async def run():
+        # Sin start(): pandoc y su versión se resuelven en la primera conversión
+        with ConversionCache(tmp_path / "cache") as cache:
+            return await AsyncConverter(cache=cache).convert("texto", to="html")
+
+    assert asyncio.run(run()).startswith(b"--from markdown --to html")
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
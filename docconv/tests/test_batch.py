@@ -0,0 +1,108 @@
+"""Reintentos, aislamiento de caídas, plazos y dead letter de los lotes.
+
+La conversión se sustituye por :func:`fake_convert`, que hace lo que dice el
+contenido del Markdown, así que estas pruebas no necesitan pandoc. El pool de
+procesos hereda la sustitución al hacer fork.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from docconv import batch
+from docconv.batch import BatchResult, convert_batch, write_dead_letter
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="el pool debe heredar fake_convert"
+)
+
+
+def fake_convert(source: Path, output: Path, *args) -> BatchResult:
+    attempts = source.with_suffix(".attempts")
+    with open(attempts, "a") as fh:
+        fh.write("x")
+    attempt = attempts.stat().st_size
+    action = source.read_text().strip()
+    if action == "crash" and attempt == 1:
+        os._exit(1)
+    if action == "stuck":
+        time.sleep(60)
+    if action == "down" or (action == "flaky" and attempt == 1):
+        return BatchResult(source, output, False, 0.0, "servidor caído", failure="transient")
+    if action == "broken":
+        return BatchResult(source, output, False, 0.0, "Markdown inválido", failure="error")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(b"docx")
+    return BatchResult(source, output, True, 0.0)
+
+
+@pytest.fixture(autouse=True)
+def fake(monkeypatch):
+    monkeypatch.setattr(batch, "convert_file", fake_convert)
+    monkeypatch.setattr(batch, "DEADLINE_GRACE", 0.5)
+
+
+def run(tmp_path: Path, actions: dict[str, str], **options) -> dict[str, BatchResult]:
+    sources = []
+    for name, action in actions.items():
+        source = tmp_path / "src" / f"{name}.md"
+        source.parent.mkdir(exist_ok=True)
+        source.write_text(action)
+        sources.append(source)
+    options.setdefault("workers", 2)
+    results = convert_batch(sources, tmp_path / "out", root=tmp_path / "src", **options)
+    return {result.source.stem: result for result in results}
+
+
+def test_transient_failure_is_retried(tmp_path):
+    results = run(tmp_path, {"a": "ok", "b": "flaky"})
+    assert results["a"].ok and results["a"].attempts == 1
+    assert results["b"].ok and results["b"].attempts == 2
+
+
+def test_permanent_failure_is_not_retried(tmp_path):
+    results = run(tmp_path, {"a": "broken"})
+    assert not results["a"].ok
+    assert (results["a"].failure, results["a"].attempts) == ("error", 1)
+
+
+def test_retries_are_bounded(tmp_path):
+    results = run(tmp_path, {"a": "down"}, retries=2)
+    assert (results["a"].failure, results["a"].attempts) == ("transient", 3)
+
+
+def test_crashed_worker_is_retried_in_isolation(tmp_path):
+    results = run(tmp_path, {"a": "ok", "b": "crash", "c": "ok"})
+    assert all(result.ok for result in results.values())
+    assert results["b"].attempts == 2
+
+
+def test_stuck_worker_times_out_and_pool_recovers(tmp_path):
+    start = time.monotonic()
+    results = run(tmp_path, {"a": "stuck", "b": "ok", "c": "ok"}, timeout=0.5)
+    assert time.monotonic() - start < 30
+    assert results["a"].failure == "timeout"
+    assert results["b"].ok and results["c"].ok
+
+
+def test_dead_letter(tmp_path):
+    results = run(tmp_path, {"a": "ok", "b": "broken"})
+    path = tmp_path / "dead-letter.jsonl"
+    assert write_dead_letter(results.values(), path) == 1
+    (record,) = [json.loads(line) for line in path.read_text().splitlines()]
+    assert record["source"].endswith("b.md")
+    assert (record["failure"], record["attempts"]) == ("error", 1)
+    # Sin fallos no queda el informe anterior
+    assert write_dead_letter([results["a"]], path) == 0
+    assert not path.exists()
+
+
+def test_server_engine_rejects_lua_filters(tmp_path):
+    with pytest.raises(ValueError):
+        run(tmp_path, {"a": "ok"}, engine="server", filters=["tables"])
@@ -0,0 +1,67 @@
+"""Caché local: claves, ida y vuelta, desalojo LRU y contadores."""
+
+from __future__ import annotations
+
+import pytest
+
+from docconv.cache import ConversionCache, cache_key
+from docconv.filters import filter_args, key_args
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ConversionCache(tmp_path / "cache") as cache:
+        yield cache
+
+
+def test_key_is_stable_and_covers_every_input():
+    key = cache_key(b"# Hola\n", "docx", "3.6.1", "md", ["--toc"])
+    assert key == cache_key(b"# Hola\n", "docx", "3.6.1", "md", ["--toc"])
+    variants = {
+        cache_key(b"# Hola!\n", "docx", "3.6.1", "md", ["--toc"]),
+        cache_key(b"# Hola\n", "html", "3.6.1", "md", ["--toc"]),
+        cache_key(b"# Hola\n", "docx", "3.7.0", "md", ["--toc"]),
+        cache_key(b"# Hola\n", "docx", "3.6.1", "json", ["--toc"]),
+        cache_key(b"# Hola\n", "docx", "3.6.1", "md", []),
+    }
+    assert key not in variants
+    assert len(variants) == 5
+
+
+def test_key_args_drop_filter_paths():
+    args = filter_args(["anchors", "tables"])
+    stripped = key_args(args)
+    assert not any("/" in arg for arg in stripped)
+    # El digest del contenido de los filtros sigue en la clave
+    assert any(arg.startswith("--metadata=docconv_filters_sha=") for arg in stripped)
+    assert key_args(filter_args(["tables", "anchors"])) != stripped
+
+
+def test_put_get_round_trip(cache):
+    key = cache_key(b"a", "docx", "x")
+    assert cache.get(key) is None
+    cache.put(key, b"artefacto")
+    assert cache.get(key) == b"artefacto"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+def test_missing_blob_is_forgotten(cache):
+    key = cache_key(b"a", "docx", "x")
+    cache.put(key, b"artefacto")
+    cache._blob_path(key).unlink()
+    assert cache.get(key) is None
+    assert cache.stats().entries == 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+    with ConversionCache(tmp_path, max_bytes=20) as cache:
+        old, recent, new = (cache_key(bytes([i]), "docx", "x") for i in range(3))
+        cache.put(old, b"0" * 8)
+        cache.put(recent, b"1" * 8)
+        with cache._db:
+            cache._db.execute("UPDATE entries SET accessed = 0 WHERE key = ?", (old,))
+        cache.put(new, b"2" * 8)
+        assert cache.get(old) is None
+        assert cache.get(recent) == b"1" * 8
+        assert cache.get(new) == b"2" * 8
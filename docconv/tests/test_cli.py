@@ -0,0 +1,61 @@
+"""Opciones de la CLI que deciden qué se ejecuta y cómo se escriben las salidas."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+
+import pytest
+
+from docconv.cache import ConversionCache
+from docconv.cli import build_parser, filters_engine, lua_filters, open_cache, render_proposal
+
+
+def parse(*argv):
+    return build_parser().parse_args(list(argv))
+
+
+@pytest.mark.parametrize(
+    "argv, engine, filters",
+    [
+        (["watch"], "subprocess", ["anchors", "tables"]),
+        (["watch", "--filters", ""], "server", []),
+        (["watch", "--writer", "native"], "server", []),
+        (["watch", "--engine", "subprocess"], "subprocess", ["anchors", "tables"]),
+        (["batch", "."], "subprocess", ["anchors", "tables"]),
+        (["batch", ".", "--engine", "server", "--filters", ""], "server", []),
+    ],
+)
+def test_engine_keeps_filters(argv, engine, filters, capsys):
+    args = parse(*argv)
+    assert (filters_engine(args), lua_filters(args)) == (engine, filters)
+    assert capsys.readouterr().err == ""
+
+
+@pytest.mark.parametrize("command", [["watch"], ["batch", "."]])
+def test_explicit_server_with_filters_warns(command, capsys):
+    args = parse(*command, "--engine", "server")
+    assert filters_engine(args) == "subprocess"
+    assert lua_filters(args) == ["anchors", "tables"]
+    assert "anchors, tables" in capsys.readouterr().err
+
+
+def test_cache_is_closed(tmp_path):
+    with open_cache(parse("proposal", "--no-cache")) as cache:
+        assert cache is None
+    with open_cache(parse("proposal", "--cache-dir", str(tmp_path))) as cache:
+        assert isinstance(cache, ConversionCache)
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.stats()
+
+
+def test_render_proposal_replaces_outputs_atomically(pandoc, tmp_path):
+    output = tmp_path / "salida" / "propuesta.docx"
+    output.parent.mkdir()
+    previous = output.with_suffix(".html")
+    previous.write_text("anterior")
+    previous.chmod(0o640)
+    assert render_proposal("# Propuesta\n", ["html"], str(output), None) == 0
+    assert b"Propuesta" in previous.read_bytes()
+    assert os.stat(previous).st_mode & 0o777 == 0o640
+    assert os.listdir(output.parent) == ["propuesta.html"]
@@ -0,0 +1,181 @@
+"""Unión de DOCX por secciones: marcadores únicos y enlaces internos resueltos."""
+
+from __future__ import annotations
+
+import io
+import posixpath
+import re
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from docconv.filters import filter_args
+from docconv.merge import _bookmark_name, _github_slug, _pandoc_identifier, merge_docx
+from docconv.sections import convert_sections, split_sections
+
+SECTIONED = """# Manual
+
+## Índice
+
+- [Notas finales](#notas-finales)
+- [Segunda parte](#2-segunda-parte)
+
+## Primera parte
+
+### Notas
+
+Texto.
+
+## 2. Segunda parte
+
+### Notas
+
+Más texto.
+
+## Notas finales y agradecimientos
+
+Fin.
+"""
+
+
+def document_xml(data: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        return package.read("word/document.xml").decode("utf-8")
+
+
+def bookmarks(document: str) -> list[str]:
+    return re.findall(r'<w:bookmarkStart\b[^>]*?\bw:name="([^"]*)"', document)
+
+
+def anchors(document: str) -> list[str]:
+    return re.findall(r'<w:hyperlink\b[^>]*?\bw:anchor="([^"]*)"', document)
+
+
+@pytest.mark.parametrize(
+    "text, ident",
+    [
+        ("🎯 PROPUESTA COMERCIAL - PLEXO", "propuesta-comercial---plexo"),
+        ("2. Segunda parte", "segunda-parte"),
+        ("¿Qué incluye?", "qué-incluye"),
+        ("💰", "section"),
+    ],
+)
+def test_pandoc_identifier(text, ident):
+    assert _pandoc_identifier(text) == ident
+
+
+def test_github_slug_and_long_bookmarks():
+    assert _github_slug("📋 2. Segunda parte") == "-2-segunda-parte"
+    assert _bookmark_name("corta") == "corta"
+    assert len(_bookmark_name("x" * 41)) == 40
+
+
+def test_sections_match_whole_document(pandoc):
+    args = filter_args(["anchors"])
+    whole = document_xml(convert_sections(SECTIONED, extra_args=args, level=1))
+    merged = document_xml(convert_sections(SECTIONED, extra_args=args, level=2))
+    names = bookmarks(merged)
+    assert len(names) == len(set(names))
+    assert sorted(names) == sorted(bookmarks(whole))
+    assert anchors(merged) == anchors(whole)
+    assert set(anchors(merged)) <= set(names)
+
+
+def test_anchors_are_left_alone_without_the_filter(pandoc):
+    merged = document_xml(convert_sections(SECTIONED, level=2))
+    names = bookmarks(merged)
+    assert len(names) == len(set(names))
+    assert "notas-finales" in anchors(merged)
+
+
+def png(path) -> str:
+    """PNG de 1x1 en ``path``; devuelve la ruta para el Markdown."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    path.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00"))
+        + chunk(b"IEND", b"")
+    )
+    return str(path)
+
+
+def section(index: int, image: str) -> str:
+    return f"""## Sección {index}
+
+Texto con nota[^n{index}] y [un enlace](https://example.com/{index}).
+
+1. uno
+2. dos
+
+- a
+- b
+
+![logo]({image})
+
+[^n{index}]: Nota de la sección {index}.
+"""
+
+
+def check_package(data: bytes) -> None:
+    """Comprueba las referencias internas de un DOCX unido."""
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        parts = {name: package.read(name) for name in package.namelist()}
+    text = {
+        name: value.decode("utf-8") for name, value in parts.items() if name.endswith((".xml", ".rels"))
+    }
+    types = text["[Content_Types].xml"]
+    extensions = {ext.lower() for ext in re.findall(r'<Default\s[^>]*Extension="([^"]+)"', types)}
+    for name in parts:
+        if name != "[Content_Types].xml":
+            extension = name.rsplit(".", 1)[-1].lower()
+            assert f'PartName="/{name}"' in types or extension in extensions, name
+
+    for part in ("word/document.xml", "word/footnotes.xml"):
+        rels_name = posixpath.join("word/_rels", posixpath.basename(part) + ".rels")
+        rels = re.findall(r"<Relationship\s([^>]*?)/?>", text.get(rels_name, ""))
+        ids = {}
+        for attrs in rels:
+            attrs = dict(re.findall(r'([\w:]+)="([^"]*)"', attrs))
+            ids[attrs["Id"]] = attrs
+            if attrs.get("TargetMode") != "External":
+                target = posixpath.normpath(posixpath.join("word", attrs["Target"]))
+                assert target in parts, f"{rels_name}: {attrs['Target']}"
+        for ref in re.findall(r'\br:(?:id|embed|link)="([^"]+)"', text.get(part, "")):
+            assert ref in ids, f"{part}: {ref}"
+
+    document, numbering = text["word/document.xml"], text["word/numbering.xml"]
+    nums = set(re.findall(r'<w:num\b[^>]*\bw:numId="(\d+)"', numbering))
+    abstracts = set(re.findall(r'<w:abstractNum\b[^>]*\bw:abstractNumId="(\d+)"', numbering))
+    assert set(re.findall(r'<w:numId w:val="(\d+)"', document)) - {"0"} <= nums
+    assert set(re.findall(r'<w:abstractNumId w:val="(\d+)"', numbering)) <= abstracts
+
+    notes = re.findall(r'<w:footnote\b[^>]*\bw:id="(-?\d+)"', text["word/footnotes.xml"])
+    references = re.findall(r'<w:footnoteReference\b[^>]*\bw:id="(\d+)"', document)
+    assert len(notes) == len(set(notes))
+    assert len(references) == len(set(references)) == 3
+    assert set(references) <= set(notes)
+
+    for pattern in (r'<wp:docPr\b[^>]*?\bid="(\d+)"', r'<w:bookmarkStart\b[^>]*?\bw:id="(\d+)"'):
+        found = re.findall(pattern, document)
+        assert len(found) == len(set(found))
+
+
+def test_merged_package_is_consistent(pandoc, tmp_path):
+    image = png(tmp_path / "logo.png")
+    markdown = "# Documento\n\n" + "\n".join(section(index, image) for index in range(3))
+    assert len(split_sections(markdown)) == 4
+    merged = convert_sections(markdown)
+    check_package(merged)
+    with zipfile.ZipFile(io.BytesIO(merged)) as package:
+        assert sum(name.startswith("word/media/") for name in package.namelist()) == 3
+
+
+def test_merge_needs_documents():
+    with pytest.raises(ValueError):
+        merge_docx([])
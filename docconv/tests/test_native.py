@@ -0,0 +1,101 @@
+"""Escritor nativo y vuelta a pandoc fuera de su subconjunto de Markdown."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+
+import pytest
+
+from docconv import engine
+from docconv.cache import ConversionCache
+from docconv.engine import convert_bytes, convert_cached
+from docconv.metrics import measure
+from docconv.native import UnsupportedMarkdown, markdown_to_docx_native
+
+SUPPORTED = (
+    "# Propuesta\n\n"
+    "Texto con **negrita**, *cursiva*, `código` y [enlace](https://example.com).\n\n"
+    "- uno\n  1. anidado\n\n"
+    "| Plan | Precio |\n|------|-------:|\n| Base | $10 |\n\n"
+    "---\n\n"
+    "```python\nprint(1)\n```\n"
+)
+
+UNSUPPORTED = {
+    "imagen": "Texto ![logo](logo.png)\n",
+    "nota": "Texto[^1]\n\n[^1]: Nota.\n",
+    "yaml": "---\ntitle: Propuesta\n---\n\nTexto\n",
+    "html": "Texto <b>crudo</b>\n",
+    "setext": "Título\n======\n",
+    "cita": "> Cita\n",
+}
+
+
+@pytest.fixture
+def fake_pandoc(monkeypatch):
+    calls = []
+
+    def run_pandoc(data, to, fmt="md", extra_args=()):
+        calls.append(list(extra_args))
+        return b"pandoc"
+
+    monkeypatch.setattr(engine, "run_pandoc", run_pandoc)
+    monkeypatch.setattr(engine, "pandoc_version", lambda: "3.6.1")
+    return calls
+
+
+def document_xml(data: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        assert package.testzip() is None
+        return package.read("word/document.xml").decode("utf-8")
+
+
+def test_supported_subset_skips_pandoc(fake_pandoc):
+    with measure("propuesta", "docx") as record:
+        result = convert_bytes(SUPPORTED, writer="native")
+    assert (record.engine, fake_pandoc) == ("native", [])
+    xml = document_xml(result)
+    assert 'w:val="Heading1"' in xml
+    assert "negrita" in xml and "<w:tbl>" in xml
+
+
+@pytest.mark.parametrize("name", sorted(UNSUPPORTED))
+def test_unsupported_markdown_falls_back(name, fake_pandoc):
+    with pytest.raises(UnsupportedMarkdown):
+        markdown_to_docx_native(UNSUPPORTED[name])
+    with measure(name, "docx") as record:
+        assert convert_bytes(UNSUPPORTED[name], writer="native") == b"pandoc"
+    assert record.engine != "native"
+    assert len(fake_pandoc) == 1
+
+
+def test_pandoc_options_use_pandoc(fake_pandoc):
+    assert convert_bytes(SUPPORTED, extra_args=["--toc"], writer="native") == b"pandoc"
+    assert convert_bytes(SUPPORTED, to="html", writer="native") == b"pandoc"
+    assert fake_pandoc == [["--toc"], []]
+
+
+def test_unknown_writer(fake_pandoc):
+    with pytest.raises(ValueError):
+        convert_bytes(SUPPORTED, writer="python")
+
+
+def test_cache_keeps_writers_apart(fake_pandoc, tmp_path):
+    data = SUPPORTED.encode("utf-8")
+    with ConversionCache(tmp_path / "cache") as cache:
+        native, cached = convert_cached(data, "docx", "md", [], cache, None, "native")
+        assert not cached and native != b"pandoc"
+        assert convert_cached(data, "docx", "md", [], cache, None, "native") == (native, True)
+        # La salida de pandoc tiene su propia clave
+        assert convert_cached(data, "docx", "md", [], cache, None) == (b"pandoc", False)
+        fallback = UNSUPPORTED["imagen"].encode("utf-8")
+        assert convert_cached(fallback, "docx", "md", [], cache, None, "native") == (b"pandoc", False)
+        assert convert_cached(fallback, "docx", "md", [], cache, None) == (b"pandoc", True)
+    assert len(fake_pandoc) == 2
+
+
+def test_fallback_with_pandoc(pandoc):
+    result = convert_bytes(UNSUPPORTED["nota"], writer="native")
+    with zipfile.ZipFile(io.BytesIO(result)) as package:
+        assert b"Nota." in package.read("word/footnotes.xml")
@@ -0,0 +1,63 @@
+"""Posproceso de DOCX: salidas reproducibles y caché del resultado."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+
+import pytest
+
+from docconv.cache import ConversionCache
+from docconv.native import markdown_to_docx_native
+from docconv.optimize import ZIP_EPOCH, OptimizeOptions, optimize_docx
+
+MARKDOWN = "# Propuesta\n\nTexto con **negrita**.\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+
+REPRODUCIBLE = OptimizeOptions(reproducible=True)
+
+
+def restamp(data: bytes, date_time: tuple, reverse: bool = False) -> bytes:
+    """Mismo contenido con otras fechas y, con ``reverse``, otro orden de entradas."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(buffer, "w") as target:
+        infos = source.infolist()
+        for info in reversed(infos) if reverse else infos:
+            target.writestr(zipfile.ZipInfo(info.filename, date_time), source.read(info))
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def docx() -> bytes:
+    return markdown_to_docx_native(MARKDOWN)
+
+
+def test_reproducible_output_is_byte_identical(docx):
+    first = optimize_docx(restamp(docx, (2024, 5, 1, 10, 0, 0)), REPRODUCIBLE)
+    second = optimize_docx(restamp(docx, (2025, 1, 2, 3, 4, 6), reverse=True), REPRODUCIBLE)
+    assert first == second
+    with zipfile.ZipFile(io.BytesIO(first)) as package:
+        assert package.namelist()[0] == "[Content_Types].xml"
+        assert {info.date_time for info in package.infolist()} == {ZIP_EPOCH.timetuple()[:6]}
+        assert package.testzip() is None
+
+
+def test_source_date_epoch(docx, monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    result = optimize_docx(docx, REPRODUCIBLE)
+    with zipfile.ZipFile(io.BytesIO(result)) as package:
+        assert package.infolist()[0].date_time == (2023, 11, 14, 22, 13, 20)
+        assert b"2023-11-14T22:13:20Z" in package.read("docProps/core.xml")
+
+
+def test_default_keeps_entry_dates(docx):
+    stamped = restamp(docx, (2024, 5, 1, 10, 0, 0))
+    result = optimize_docx(stamped, OptimizeOptions())
+    with zipfile.ZipFile(io.BytesIO(result)) as package:
+        assert {info.date_time for info in package.infolist()} == {(2024, 5, 1, 10, 0, 0)}
+
+
+def test_result_is_cached(docx, tmp_path):
+    with ConversionCache(tmp_path) as cache:
+        first = optimize_docx(docx, REPRODUCIBLE, cache)
+        assert optimize_docx(docx, REPRODUCIBLE, cache) == first
+        assert cache.stats().hits == 1
@@ -0,0 +1,126 @@
+"""Importes de las hojas de precios y sustitución de sus marcadores."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from docconv import pricing
+from docconv.pricing import PriceSheet, Section, compute_totals, expand_pricing, load_pricing
+
+ROOT = Path(__file__).resolve().parents[2]
+
+PROPOSAL_SHEET = ROOT / "PROPUESTA_COMERCIAL_PLEXO_PRECIOS.json"
+
+
+def random_sheet(count: int = 2000, seed: int = 7) -> PriceSheet:
+    rng = random.Random(seed)
+    sections = {
+        "unico": Section("unico"),
+        "anual": Section("anual", recurring=True, tax=8),
+        "mixta": Section("mixta"),
+    }
+    items = []
+    for _ in range(count):
+        items.append({
+            "seccion": rng.choice(list(sections)),
+            "cantidad": rng.choice([1, 2, 3, 0.5, 12]),
+            # Medios centavos para ejercitar el redondeo
+            "precio": rng.randrange(1, 2_000_000) / 200,
+            "descuento": rng.choice([0, 0, 5, 12.5, 33]),
+            "recurrente": rng.choice(["", "sí", "no"]),
+        })
+    return PriceSheet(items=items, sections=sections, tax=16, years=5, growth=4.5)
+
+
+@pytest.fixture
+def no_numpy(monkeypatch):
+    monkeypatch.setattr(pricing, "_numpy", lambda: None)
+
+
+def test_proposal_totals(no_numpy):
+    totals = compute_totals(load_pricing(PROPOSAL_SHEET))
+    assert totals.subtotal("desarrollo") == 88_000_000
+    assert totals.recurring["mantenimiento"] == 16_800_000
+    assert totals.projection["saas"] == [22_500_000, 18_000_000, 18_000_000]
+    assert totals.first_year(["desarrollo", "mantenimiento"]) == 104_800_000
+
+
+def test_numpy_matches_pure_python(monkeypatch):
+    pytest.importorskip("numpy")
+    sheet = random_sheet()
+    vectorized = compute_totals(sheet)
+    monkeypatch.setattr(pricing, "_numpy", lambda: None)
+    assert compute_totals(sheet) == vectorized
+
+
+def test_pure_python_rounds_half_up(no_numpy):
+    sheet = PriceSheet(
+        items=[
+            {"seccion": "a", "precio": 0.125},
+            {"seccion": "a", "precio": 10, "descuento": 33.35},
+            {"seccion": "b", "precio": 100, "recurrente": True},
+        ],
+        tax=16,
+        years=3,
+        growth=3.3,
+    )
+    totals = compute_totals(sheet)
+    assert totals.lines == [13, 667, 10_000]
+    assert totals.tax == {"a": 109, "b": 1_600}
+    assert totals.projection["b"] == [10_000, 10_330, 10_671]
+
+
+def test_markers_in_code_are_left_alone():
+    sheet = PriceSheet(items=[{"seccion": "a", "concepto": "Plan", "precio": 10}])
+    markdown = (
+        "Total: {{total:a}}, escrito como `{{total:a}}` o ``{{total:a}}``.\n\n"
+        "```markdown\n{{precios:a}}\n{{total:a}}\n```\n\n"
+        "~~~~\n{{precios:a}}\n~~~~\n\n"
+        "{{precios:a}}\n"
+    )
+    result = expand_pricing(markdown, sheet)
+    assert result.startswith(r"Total: \$10, escrito como `{{total:a}}` o ``{{total:a}}``.")
+    assert "```markdown\n{{precios:a}}\n{{total:a}}\n```" in result
+    assert "~~~~\n{{precios:a}}\n~~~~" in result
+    assert result.endswith("| **Plan** |  | \\$10 |\n")
+
+
+def test_unclosed_fence_is_not_code():
+    sheet = PriceSheet(items=[{"seccion": "a", "precio": 10}], fields={"cliente": "ACME"})
+    assert expand_pricing("```\n{{cliente}} {{total:a}}\n", sheet) == "```\nACME \\$10\n"
+
+
+def test_proposal_returns_and_promotions(no_numpy):
+    markdown = (ROOT / "PROPUESTA_COMERCIAL_PLEXO.md").read_text(encoding="utf-8")
+    result = expand_pricing(markdown, load_pricing(PROPOSAL_SHEET))
+    assert "{{" not in result
+    assert "**Payback: 13 meses**" in result and "**Payback: 2.7 meses**" in result
+    assert "ROI 3 años: **114%**" in result and "ROI Año 1: **338%**" in result
+    assert r"| **Inversión Inicial** | \$880,000 | **60% OFF** | **\$352,000** |" in result
+    assert r"| **Soporte Año 1** | \$168,000 | Incluido | **\$0** |" in result
+    assert r"- **AHORRO TOTAL 2 AÑOS: \$780,000 MXN (64%)**" in result
+    assert r"| **SaaS Profesional** | \$202,500 | \$162,000 | **\$364,500** | \$40,500 (10%) |" in result
+    assert r"| Regular Perpetua | \$1,048,000 | \$168,000 | \$1,216,000 | - |" in result
+
+
+@pytest.mark.parametrize(
+    "marker",
+    ["{{promocion:otra}}", "{{comparativa:base+otra}}", "{{roi:a/b:4}}", "{{payback:a/b}}"],
+)
+def test_invalid_return_and_promotion_markers(marker):
+    sheet = PriceSheet(
+        items=[{"seccion": "a", "precio": 10}, {"seccion": "b", "precio": 0}],
+        promotions={"base": pricing.Promotion("base")},
+    )
+    with pytest.raises(ValueError):
+        expand_pricing(f"{marker}\n", sheet)
+
+
+def test_promotion_keys_are_checked(tmp_path):
+    path = tmp_path / "precios.json"
+    path.write_text('{"promociones": {"p": {"partidas": [{"seccion": "a"}]}}}')
+    with pytest.raises(ValueError, match="seccion"):
+        load_pricing(path)
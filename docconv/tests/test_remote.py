@@ -0,0 +1,122 @@
+"""Segundo nivel de la caché: almacenes remotos, integridad y caídas."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import stat
+import threading
+
+import pytest
+
+from docconv.cache import REMOTE_FAILURE_LIMIT, ConversionCache
+from docconv.engine import output_mode
+from docconv.remote import FilesystemStore, HttpStore, RemoteIntegrityError, RemoteServer
+
+
+def key(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FilesystemStore(tmp_path / "remote")
+
+
+@pytest.fixture
+def server(store):
+    with RemoteServer(("127.0.0.1", 0), store, token="secreto", quiet=True) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+
+
+class DownStore:
+    """Almacén que siempre está caído y cuenta cuántas veces se le llama."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise ConnectionRefusedError("caído")
+
+    def put(self, key, data):
+        self.calls += 1
+        raise ConnectionRefusedError("caído")
+
+
+def test_filesystem_round_trip(store):
+    assert store.get(key("a")) is None
+    store.put(key("a"), b"contenido")
+    assert store.get(key("a")) == b"contenido"
+    mode = stat.S_IMODE(os.stat(store._path(key("a"))).st_mode)
+    assert mode == output_mode(store.root / "nuevo")
+
+
+def test_filesystem_corrupt_object_is_removed(store):
+    store.put(key("a"), b"contenido")
+    path = store._path(key("a"))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(RemoteIntegrityError):
+        store.get(key("a"))
+    assert not path.exists()
+
+
+def test_rejects_invalid_keys(store):
+    with pytest.raises(ValueError):
+        store.get("../../etc/passwd")
+
+
+def test_http_round_trip_and_token(server):
+    remote = HttpStore(server, token="secreto")
+    remote.put(key("a"), b"contenido")
+    assert remote.get(key("a")) == b"contenido"
+    assert remote.get(key("b")) is None
+    with pytest.raises(ConnectionError):
+        HttpStore(server, token="otro").get(key("a"))
+
+
+def test_cache_reads_through_and_uploads(tmp_path, server):
+    with ConversionCache(tmp_path / "a", remote=HttpStore(server, token="secreto")) as first:
+        first.put(key("a"), b"contenido")
+    # close() espera a la subida en segundo plano
+    with ConversionCache(tmp_path / "b", remote=HttpStore(server, token="secreto")) as second:
+        assert second.get(key("a")) == b"contenido"
+        assert second.stats().remote_hits == 1
+        # Ya está en disco: la segunda lectura no pasa por el remoto
+        assert second.get(key("a")) == b"contenido"
+        assert second.stats().remote_hits == 1
+
+
+def test_corrupt_remote_object_is_a_miss(tmp_path, store):
+    store.put(key("a"), b"contenido")
+    path = store._path(key("a"))
+    path.write_bytes(path.read_bytes().replace(b"contenido", b"alterado!"))
+    with ConversionCache(tmp_path / "local", remote=store) as cache:
+        assert cache.get(key("a")) is None
+        stats = cache.stats()
+        assert (stats.remote_errors, stats.entries) == (1, 0)
+
+
+def test_unreachable_http_is_a_miss(tmp_path):
+    remote = HttpStore("http://127.0.0.1:1", connect_timeout=0.5)
+    with ConversionCache(tmp_path, remote=remote) as cache:
+        assert cache.get(key("a")) is None
+        assert cache.stats().remote_errors == 1
+
+
+def test_circuit_breaker_skips_a_down_remote(tmp_path):
+    remote = DownStore()
+    with ConversionCache(tmp_path, remote=remote) as cache:
+        for name in "abcdef":
+            assert cache.get(key(name)) is None
+        cache.put(key("a"), b"local")
+        assert remote.calls == REMOTE_FAILURE_LIMIT
+        assert cache.stats().remote_errors == REMOTE_FAILURE_LIMIT
+        assert cache.get(key("a")) == b"local"
+        # Pasado el enfriamiento se vuelve a intentar
+        cache._remote_retry_at = 0.0
+        cache.get(key("z"))
+        assert remote.calls == REMOTE_FAILURE_LIMIT + 1
@@ -0,0 +1,71 @@
+"""Prioridades, límites por clase y turnos entre tenants del planificador."""
+
+from __future__ import annotations
+
+import queue
+
+import pytest
+
+from docconv.scheduler import ClassPolicy, PriorityScheduler, default_policies
+
+
+def drain(scheduler: PriorityScheduler) -> list:
+    items = []
+    while (ticket := scheduler.get(timeout=0)) is not None:
+        items.append(ticket.item)
+        scheduler.done(ticket)
+    return items
+
+
+def test_interactive_goes_before_queued_bulk():
+    scheduler = PriorityScheduler(default_policies(workers=2))
+    for index in range(5):
+        scheduler.put(f"lote-{index}", "bulk")
+    scheduler.put("propuesta", "interactive")
+    assert scheduler.get(timeout=0).item == "propuesta"
+
+
+def test_bulk_leaves_a_worker_for_interactive():
+    scheduler = PriorityScheduler(default_policies(workers=2))
+    for index in range(5):
+        scheduler.put(f"lote-{index}", "bulk")
+    running = scheduler.get(timeout=0)
+    assert running.priority == "bulk"
+    # El segundo worker no toma otro trabajo de lote
+    assert scheduler.get(timeout=0) is None
+    scheduler.put("propuesta", "interactive")
+    assert scheduler.get(timeout=0).item == "propuesta"
+    scheduler.done(running)
+    assert scheduler.get(timeout=0).item == "lote-1"
+
+
+def test_tenants_take_turns():
+    scheduler = PriorityScheduler({"bulk": ClassPolicy(1, 100)})
+    for index in range(3):
+        scheduler.put(f"grande-{index}", "bulk", tenant="grande")
+    scheduler.put("chico-0", "bulk", tenant="chico")
+    assert drain(scheduler) == ["grande-0", "chico-0", "grande-1", "grande-2"]
+
+
+def test_full_class_rejects():
+    scheduler = PriorityScheduler({"interactive": ClassPolicy(1, 1)})
+    scheduler.put("a")
+    with pytest.raises(queue.Full):
+        scheduler.put("b")
+    assert scheduler.stats["interactive"].rejected == 1
+
+
+def test_unknown_priority():
+    scheduler = PriorityScheduler(default_policies(workers=1))
+    with pytest.raises(ValueError):
+        scheduler.put("a", "urgente")
+
+
+def test_close_drains_then_stops():
+    scheduler = PriorityScheduler(default_policies(workers=1))
+    scheduler.put("a")
+    scheduler.close()
+    with pytest.raises(queue.Full):
+        scheduler.put("b")
+    assert drain(scheduler) == ["a"]
+    assert scheduler.get() is None
@@ -0,0 +1,43 @@
+"""Presupuesto de arranque de la CLI, como en ``benchmarks/startup.py``.
+
+``$DOCCONV_STARTUP_SCALE`` multiplica los presupuestos en máquinas lentas.
+"""
+
+from __future__ import annotations
+
+import compileall
+import importlib.util
+import os
+import statistics
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("startup", ROOT / "benchmarks" / "startup.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+startup = load_benchmark()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def bytecode():
+    # Sin .pyc se mediría la compilación, no los imports
+    compileall.compile_dir(ROOT / "docconv", quiet=1)
+
+
+@pytest.mark.parametrize("label", sorted(startup.COMMANDS))
+def test_startup_budget(label):
+    command, budget = startup.COMMANDS[label]
+    budget *= float(os.environ.get("DOCCONV_STARTUP_SCALE", "1"))
+    runs = [startup.import_times(command) for _ in range(5)]
+    loaded = sorted(name for name in startup.FORBIDDEN if any(name in times for times in runs))
+    assert not loaded, f"{label} importa {', '.join(loaded)}"
+    total = statistics.median(sum(times.values()) for times in runs) / 1000
+    assert total <= budget, f"{label}: {total:.1f} ms (presupuesto {budget:.0f} ms)"
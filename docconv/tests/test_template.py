@@ -0,0 +1,71 @@
+"""Campañas: sustitución en el AST y registros rechazados antes de renderizar."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+
+from docconv.template import output_name, render_personalized, substitute
+
+MARKDOWN = "# Propuesta para {{cliente}}\n\nVálida por {{validez}}.\n"
+
+
+def text(data: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        return package.read("word/document.xml").decode("utf-8")
+
+
+def test_substitute_tokens_and_phrases():
+    paragraph = [
+        {"t": "Str", "c": "Para"},
+        {"t": "Space"},
+        {"t": "Str", "c": "{{cliente}},"},
+        {"t": "Space"},
+        {"t": "Str", "c": "Nombre"},
+        {"t": "Space"},
+        {"t": "Str", "c": "Cliente"},
+    ]
+    document = {"blocks": [{"t": "Para", "c": paragraph}]}
+    replacements = {"{{cliente}}": "ACME S.A.", "Nombre Cliente": "Juan Pérez"}
+    assert substitute(document, replacements) == 1
+    words = [node["c"] for node in document["blocks"][0]["c"] if node["t"] == "Str"]
+    assert words == ["Para", "ACME", "S.A.,", "Juan", "Pérez"]
+
+
+def test_output_name():
+    assert output_name({"archivo": "acme/propuesta final"}, 3) == "acme-propuesta-final"
+    assert output_name({"cliente": "ACME Norte"}, 12) == "00012-ACME-Norte"
+    # Sin puntos finales: "S.A." daría "00001-ACME-S.A..docx"
+    assert output_name({"cliente": "ACME S.A."}, 1) == "00001-ACME-S.A"
+    assert output_name({"archivo": ".oculto."}, 2) == "oculto"
+    assert output_name({}, 7) == "00007"
+
+
+def test_missing_fields_and_repeated_outputs_are_rejected(pandoc, tmp_path):
+    records = [
+        {"cliente": "ACME", "validez": "30 días"},
+        {"cliente": "Beta"},
+        {"cliente": "Gamma", "validez": "15 días", "archivo": "gamma"},
+        {"cliente": "Delta", "validez": "10 días", "archivo": "gamma"},
+    ]
+    results = render_personalized(MARKDOWN, records, tmp_path / "out", workers=1)
+    outcome = sorted((result.output.name, result.ok, result.error or "") for result in results)
+    assert outcome == [
+        ("00001-ACME.docx", True, ""),
+        ("00002-Beta.docx", False, "registro 2: faltan campos validez"),
+        ("gamma.docx", False, "registro 4: salida repetida (registro 3)"),
+        ("gamma.docx", True, ""),
+    ]
+    out = tmp_path / "out"
+    assert sorted(path.name for path in out.iterdir()) == ["00001-ACME.docx", "gamma.docx"]
+    # El registro repetido no sobrescribe al primero
+    assert "Gamma" in text((out / "gamma.docx").read_bytes())
+    assert "ACME" in text((out / "00001-ACME.docx").read_bytes())
+
+
+def test_defaults_fill_missing_fields(pandoc, tmp_path):
+    results = render_personalized(
+        MARKDOWN, [{"cliente": "Beta"}], tmp_path, workers=1, defaults={"validez": "60 días"}
+    )
+    assert [result.ok for result in results] == [True]
+    assert "60 días" in text((tmp_path / "00001-Beta.docx").read_bytes())
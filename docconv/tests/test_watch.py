@@ -0,0 +1,90 @@
+"""Eventos que disparan reconversiones y errores durante la vigilancia.
+
+La conversión se sustituye por :func:`fake_convert`, como en
+``test_batch.py``, así que estas pruebas no necesitan pandoc.
+"""
+
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from docconv.batch import BatchResult
+from docconv.watch import IN_CLOSE_WRITE, IN_DELETE, Watcher, watch
+
+# ``docconv.watch`` es también la función que reexporta el paquete
+watch_module = importlib.import_module("docconv.watch")
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "pipe2"), reason="inotify solo existe en Linux")
+
+
+def fake_convert(source: Path, output: Path, *args, **kwargs) -> BatchResult:
+    action = source.read_text().strip()
+    if action == "crash":
+        os._exit(1)
+    if action == "raise":
+        raise RuntimeError("fallo inesperado")
+    output.write_bytes(b"docx")
+    return BatchResult(source, output, True, 0.0)
+
+
+def sources(tmp_path: Path, actions: dict[str, str]) -> list[Path]:
+    paths = []
+    for name, action in actions.items():
+        path = tmp_path / f"{name}.md"
+        path.write_text(action)
+        paths.append(path)
+    return paths
+
+
+def test_price_sheet_changes_its_document(tmp_path):
+    first, second = sources(tmp_path, {"a": "ok", "b": "ok"})
+    sheet = tmp_path / "a_PRECIOS.json"
+    watcher = Watcher([str(first), str(second)], tmp_path)
+    try:
+        assert watcher._changed([(sheet, IN_CLOSE_WRITE)]) == {first}
+        assert watcher._changed([(sheet, IN_DELETE)]) == {first}
+        assert watcher._changed([(tmp_path / "c_PRECIOS.json", IN_CLOSE_WRITE)]) == set()
+        assert watcher._changed([(tmp_path / "notas.txt", IN_CLOSE_WRITE)]) == set()
+    finally:
+        watcher.close()
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="el pool debe heredar fake_convert"
+)
+def test_failures_are_reported_and_watching_continues(tmp_path, monkeypatch):
+    monkeypatch.setattr(watch_module, "convert_file", fake_convert)
+    paths = sources(tmp_path, {"a": "ok", "b": "raise", "c": "crash"})
+    watcher = Watcher([str(path) for path in paths], tmp_path, debounce=0.05)
+    reports = []
+
+    def on_rebuild(report):
+        reports.append(report)
+        if len(reports) == 1:
+            # Tras la caída, el siguiente guardado debe usar un pool nuevo
+            paths[2].write_text("ok")
+        else:
+            watcher.stop()
+
+    thread = threading.Thread(
+        target=watch,
+        args=([str(path) for path in paths],),
+        kwargs=dict(
+            root=tmp_path, engine="subprocess", workers=1, on_rebuild=on_rebuild, watcher=watcher
+        ),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    initial = {result.source.stem: result for result in reports[0].results}
+    assert initial["a"].ok
+    assert (initial["b"].ok, initial["b"].error) == (False, "fallo inesperado")
+    assert (initial["c"].ok, initial["c"].failure) == (False, "crash")
+    assert [(r.source.stem, r.ok) for r in reports[1].results] == [("c", True)]
@@ -0,0 +1,324 @@
+"""Modo vigilancia: reconvierte los Markdown modificados en cuanto se guardan.
+
+Usa inotify directamente (vía ``ctypes``, sin ``inotifywait`` ni sondeo del
+sistema de archivos) sobre los directorios de las fuentes, agrupa las
+ráfagas de guardados con un tiempo de espera corto y reconvierte solo los
+archivos cambiados con los workers, el pool de pandoc y la caché abiertos
+durante toda la sesión. Guardar la hoja de precios ``X_PRECIOS.json`` de un
+documento también lo reconvierte. Solo funciona en Linux.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from .batch import (
+    EXCLUDED_DIRS,
+    MARKDOWN_SUFFIXES,
+    BatchResult,
+    check_filters,
+    collect_sources,
+    convert_file,
+    failure_kind,
+    open_workers,
+    output_path_for,
+)
+from .cache import DEFAULT_MAX_BYTES
+from .metrics import emit
+from .pricing import SIDECAR_SUFFIX, sidecar_path
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_MOVED_FROM = 0x00000040
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Los editores guardan escribiendo en el sitio o renombrando un temporal; al
+# borrar o mover una hoja de precios su documento también cambia
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """Descriptor de inotify con vigilancias por directorio."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        try:
+            self._libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError("inotify no está disponible en esta plataforma") from e
+        self.fd = init(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+        self.directories: dict[int, Path] = {}
+
+    def add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch {directory}: {os.strerror(errno)}")
+        self.directories[wd] = directory
+
+    def read(self, timeout: float | None) -> list[tuple[Path, int]] | None:
+        """Eventos ``(ruta, máscara)`` disponibles; ``None`` si vence ``timeout``."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+                continue
+            directory = self.directories.get(wd)
+            if directory is None and not mask & IN_Q_OVERFLOW:
+                continue
+            path = directory / os.fsdecode(name) if directory and name else directory
+            events.append((path, mask))
+        return events
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+@dataclass
+class Rebuild:
+    """Resultado de una reconversión disparada por cambios."""
+
+    results: list[BatchResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    initial: bool = False
+
+
+class Watcher:
+    """Vigila fuentes Markdown y produce lotes de archivos cambiados.
+
+    ``patterns`` se interpreta como en :func:`~docconv.batch.collect_sources`.
+    Los directorios se vigilan recursivamente y los Markdown nuevos dentro de
+    ellos también cuentan; los archivos y globs solo cubren lo que existía al
+    empezar. Escribir, crear o borrar la hoja ``X_PRECIOS.json`` de una fuente
+    cuenta como un cambio de esa fuente.
+    """
+
+    def __init__(self, patterns: Iterable[str], root: Path | str = ".", debounce: float = 0.1):
+        self.root = Path(root).resolve()
+        self.debounce = debounce
+        self.sources = set(collect_sources(patterns, self.root))
+        self.trees = []
+        for pattern in patterns:
+            candidate = Path(pattern) if os.path.isabs(pattern) else self.root / pattern
+            if candidate.is_dir():
+                self.trees.append(candidate.resolve())
+        self.inotify = Inotify()
+        try:
+            for directory in sorted({p.parent for p in self.sources}):
+                self.inotify.add(directory)
+            for tree in self.trees:
+                self._add_tree(tree)
+        except BaseException:
+            self.inotify.close()
+            raise
+        self._stop = threading.Event()
+
+    def _add_tree(self, tree: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(tree):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+            if Path(dirpath) not in self.inotify.directories.values():
+                self.inotify.add(Path(dirpath))
+
+    def _relevant(self, path: Path) -> bool:
+        if path in self.sources:
+            return True
+        if not path.name.lower().endswith(MARKDOWN_SUFFIXES):
+            return False
+        if EXCLUDED_DIRS.intersection(path.parts):
+            return False
+        return any(tree == path or tree in path.parents for tree in self.trees)
+
+    def _dependents(self, path: Path) -> set[Path]:
+        """Fuentes cuya hoja de precios es ``path``."""
+        if not path.name.endswith(SIDECAR_SUFFIX):
+            return set()
+        return {source for source in self.sources if sidecar_path(source) == path}
+
+    def _changed(self, events: list[tuple[Path, int]]) -> set[Path]:
+        changed = set()
+        for path, mask in events:
+            if mask & IN_Q_OVERFLOW:
+                # Se perdieron eventos: se revisan todas las fuentes conocidas
+                changed.update(p for p in self.sources if p.exists())
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and self._relevant_tree(path):
+                    self._add_tree(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self._relevant(path):
+                self.sources.add(path)
+                changed.add(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                changed |= self._dependents(path)
+        return changed
+
+    def _relevant_tree(self, directory: Path) -> bool:
+        if EXCLUDED_DIRS.intersection(directory.parts):
+            return False
+        return any(tree == directory or tree in directory.parents for tree in self.trees)
+
+    def batches(self) -> Iterator[set[Path]]:
+        """Bloquea hasta que haya cambios y produce cada ráfaga ya agrupada.
+
+        Tras el primer evento se sigue leyendo hasta que pasen ``debounce``
+        segundos sin eventos nuevos.
+        """
+        while not self._stop.is_set():
+            events = self.inotify.read(0.5)
+            if events is None:
+                continue
+            changed = self._changed(events)
+            while True:
+                more = self.inotify.read(self.debounce)
+                if more is None:
+                    break
+                changed |= self._changed(more)
+            if changed:
+                yield {p for p in changed if p.exists()}
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        self.inotify.close()
+
+
+def watch(
+    patterns: Iterable[str],
+    output_dir: Path | str | None = None,
+    root: Path | str = ".",
+    to: str = "docx",
+    workers: int | None = None,
+    engine: str = "server",
+    writer: str = "pandoc",
+    cache_dir: Path | str | None = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    debounce: float = 0.1,
+    on_rebuild: Callable[[Rebuild], None] | None = None,
+    watcher: Watcher | None = None,
+    sections: bool = False,
+    filters: Iterable[str] = (),
+) -> None:
+    """Convierte ``patterns`` y vuelve a convertir cada archivo al guardarlo.
+
+    Sin ``output_dir`` cada documento se escribe junto a su Markdown; con él
+    se replica el árbol de ``root`` como en :func:`~docconv.batch.convert_batch`.
+    La primera pasada convierte todo (lo que no cambió sale de la caché);
+    después solo se reconvierten los archivos guardados. Se ejecuta hasta que
+    se interrumpe o se llama a :meth:`Watcher.stop`. Con ``sections`` los
+    documentos se convierten por secciones, así que al guardar solo se
+    reconvierten las secciones editadas. ``filters`` es la cadena de filtros
+    Lua de :mod:`docconv.filters`, que requiere ``engine="subprocess"``.
+
+    Un documento que falla vuelve como resultado con error y la vigilancia
+    sigue; si un proceso de conversión muere, los siguientes guardados usan
+    un pool de procesos nuevo.
+    """
+    patterns = list(patterns)
+    filters = tuple(filters)
+    check_filters(engine, filters)
+    root = Path(root).resolve()
+    output_dir = Path(output_dir).resolve() if output_dir is not None else None
+    cache_dir = str(cache_dir) if cache_dir else None
+    watcher = watcher or Watcher(patterns, root, debounce)
+
+    def target(source: Path) -> Path:
+        if output_dir is None:
+            return source.with_suffix(f".{to}")
+        return output_path_for(source, root, output_dir, to)
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ExitStack() as stack:
+            executor, pool = stack.enter_context(open_workers(engine, workers))
+
+            def submit(src: Path) -> Future:
+                try:
+                    return executor.submit(
+                        convert_file,
+                        src,
+                        target(src),
+                        to,
+                        cache_dir,
+                        cache_max_bytes,
+                        pool,
+                        writer,
+                        sections,
+                        filters=filters,
+                    )
+                except BrokenProcessPool as e:
+                    future: Future = Future()
+                    future.set_exception(e)
+                    return future
+
+            def rebuild(sources: Iterable[Path], initial: bool = False) -> None:
+                nonlocal executor
+                start = time.perf_counter()
+                futures = [(src, submit(src)) for src in sorted(sources)]
+                report = Rebuild(initial=initial)
+                broken = False
+                for src, future in futures:
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        result = BatchResult(
+                            src, target(src), False, 0.0,
+                            f"el proceso de conversión terminó: {e}", failure="crash",
+                        )
+                    except Exception as e:
+                        result = BatchResult(
+                            src, target(src), False, 0.0, str(e) or type(e).__name__,
+                            failure=failure_kind(e),
+                        )
+                    if result.metrics is not None:
+                        emit(result.metrics)
+                    report.results.append(result)
+                if broken:
+                    # El ejecutor entero queda inservible: los siguientes guardados usan otro
+                    executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                report.elapsed = time.perf_counter() - start
+                if on_rebuild:
+                    on_rebuild(report)
+
+            rebuild(watcher.sources, initial=True)
+            for changed in watcher.batches():
+                if changed:
+                    rebuild(changed)
+    finally:
+        watcher.close()